@@ -0,0 +1,269 @@
+"""
+Return Rate Aggregates
+Running per-category / per-price-range sums that can be folded chunk by chunk
+"""
+
+import numpy as np
+import pandas as pd
+
+# Price buckets used for the price range analysis
+PRICE_BINS = [0, 500, 1000, 1500, 2000, float('inf')]
+PRICE_LABELS = ['0-500', '500-1000', '1000-1500', '1500-2000', '2000+']
+
+LISTED_PRICE_COLUMN = 'Supplier Listed Price (Incl. GST + Commission)'
+DISCOUNTED_PRICE_COLUMN = 'Supplier Discounted Price (Incl GST and Commision)'
+FINANCIAL_COLUMNS = ['order_status', 'meesho_price', 'gst_amount', 'shipping_charges_total',
+                     LISTED_PRICE_COLUMN, DISCOUNTED_PRICE_COLUMN]
+
+
+def price_bin_codes(prices, edges=PRICE_BINS):
+    """Bin index of each price for (low, high] edges, -1 outside the edges or missing"""
+    prices = np.asarray(prices, dtype=np.float64)
+    codes = np.searchsorted(np.asarray(edges, dtype=np.float64), prices, side='left') - 1
+    codes[(codes < 0) | (codes >= len(edges) - 1) | np.isnan(prices)] = -1
+    return codes
+
+
+def assign_price_ranges(prices, edges=PRICE_BINS, labels=PRICE_LABELS):
+    """Bucket prices into price ranges, as pd.cut(prices, edges, labels=labels) would"""
+    codes = price_bin_codes(prices, edges)
+    ranges = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+    return pd.Series(ranges, index=getattr(prices, 'index', None), name=getattr(prices, 'name', None))
+
+
+def _paise(values, scale=1):
+    """Money column as int64 paise, 0 where missing; scale=100 for rupee columns"""
+    values = pd.Series(values)
+    missing = values.isna().to_numpy()
+    if scale == 1:
+        return values.fillna(0).to_numpy(dtype=np.int64), missing
+    # Rupee floats round half away from zero, the same expression as the DuckDB backend
+    amounts = values.fillna(0).to_numpy(dtype=np.float64)
+    return np.trunc(amounts * scale + np.sign(amounts) * 0.5).astype(np.int64), missing
+
+
+def financial_weights(frame):
+    """Per-row int64 weights for ReturnAggregates.MONEY_MEASURES, None without the money columns"""
+    if any(column not in frame.columns for column in FINANCIAL_COLUMNS):
+        return None
+
+    is_return = frame['is_return'].to_numpy(dtype=bool)
+    is_rto = (frame['order_status'].astype(str) == 'rto').to_numpy()
+    revenue, _ = _paise(frame['meesho_price'], scale=100)
+    gst, _ = _paise(frame['gst_amount'])
+    shipping, _ = _paise(frame['shipping_charges_total'], scale=100)
+    listed, listed_missing = _paise(frame[LISTED_PRICE_COLUMN])
+    discounted, discounted_missing = _paise(frame[DISCOUNTED_PRICE_COLUMN])
+    priced = ~(listed_missing | discounted_missing)
+
+    return np.stack([
+        is_rto.astype(np.int64),
+        np.where(is_return, revenue, 0),
+        np.where(is_rto, revenue, 0),
+        np.where(is_return, gst, 0),
+        np.where(is_rto, shipping, 0),
+        np.where(priced, listed, 0),
+        np.where(priced, listed - discounted, 0),
+        np.where(priced & is_return, listed, 0),
+        np.where(priced & is_return, listed - discounted, 0),
+    ])
+
+
+def build_category_table(category_returns, total_orders, total_returns):
+    """Add rate and share columns to a returns/total_orders/avg_price table"""
+    category_returns = category_returns.copy()
+    # Calculate return rate within category
+    category_returns['return_rate_within_category'] = (category_returns['returns'] / category_returns['total_orders']) * 100
+    # Calculate percentage of total orders
+    category_returns['percentage_of_total_orders'] = (category_returns['total_orders'] / total_orders) * 100
+    # Calculate percentage of total returns
+    category_returns['percentage_of_total_returns'] = (category_returns['returns'] / total_returns) * 100
+    return category_returns.sort_values('return_rate_within_category', ascending=False)
+
+
+def build_price_table(price_returns):
+    """Add the return rate column to a returns/total_orders/avg_price table"""
+    price_returns = price_returns.copy()
+    price_returns['return_rate'] = (price_returns['returns'] / price_returns['total_orders']) * 100
+    return price_returns
+
+
+class ReturnAggregates:
+    """Returns, orders and price sums on an integer-coded (category, price bin) cube"""
+
+    MEASURES = ('returns', 'total_orders', 'price_sum', 'price_count')
+    # Integer paise sums (plus the RTO count), filled in the same pass when the rows carry money columns
+    MONEY_MEASURES = ('rto_orders', 'returned_revenue', 'rto_revenue', 'returned_gst', 'rto_shipping',
+                      'listed_price', 'discount', 'returned_listed_price', 'returned_discount')
+
+    def __init__(self, price_labels=PRICE_LABELS):
+        self.price_labels = list(price_labels)
+        self.categories = []
+        self._category_codes = {}
+        # Slot 0 holds rows without a price range, slot b + 1 holds price bin b
+        self.cube = np.zeros((len(self.MEASURES), 0, len(self.price_labels) + 1))
+        self.money = np.zeros((len(self.MONEY_MEASURES), 0, len(self.price_labels) + 1), dtype=np.int64)
+        self.money_rows = 0
+
+    @property
+    def n_slots(self):
+        return len(self.price_labels) + 1
+
+    def _category_slots(self, labels):
+        """Map category labels to cube rows, growing the cube for unseen labels"""
+        new_labels = [label for label in dict.fromkeys(labels) if label not in self._category_codes]
+        for label in new_labels:
+            self._category_codes[label] = len(self.categories)
+            self.categories.append(label)
+        if new_labels:
+            grown = np.zeros((len(self.MEASURES), len(new_labels), self.n_slots))
+            self.cube = np.concatenate([self.cube, grown], axis=1)
+            grown = np.zeros((len(self.MONEY_MEASURES), len(new_labels), self.n_slots), dtype=np.int64)
+            self.money = np.concatenate([self.money, grown], axis=1)
+        return np.array([self._category_codes[label] for label in labels], dtype=np.int64)
+
+    def add_codes(self, category_codes, category_labels, price_bins, is_return, prices, sign=1, money=None):
+        """Accumulate integer-coded rows in one bincount pass per measure"""
+        mapping = self._category_slots(list(category_labels))
+        flat = (mapping[np.asarray(category_codes, dtype=np.int64)] * self.n_slots
+                + np.asarray(price_bins, dtype=np.int64) + 1)
+
+        prices = np.asarray(prices, dtype=np.float64)
+        has_price = ~np.isnan(prices)
+        weights = [np.asarray(is_return, dtype=np.float64), None,
+                   np.where(has_price, prices, 0.0), has_price.astype(np.float64)]
+
+        size = len(self.categories) * self.n_slots
+        for m, w in enumerate(weights):
+            counts = np.bincount(flat, weights=w, minlength=size)
+            self.cube[m] += sign * counts.reshape(len(self.categories), self.n_slots)
+
+        if money is not None:
+            # bincount sums in float64, exact for paise totals below 2**53 (about ₹90 trillion)
+            for m, w in enumerate(money):
+                counts = np.bincount(flat, weights=w, minlength=size)
+                self.money[m] += sign * np.rint(counts).astype(np.int64).reshape(len(self.categories), self.n_slots)
+            self.money_rows += sign * len(flat)
+        return self
+
+    def add_group_sums(self, categories, price_bins, sums, money=None, money_rows=0):
+        """Accumulate rows already summed per (category, price bin), e.g. by a SQL GROUP BY"""
+        codes, labels = pd.factorize(np.asarray(categories, dtype=object))
+        mapping = self._category_slots(list(labels))
+        flat = mapping[codes] * self.n_slots + np.asarray(price_bins, dtype=np.int64) + 1
+
+        size = len(self.categories) * self.n_slots
+        for m, w in enumerate(sums):
+            counts = np.bincount(flat, weights=np.asarray(w, dtype=np.float64), minlength=size)
+            self.cube[m] += counts.reshape(len(self.categories), self.n_slots)
+
+        if money is not None:
+            # Integer adds keep the paise sums exact however large they get
+            for m, w in enumerate(money):
+                np.add.at(self.money[m].reshape(-1), flat, np.asarray(w, dtype=np.int64))
+            self.money_rows += money_rows
+        return self
+
+    def update(self, frame, sign=1):
+        """Fold a preprocessed, categorized frame into the cube"""
+        # Rows without a price range have code -1 and land in slot 0
+        return self.add_rows(frame['product_category'], frame['price_range'].cat.codes,
+                             frame['is_return'], frame['meesho_price_clean'], sign=sign,
+                             money=financial_weights(frame))
+
+    def add_rows(self, categories, price_bins, is_return, prices, sign=1, money=None):
+        """Add (sign=1) or retract (sign=-1) row contributions"""
+        codes, labels = pd.factorize(np.asarray(categories, dtype=object))
+        return self.add_codes(codes, labels, price_bins, is_return, prices, sign=sign, money=money)
+
+    def merge(self, other):
+        """Add another cube into this one"""
+        mapping = self._category_slots(other.categories)
+        self.cube[:, mapping, :] += other.cube
+        self.money[:, mapping, :] += other.money
+        self.money_rows += other.money_rows
+        return self
+
+    @property
+    def total_orders(self):
+        return int(round(self.cube[1].sum()))
+
+    @property
+    def total_returns(self):
+        return int(round(self.cube[0].sum()))
+
+    def _active_categories(self):
+        """Cube rows with orders, in label order (as groupby would sort them)"""
+        active = [i for i in range(len(self.categories)) if self.cube[1, i].sum() != 0]
+        return sorted(active, key=lambda i: self.categories[i])
+
+    def _summarize(self, sums, index):
+        """Turn summed measures into the returns/total_orders/avg_price layout"""
+        price_count = np.where(sums[3] == 0, np.nan, sums[3])
+        table = pd.DataFrame({
+            'returns': np.rint(sums[0]).astype(np.int64),
+            'total_orders': np.rint(sums[1]).astype(np.int64),
+            'avg_price': sums[2] / price_count,
+        }, index=index)
+        return table.round(2)
+
+    def _price_index(self):
+        return pd.CategoricalIndex(self.price_labels, categories=self.price_labels,
+                                   ordered=True, name='price_range')
+
+    def category_table(self):
+        """Per-category marginal of the cube"""
+        rows = self._active_categories()
+        index = pd.Index([self.categories[i] for i in rows], name='product_category')
+        table = self._summarize(self.cube[:, rows, :].sum(axis=2), index)
+        return build_category_table(table, self.total_orders, self.total_returns)
+
+    def price_table(self):
+        """Per-price-range marginal of the cube"""
+        table = self._summarize(self.cube[:, :, 1:].sum(axis=1), self._price_index())
+        return build_price_table(table)
+
+    def cross_tab(self, measure='return_rate'):
+        """Category x price range table of a measure, return_rate or avg_price"""
+        rows = self._active_categories()
+        cells = self.cube[:, rows, 1:]
+        if measure == 'return_rate':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = cells[0] / cells[1] * 100
+        elif measure == 'avg_price':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = cells[2] / cells[3]
+        elif measure == 'price_sum':
+            values = cells[2]
+        else:
+            values = np.rint(cells[self.MEASURES.index(measure)]).astype(np.int64)
+        index = pd.Index([self.categories[i] for i in rows], name='product_category')
+        return pd.DataFrame(values, index=index, columns=self._price_index())
+
+    def _financials(self, money, counts, index):
+        """Rupee amounts, rates and discount depth from summed money measures"""
+        sums = dict(zip(self.MONEY_MEASURES, money))
+        orders, returns = counts[1], counts[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = pd.DataFrame({
+                'total_orders': np.rint(orders).astype(np.int64),
+                'returns': np.rint(returns).astype(np.int64),
+                'rto_orders': sums['rto_orders'],
+                'return_rate': returns / orders * 100,
+                'revenue_lost': sums['returned_revenue'] / 100,
+                'rto_revenue_lost': sums['rto_revenue'] / 100,
+                'gst_on_returns': sums['returned_gst'] / 100,
+                'rto_shipping_burned': sums['rto_shipping'] / 100,
+                'discount_depth': sums['discount'] / sums['listed_price'] * 100,
+                'returned_discount_depth': sums['returned_discount'] / sums['returned_listed_price'] * 100,
+            }, index=index)
+        return table
+
+    def financial_table(self, by='category'):
+        """Revenue lost, RTO shipping and discount depth per category or price range"""
+        if by == 'category':
+            rows = self._active_categories()
+            index = pd.Index([self.categories[i] for i in rows], name='product_category')
+            return self._financials(self.money[:, rows, :].sum(axis=2), self.cube[:, rows, :].sum(axis=2), index)
+        return self._financials(self.money[:, :, 1:].sum(axis=1), self.cube[:, :, 1:].sum(axis=1),
+                                self._price_index())
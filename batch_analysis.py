@@ -0,0 +1,128 @@
+"""
+Batch Multi-Month Analysis
+Processes many ForwardReports/Orders pairs in a process pool and reduces their aggregates
+"""
+
+import io
+import os
+import re
+import glob
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import ReturnAggregates, assign_price_ranges
+from real_data_analysis import RealMeeshoAnalysis, CategorizationCache
+
+FORWARD_TOKEN = 'ForwardReports'
+ORDERS_TOKEN = 'Orders'
+
+
+def _pair_key(path, token):
+    """File name with the report token removed, e.g. 'meesho  Aug.csv'"""
+    name = os.path.basename(path)
+    return re.sub(r'\s+', ' ', name.replace(token, '')).strip().lower()
+
+
+def discover_file_pairs(source):
+    """Find (forward_path, orders_path) pairs in a directory tree or glob pattern"""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, '**', '*.csv'), recursive=True)
+    else:
+        paths = glob.glob(source, recursive=True)
+
+    by_directory = {}
+    for path in sorted(paths):
+        name = os.path.basename(path)
+        if FORWARD_TOKEN in name:
+            kind = 'forward'
+        elif ORDERS_TOKEN in name:
+            kind = 'orders'
+        else:
+            continue
+        by_directory.setdefault(os.path.dirname(path), {'forward': [], 'orders': []})[kind].append(path)
+
+    pairs, unpaired = [], []
+    for directory, files in sorted(by_directory.items()):
+        forwards, orders = files['forward'], files['orders']
+        # One of each in a folder is a pair, whatever the month suffixes say
+        if len(forwards) == 1 and len(orders) == 1:
+            pairs.append((forwards[0], orders[0]))
+            continue
+
+        orders_by_key = {_pair_key(path, ORDERS_TOKEN): path for path in orders}
+        for forward in forwards:
+            match = orders_by_key.pop(_pair_key(forward, FORWARD_TOKEN), None)
+            if match:
+                pairs.append((forward, match))
+            else:
+                unpaired.append(forward)
+        unpaired.extend(orders_by_key.values())
+
+    if unpaired:
+        raise ValueError(f"Could not pair report files: {unpaired}")
+    return pairs
+
+
+def process_file_pair(pair):
+    """Load, merge, categorize and aggregate one monthly pair (runs in a worker)"""
+    forward_path, orders_path = pair
+    analyzer = RealMeeshoAnalysis(forward_path, orders_path)
+    # Workers share the persisted name cache but never write it concurrently
+    analyzer.category_cache = CategorizationCache(read_only=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.load_real_data()
+        analyzer.preprocess_data()
+        analyzer.categorize_products_nlp()
+
+    merged = analyzer.merged_data
+    merged['price_range'] = assign_price_ranges(merged['meesho_price_clean'])
+    return ReturnAggregates().update(merged)
+
+
+def tree_reduce(parts):
+    """Merge partial aggregates pairwise, always in the same order"""
+    if not parts:
+        return ReturnAggregates()
+    while len(parts) > 1:
+        merged = [parts[i].merge(parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
+
+
+def run_batch_analysis(source, workers=None):
+    """Aggregate every monthly pair under source and build the combined return tables"""
+    pairs = discover_file_pairs(source)
+    print(f"Found {len(pairs)} ForwardReports/Orders pairs")
+
+    if workers == 1:
+        parts = [process_file_pair(pair) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map keeps input order, so the reduction tree matches a serial run
+            parts = list(pool.map(process_file_pair, pairs))
+
+    for (forward_path, orders_path), part in zip(pairs, parts):
+        print(f"  {forward_path} + {orders_path}: {part.total_orders:,} orders, {part.total_returns:,} returns")
+
+    analyzer = RealMeeshoAnalysis()
+    analyzer.return_aggregates = tree_reduce(parts)
+    return analyzer.calculate_real_return_rates()
+
+
+def main():
+    """Command line entry point for batch runs"""
+    parser = argparse.ArgumentParser(description='Analyze many monthly Meesho report pairs in parallel')
+    parser.add_argument('source', help='directory or glob of ForwardReports/Orders CSV files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count, 1 = serial)')
+    args = parser.parse_args()
+
+    run_batch_analysis(args.source, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
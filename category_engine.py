@@ -0,0 +1,285 @@
+"""
+Vectorized Keyword Categorization Engine
+Scores whole product-name columns against the category keyword lists at once
+"""
+
+import re
+import time
+import numpy as np
+import pandas as pd
+
+# Characters dropped from product names before keyword matching; token_counter.py shares it
+NON_ALPHA_PATTERN = r'[^a-zA-Z\s]'
+
+SUBSTRING_WEIGHT = 1.0
+TOKEN_WEIGHT = 0.5
+
+# Selectable scorers: substring/token keyword hits, or sparse TF-IDF vectors (vector_categorizer.py)
+CATEGORIZATION_ENGINES = ('keyword', 'sparse')
+
+
+def _trie_pattern(keywords):
+    """Build a regex that matches the longest keyword starting at a position"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional tail: prefer the longer keyword, fall back to this one
+        if '' in node:
+            return body + '?' if len(branches) == 1 and len(body) == 1 else '(?:' + body + ')?'
+        return body
+
+    return render(trie)
+
+
+def categorize_name(product_name, categories, stop_words):
+    """Score a single product name the per-row way (reference implementation)"""
+    product_lower = str(product_name).lower()
+
+    if pd.isna(product_name):
+        features = []
+    else:
+        text = re.sub(NON_ALPHA_PATTERN, '', product_lower)
+        features = [token for token in text.split()
+                    if token not in stop_words and len(token) > 2]
+
+    category_scores = {}
+    for category, keywords in categories.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in product_lower:
+                score += SUBSTRING_WEIGHT
+            if keyword in features:
+                score += TOKEN_WEIGHT
+        category_scores[category] = score
+
+    if max(category_scores.values()) > 0:
+        return max(category_scores, key=category_scores.get)
+    return 'Other'
+
+
+class KeywordCategorizer:
+    """Keyword scorer compiled once from a categories dict and applied column-wise"""
+
+    def __init__(self, categories, stop_words, default_category='Other'):
+        self.category_names = list(categories)
+        self.default_category = default_category
+
+        # Unique keywords in first-seen order; a keyword listed twice (or in two
+        # categories) keeps contributing once per listing, as in the per-row loop
+        self.keywords = list(dict.fromkeys(
+            keyword for keywords in categories.values() for keyword in keywords
+        ))
+        keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        self.weights = np.zeros((len(self.keywords), len(self.category_names)))
+        for c, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                self.weights[keyword_index[keyword], c] += 1
+
+        # One zero-width trie alternation finds, at every position, the longest
+        # keyword starting there. Every shorter keyword starting at the same position
+        # is a prefix of that match, so the prefix table recovers overlapping hits.
+        self.substring_pattern = re.compile(f'(?=({_trie_pattern(self.keywords)}))')
+
+        prefixes = [[keyword_index[other] for other in self.keywords if keyword.startswith(other)]
+                    for keyword in self.keywords]
+        self.prefix_counts = np.array([len(p) for p in prefixes], dtype=np.int64)
+        self.prefix_offsets = np.concatenate(([0], np.cumsum(self.prefix_counts)[:-1]))
+        self.prefix_flat = np.array([i for p in prefixes for i in p], dtype=np.int64)
+
+        # Only keywords that can survive tokenization are worth a token lookup
+        self.token_index = pd.Series({
+            keyword: i for keyword, i in keyword_index.items()
+            if keyword not in stop_words and len(keyword) > 2
+        }, dtype=np.int64)
+        self.keyword_index = keyword_index
+
+    def _substring_hits(self, lowered):
+        """Return (row, keyword) index arrays for substring hits"""
+        matches = lowered.str.findall(self.substring_pattern).explode().dropna()
+        rows = matches.index.to_numpy(dtype=np.int64)
+        longest = matches.map(self.keyword_index).to_numpy(dtype=np.int64)
+
+        # Expand each longest match into all keywords that are its prefixes
+        counts = self.prefix_counts[longest]
+        rows = np.repeat(rows, counts)
+        starts = np.repeat(self.prefix_offsets[longest], counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, self.prefix_flat[starts + within]
+
+    def _token_hits(self, lowered, valid):
+        """Return (row, keyword) index arrays for whole-token hits"""
+        tokens = (lowered[valid]
+                  .str.replace(NON_ALPHA_PATTERN, '', regex=True)
+                  .str.split()
+                  .explode())
+        hits = tokens.map(self.token_index).dropna()
+        return hits.index.to_numpy(dtype=np.int64), hits.to_numpy(dtype=np.int64)
+
+    def _unique_pairs(self, rows, keywords):
+        """Drop repeated (row, keyword) hits so each keyword scores once per row"""
+        keys = np.unique(rows * len(self.keywords) + keywords)
+        return keys // len(self.keywords), keys % len(self.keywords)
+
+    def score(self, product_names):
+        """Return an (n_rows, n_categories) score matrix for a column of names"""
+        names = pd.Series(np.asarray(product_names, dtype=object))
+        lowered = names.astype(str).str.lower()
+        n_rows = len(names)
+
+        sub_rows, sub_keywords = self._unique_pairs(*self._substring_hits(lowered))
+        tok_rows, tok_keywords = self._unique_pairs(*self._token_hits(lowered, names.notna()))
+
+        rows = np.concatenate([sub_rows, tok_rows])
+        keywords = np.concatenate([sub_keywords, tok_keywords])
+        hit_weights = np.concatenate([np.full(len(sub_rows), SUBSTRING_WEIGHT),
+                                      np.full(len(tok_rows), TOKEN_WEIGHT)])
+
+        scores = np.zeros((n_rows, len(self.category_names)))
+        for c in range(len(self.category_names)):
+            scores[:, c] = np.bincount(rows, weights=hit_weights * self.weights[keywords, c],
+                                       minlength=n_rows)
+        return scores
+
+    def categorize(self, product_names):
+        """Return the best category per name; ties go to the earliest category"""
+        # Names repeat heavily, so score each distinct one (missing names included) once
+        codes, uniques = pd.factorize(np.asarray(product_names, dtype=object), use_na_sentinel=False)
+        scores = self.score(uniques)
+        labels = np.array(self.category_names + [self.default_category], dtype=object)
+        best = np.argmax(scores, axis=1)
+        best[scores.max(axis=1, initial=0) <= 0] = len(self.category_names)
+        return labels[best].take(codes)
+
+
+def model_parameters():
+    """Settings that, with the keyword lists, fix every label the keyword engine gives"""
+    return {'non_alpha': NON_ALPHA_PATTERN, 'substring_weight': SUBSTRING_WEIGHT,
+            'token_weight': TOKEN_WEIGHT}
+
+
+def engine_parameters(engine):
+    """Model settings of an engine, for cache keys; needs no optional package"""
+    if engine == 'keyword':
+        return model_parameters()
+    if engine == 'sparse':
+        import vector_categorizer
+        return vector_categorizer.model_parameters()
+    raise ValueError(f"Unknown categorization engine {engine!r}; expected one of {CATEGORIZATION_ENGINES}")
+
+
+def make_categorizer(engine, categories, stop_words):
+    """Build the categorizer for an engine name; 'sparse' needs scikit-learn"""
+    if engine == 'keyword':
+        return KeywordCategorizer(categories, stop_words)
+    if engine == 'sparse':
+        from vector_categorizer import SparseVectorCategorizer
+        return SparseVectorCategorizer(categories, stop_words)
+    raise ValueError(f"Unknown categorization engine {engine!r}; expected one of {CATEGORIZATION_ENGINES}")
+
+
+def compare_engines(product_names, categories, stop_words, engines=CATEGORIZATION_ENGINES, repeat=3):
+    """Throughput of each engine and how often its labels agree with the first one"""
+    names = pd.Series(product_names, dtype=object).reset_index(drop=True)
+
+    labels, seconds = {}, {}
+    for engine in engines:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            labels[engine] = make_categorizer(engine, categories, stop_words).categorize(names)
+            timings.append(time.perf_counter() - start)
+        seconds[engine] = min(timings)
+
+    reference = labels[engines[0]]
+    return {
+        'rows': len(names),
+        'seconds': seconds,
+        'rows_per_second': {e: len(names) / s if s else float('inf') for e, s in seconds.items()},
+        'agreement': {e: float((labels[e] == reference).mean()) if len(names) else 1.0 for e in engines},
+        'other_share': {e: float((labels[e] == 'Other').mean()) if len(names) else 0.0 for e in engines},
+        'confusion': {e: pd.crosstab(pd.Series(reference, name=engines[0]), pd.Series(labels[e], name=e))
+                      for e in engines[1:]},
+    }
+
+
+def benchmark_categorizers(product_names, categories, stop_words, repeat=3):
+    """Time the per-row apply path against the vectorized engine"""
+    names = pd.Series(product_names, dtype=object).reset_index(drop=True)
+
+    apply_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        expected = names.apply(categorize_name, args=(categories, stop_words))
+        apply_times.append(time.perf_counter() - start)
+
+    vector_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        categorizer = KeywordCategorizer(categories, stop_words)
+        result = categorizer.categorize(names)
+        vector_times.append(time.perf_counter() - start)
+
+    mismatches = int((expected.to_numpy() != result).sum())
+    apply_best, vector_best = min(apply_times), min(vector_times)
+    return {
+        'rows': len(names),
+        'apply_seconds': apply_best,
+        'vectorized_seconds': vector_best,
+        'speedup': apply_best / vector_best if vector_best else float('inf'),
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    """Benchmark the categorizers on the real product names, scaled up"""
+    import sys
+    from real_data_analysis import RealMeeshoAnalysis
+
+    target_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    analyzer = RealMeeshoAnalysis()
+    analyzer.load_real_data()
+    analyzer.preprocess_data()
+    base_names = analyzer.merged_data['Product Name']
+    names = pd.concat([base_names] * (target_rows // len(base_names) + 1), ignore_index=True)[:target_rows]
+
+    results = benchmark_categorizers(names, analyzer.categories, analyzer.stop_words)
+
+    print("\nCategorization Benchmark:")
+    print(f"  Rows: {results['rows']:,}")
+    print(f"  Apply path: {results['apply_seconds']:.3f}s")
+    print(f"  Vectorized engine: {results['vectorized_seconds']:.3f}s")
+    print(f"  Speedup: {results['speedup']:.1f}x")
+    print(f"  Mismatched rows: {results['mismatches']}")
+
+    try:
+        make_categorizer('sparse', analyzer.categories, analyzer.stop_words)
+    except ImportError as error:
+        print(f"\nSkipping the engine comparison: {error}")
+        return
+
+    comparison = compare_engines(names, analyzer.categories, analyzer.stop_words)
+
+    print(f"\nEngine Comparison ({comparison['rows']:,} names):")
+    for engine in CATEGORIZATION_ENGINES:
+        print(f"  {engine}: {comparison['seconds'][engine]:.3f}s "
+              f"({comparison['rows_per_second'][engine]:,.0f} rows/s), "
+              f"{comparison['agreement'][engine]*100:.1f}% agreement, "
+              f"{comparison['other_share'][engine]*100:.1f}% Other")
+    for engine, confusion in comparison['confusion'].items():
+        print(f"\nkeyword vs {engine} labels:")
+        print(confusion.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Chart Rendering
+Output format, headless mode, figure templates and parallel rendering for the report charts
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+
+class RenderSettings:
+    """Where and how charts are written; defaults can come from the environment"""
+
+    def __init__(self):
+        self.headless = os.environ.get('MEESHO_HEADLESS', '') not in ('', '0')
+        self.fmt = os.environ.get('MEESHO_CHART_FORMAT', 'png')
+        self.dpi = int(os.environ.get('MEESHO_CHART_DPI', '300'))
+
+
+RENDER_SETTINGS = RenderSettings()
+
+# One (figure, axes) template per chart type, reused within a process
+_FIGURE_TEMPLATES = {}
+
+
+def configure_rendering(headless=None, fmt=None, dpi=None):
+    """Change the render settings; headless charts use the non-interactive Agg backend"""
+    if headless is not None:
+        RENDER_SETTINGS.headless = headless
+    if fmt is not None:
+        RENDER_SETTINGS.fmt = fmt
+    if dpi is not None:
+        RENDER_SETTINGS.dpi = dpi
+    return RENDER_SETTINGS
+
+
+def _pyplot():
+    """Import pyplot on first use, on the Agg backend when headless"""
+    import matplotlib
+    if RENDER_SETTINGS.headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def get_figure(chart_type, nrows=1, ncols=2, figsize=(16, 8)):
+    """Return a cleared figure and axes for a chart type, creating it on first use"""
+    plt = _pyplot()
+
+    template = _FIGURE_TEMPLATES.get(chart_type)
+    if template is not None and plt.fignum_exists(template[0].number):
+        fig, axes = template
+        for ax in fig.axes:
+            ax.clear()
+        fig.suptitle('')
+        return fig, axes
+
+    fig, axes = plt.subplots(nrows, ncols, figsize=figsize)
+    _FIGURE_TEMPLATES[chart_type] = (fig, axes)
+    return fig, axes
+
+
+def finish_figure(fig, basename):
+    """Save a finished figure in the configured format; show it only when interactive"""
+    plt = _pyplot()
+
+    path = f"{basename}.{RENDER_SETTINGS.fmt}"
+    fig.savefig(path, dpi=RENDER_SETTINGS.dpi, bbox_inches='tight')
+    if not RENDER_SETTINGS.headless:
+        plt.show()
+    return path
+
+
+def _init_worker(fmt, dpi):
+    """Pool initializer: workers always render headless with the parent's settings"""
+    configure_rendering(headless=True, fmt=fmt, dpi=dpi)
+
+
+def _render_job(job):
+    """Render one chart and time it"""
+    name, func, args = job
+    start = time.perf_counter()
+    func(*args)
+    return name, time.perf_counter() - start
+
+
+def render_charts(jobs, workers=None):
+    """Render (name, function, args) jobs concurrently and report per-chart timings"""
+    start = time.perf_counter()
+    if workers == 1:
+        configure_rendering(headless=True)
+        timings = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(RENDER_SETTINGS.fmt, RENDER_SETTINGS.dpi)) as pool:
+            timings = list(pool.map(_render_job, jobs))
+    total = time.perf_counter() - start
+
+    print(f"\nChart render timings ({RENDER_SETTINGS.fmt}, {RENDER_SETTINGS.dpi} dpi):")
+    for name, seconds in sorted(timings, key=lambda item: item[1], reverse=True):
+        print(f"  {name}: {seconds:.2f}s")
+    print(f"  Total wall time: {total:.2f}s")
+    return dict(timings)
+
+
+def main():
+    """Render all report charts headless and in parallel"""
+    parser = argparse.ArgumentParser(description='Render the Meesho report charts without a display')
+    parser.add_argument('--format', default=RENDER_SETTINGS.fmt, help='png, svg, pdf, ...')
+    parser.add_argument('--dpi', type=int, default=RENDER_SETTINGS.dpi)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    from report_engine import ReportEngine
+
+    configure_rendering(headless=True, fmt=args.format, dpi=args.dpi)
+    engine = ReportEngine(verbose=False)
+    engine.run(engine.default_reports('chart'), workers=args.workers)
+
+
+if __name__ == "__main__":
+    # Go through the importable module so the chart scripts see the same settings
+    import chart_rendering
+    chart_rendering.main()
@@ -0,0 +1,135 @@
+"""
+Preprocessed Dataset Cache
+Columnar Arrow/Feather snapshot of the merged, preprocessed and categorized data
+"""
+
+import os
+import json
+import hashlib
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it every run reparses the CSVs
+    feather = None
+
+from schema import FORWARD_REPORTS_SCHEMA, ORDERS_SCHEMA
+
+DATASET_CACHE_FILE = 'meesho_merged_cache.feather'
+# Bump when preprocessing adds, drops or retypes a cached column; schema and dtype
+# changes are caught by layout_hash() on their own
+CACHE_FORMAT_VERSION = 3
+
+# Explicit storage dtypes for the cached merged frame
+CACHE_DTYPES = {
+    'order_date': 'datetime64[ns]',
+    'order_status': 'category',
+    'state': 'category',
+    'Reason for Credit Entry': 'category',
+    'Customer State': 'category',
+    'SKU': 'category',
+    'Size': 'category',
+    'Product Name': 'object',
+    'product_category': 'category',
+    'is_return': 'bool',
+    'is_delivered': 'bool',
+    'is_cancelled': 'bool',
+    'meesho_price_clean': 'float64',
+}
+
+
+def layout_hash():
+    """Hash of the input schemas and cached dtypes that shape the cached frame"""
+    layout = {'version': CACHE_FORMAT_VERSION, 'forward': FORWARD_REPORTS_SCHEMA,
+              'orders': ORDERS_SCHEMA, 'dtypes': CACHE_DTYPES}
+    return hashlib.sha256(json.dumps(layout, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """Size, modification time and content hash of a source file"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+
+
+class DatasetCache:
+    """Feather file of the prepared dataset, invalidated when any source file changes"""
+
+    def __init__(self, sources, path=DATASET_CACHE_FILE):
+        self.sources = list(sources)
+        self.path = path
+        self.meta_path = path + '.json'
+
+    @property
+    def available(self):
+        return feather is not None
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def is_valid(self, keyword_hash):
+        """Check the cache against the source files and keyword table"""
+        meta = self._read_meta()
+        if (not self.available or meta is None or not os.path.exists(self.path)
+                or meta.get('version') != CACHE_FORMAT_VERSION
+                or meta.get('layout') != layout_hash()
+                or meta.get('keyword_hash') != keyword_hash
+                or sorted(meta.get('sources', {})) != sorted(self.sources)):
+            return False
+
+        refreshed = False
+        for source in self.sources:
+            stored = meta['sources'][source]
+            stat = os.stat(source)
+            if stat.st_size != stored['size']:
+                return False
+            if stat.st_mtime_ns == stored['mtime_ns']:
+                continue
+            # Touched but maybe unchanged: only the content hash can tell
+            if file_sha256(source) != stored['sha256']:
+                return False
+            stored['mtime_ns'] = stat.st_mtime_ns
+            refreshed = True
+
+        if refreshed:
+            self._write_meta(meta)
+        return True
+
+    def read(self):
+        """Read the cached columns into a DataFrame"""
+        # Mapping skips a file-sized Arrow read buffer; to_pandas still copies every column
+        table = feather.read_table(self.path, memory_map=True)
+        return table.to_pandas()
+
+    def write(self, frame, keyword_hash):
+        """Store the prepared frame with explicit dtypes"""
+        dtypes = {column: dtype for column, dtype in CACHE_DTYPES.items() if column in frame.columns}
+        frame = frame.astype(dtypes).reset_index(drop=True)
+
+        # Uncompressed so later reads can map the file instead of decompressing it
+        temp_path = self.path + '.tmp'
+        feather.write_feather(frame, temp_path, compression='uncompressed')
+        os.replace(temp_path, self.path)
+
+        self._write_meta({
+            'version': CACHE_FORMAT_VERSION,
+            'layout': layout_hash(),
+            'keyword_hash': keyword_hash,
+            'rows': len(frame),
+            'sources': {source: file_fingerprint(source) for source in self.sources},
+        })
@@ -0,0 +1,306 @@
+"""
+DuckDB Execution Backend
+Out-of-core merge, status flags, price bins and return aggregates expressed as SQL over the raw reports
+"""
+
+import io
+import os
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; the pandas backend needs nothing extra
+    duckdb = None
+
+from aggregates import PRICE_BINS, ReturnAggregates
+from order_join import LINE_BITS, SUB_ORDER_PATTERN
+from schema import DATE_FORMATS, FORWARD_REPORTS_SCHEMA, ORDERS_SCHEMA, NON_NUMERIC_KINDS
+
+# Strings pandas.read_csv reads as missing by default, so both backends see the same blanks
+CSV_NULL_STRINGS = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+                    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Same rules as order_join.sub_order_keys and schema.parse_paise, as SQL macros
+MACROS = [
+    f"""CREATE OR REPLACE TEMP MACRO sub_order_key(id) AS
+        CASE WHEN regexp_full_match(id, '{SUB_ORDER_PATTERN}')
+             THEN (CAST(split_part(id, '_', 1) AS BIGINT) << {LINE_BITS}) | CAST(split_part(id, '_', 2) AS BIGINT)
+        END""",
+    """CREATE OR REPLACE TEMP MACRO is_paise(t) AS
+        t IS NULL OR trim(t) = ''
+        OR (regexp_full_match(trim(t), '[+-]?[0-9]{0,16}(\\.[0-9]*)?') AND regexp_matches(t, '[0-9]'))""",
+    # Up to three fraction digits, rounded half away from zero to paise; wide decimals only when needed
+    """CREATE OR REPLACE TEMP MACRO rupees(t) AS NULLIF(regexp_extract(trim(t), '^[+-]?[0-9]*(\\.[0-9]{0,3})?'), '')""",
+    # aggregates._paise for rupee floats: round half away from zero to paise
+    """CREATE OR REPLACE TEMP MACRO rupee_paise(x) AS CAST(trunc(x * 100 + sign(x) * 0.5) AS BIGINT)""",
+    """CREATE OR REPLACE TEMP MACRO paise(t) AS
+        CASE WHEN length(trim(t)) <= 18 THEN CAST(round(TRY_CAST(rupees(t) AS DECIMAL(18, 3)), 2) * 100 AS BIGINT)
+             ELSE CAST(round(TRY_CAST(rupees(t) AS DECIMAL(38, 3)), 2) * 100 AS BIGINT)
+        END""",
+]
+
+# The characters str.strip() removes from product names (ASCII whitespace)
+WHITESPACE_SQL = ' || '.join(f'chr({ord(char)})' for char in ' \t\n\v\f\r')
+
+# (low, high] price bins as a CASE; -1 outside the edges or missing, like aggregates.price_bin_codes
+PRICE_BIN_SQL = 'CASE ' + ' '.join(
+    f"WHEN meesho_price > {low} AND meesho_price <= {high} THEN {b}"
+    for b, (low, high) in enumerate(zip(PRICE_BINS[:-1], PRICE_BINS[1:])) if high != float('inf')
+) + f" WHEN meesho_price > {PRICE_BINS[-2]} THEN {len(PRICE_BINS) - 2} ELSE -1 END"
+
+# aggregates.financial_weights as SQL sums: integer paise, rupee columns rounded to paise
+MONEY_SUMS = {
+    'rto_orders': 'count(*) FILTER (WHERE is_rto)',
+    'returned_revenue': 'sum(rupee_paise(meesho_price)) FILTER (WHERE is_return)',
+    'rto_revenue': 'sum(rupee_paise(meesho_price)) FILTER (WHERE is_rto)',
+    'returned_gst': 'sum(gst_amount) FILTER (WHERE is_return)',
+    'rto_shipping': 'sum(rupee_paise(shipping_charges_total)) FILTER (WHERE is_rto)',
+    'listed_price': 'sum(listed_price) FILTER (WHERE priced)',
+    'discount': 'sum(listed_price - discounted_price) FILTER (WHERE priced)',
+    'returned_listed_price': 'sum(listed_price) FILTER (WHERE priced AND is_return)',
+    'returned_discount': 'sum(listed_price - discounted_price) FILTER (WHERE priced AND is_return)',
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _valid_sql(column, kind):
+    """SQL predicate for a value that apply_schema would accept"""
+    value = _quote(column)
+    if kind == 'key':
+        return f"COALESCE(regexp_full_match({value}, '{SUB_ORDER_PATTERN}'), false)"
+    if kind == 'date':
+        formats = ', '.join(f"'{date_format}'" for date_format in DATE_FORMATS)
+        return f"try_strptime({value}, [{formats}]) IS NOT NULL"
+    if kind == 'paise':
+        return f"is_paise({value})"
+    if kind not in NON_NUMERIC_KINDS:
+        number = f"TRY_CAST({value} AS DOUBLE)"
+        if not np.issubdtype(np.dtype(kind), np.integer):
+            # Unparseable floats become missing, the row stays
+            return 'true'
+        # Whole numbers within the declared width, like schema.fits_integer
+        limits = np.iinfo(kind)
+        return (f"({value} IS NULL OR COALESCE({number} = trunc({number}) "
+                f"AND {number} BETWEEN {limits.min} AND {limits.max}, false))")
+    return 'true'
+
+
+def _number(column):
+    """A numeric column as DOUBLE, NULL where the text is not a number"""
+    return f"TRY_CAST({_quote(column)} AS DOUBLE)"
+
+
+class DuckDBReturnBackend:
+    """Joins and aggregates the reports inside DuckDB, spilling to disk past the memory limit"""
+
+    def __init__(self, forward_path, orders_path, database=':memory:', memory_limit=None, threads=None,
+                 temp_directory=None):
+        if duckdb is None:
+            raise ImportError("The DuckDB backend needs duckdb (pip install duckdb)")
+        self.forward_path = forward_path
+        self.orders_path = orders_path
+        self.con = duckdb.connect(database)
+        self.con.execute("SET enable_progress_bar = false")
+        settings = {'memory_limit': memory_limit, 'threads': threads, 'temp_directory': temp_directory}
+        for name, value in settings.items():
+            if value is not None:
+                self.con.execute(f"SET {name} = '{value}'")
+        for macro in MACROS:
+            self.con.execute(macro)
+        self.shapes = {}
+        self.rejected = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self.con.close()
+
+    @staticmethod
+    def source_sql(path):
+        """Table function reading a raw report: the CSV itself or a Parquet copy of it"""
+        literal = "'" + str(path).replace("'", "''") + "'"
+        if str(path).lower().endswith('.parquet'):
+            return f"read_parquet({literal})"
+        nulls = ', '.join("'" + value + "'" for value in CSV_NULL_STRINGS)
+        return (f"read_csv({literal}, header = true, all_varchar = true, delim = ',', quote = '\"', "
+                f"escape = '\"', nullstr = [{nulls}])")
+
+    def _load_table(self, table, path, schema, columns):
+        """Materialize the typed columns of one report with a schema validity flag"""
+        source = self.source_sql(path)
+        found = [row[0] for row in self.con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+        missing = [column for column in schema if column not in found]
+        if missing:
+            raise ValueError(f"{path}: missing expected columns {missing}")
+
+        # Every column is read as text first, so CSV and Parquet sources validate the same way
+        raw = ', '.join(f"CAST({_quote(column)} AS VARCHAR) AS {_quote(column)}" for column in schema)
+        valid = ' AND '.join(_valid_sql(column, kind) for column, kind in schema.items())
+        self.con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {table} AS
+            SELECT {valid} AS valid, {', '.join(columns)}
+            FROM (SELECT {raw} FROM {source})
+        """)
+        rows, rejected = self.con.execute(
+            f"SELECT count(*) FILTER (WHERE valid), count(*) FILTER (WHERE NOT valid) FROM {table}").fetchone()
+        self.shapes[path] = (rows, len(schema))
+        self.rejected[path] = rejected
+
+    def load(self):
+        """Read both reports once into compact typed tables"""
+        self._load_table('forward', self.forward_path, FORWARD_REPORTS_SCHEMA, [
+            'sub_order_key(sub_order_num) AS join_key',
+            'CAST(order_status AS VARCHAR) AS order_status',
+            f"{_number('meesho_price')} AS meesho_price",
+            'paise(gst_amount) AS gst_amount',
+            f"{_number('shipping_charges_total')} AS shipping_charges_total",
+        ])
+        self._load_table('orders', self.orders_path, ORDERS_SCHEMA, [
+            'sub_order_key("Sub Order No") AS join_key',
+            # preprocess_data: astype(str) turns missing names into 'nan', then strips them
+            f"trim(COALESCE(\"Product Name\", 'nan'), {WHITESPACE_SQL}) AS product_name",
+            'paise("Supplier Listed Price (Incl. GST + Commission)") AS listed_price',
+            'paise("Supplier Discounted Price (Incl GST and Commision)") AS discounted_price',
+        ])
+        self.con.execute("""
+            CREATE OR REPLACE TEMP VIEW merged AS
+            SELECT f.*, o.product_name, o.listed_price, o.discounted_price,
+                   COALESCE(f.order_status IN ('Return', 'rto'), false) AS is_return,
+                   COALESCE(f.order_status = 'rto', false) AS is_rto,
+                   o.listed_price IS NOT NULL AND o.discounted_price IS NOT NULL AS priced
+            FROM (SELECT * FROM forward WHERE valid) f
+            JOIN (SELECT * FROM orders WHERE valid) o USING (join_key)
+        """)
+        return self
+
+    def join_diagnostics(self):
+        """The same counts as SubOrderIndex.diagnostics(), from per-key row counts on each side"""
+        row = self.con.execute("""
+            WITH l AS (SELECT join_key, count(*) AS n FROM forward WHERE valid AND join_key IS NOT NULL GROUP BY 1),
+                 r AS (SELECT join_key, count(*) AS n FROM orders WHERE valid AND join_key IS NOT NULL GROUP BY 1),
+                 sides AS (
+                     SELECT (SELECT count(*) FROM forward WHERE valid) AS left_rows,
+                            (SELECT count(*) FROM forward WHERE valid AND join_key IS NULL) AS unparsed_left,
+                            (SELECT count(*) FROM orders WHERE valid) AS right_rows,
+                            (SELECT count(*) FROM orders WHERE valid AND join_key IS NULL) AS unparsed_right)
+            SELECT any_value(left_rows), any_value(unparsed_left), any_value(right_rows), any_value(unparsed_right),
+                   COALESCE(sum(l.n) FILTER (WHERE r.n IS NULL), 0),
+                   COALESCE(sum(l.n - 1) FILTER (WHERE r.n IS NOT NULL), 0),
+                   COALESCE(sum(r.n) FILTER (WHERE l.n IS NULL), 0),
+                   count(*) FILTER (WHERE r.n > 1),
+                   COALESCE(sum(r.n - 1), 0),
+                   COALESCE(sum(l.n * r.n), 0)
+            FROM sides, l FULL OUTER JOIN r USING (join_key)
+        """).fetchone()
+        (left_rows, unparsed_left, right_rows, unparsed_right, unmatched_parsed_left, duplicate_left,
+         unmatched_parsed_right, duplicate_keys, duplicate_rows, output_rows) = [int(value or 0) for value in row]
+        return {
+            'left_rows': left_rows,
+            'unmatched_left_rows': unmatched_parsed_left + unparsed_left,
+            'unparsed_left_keys': unparsed_left,
+            'duplicate_left_rows': duplicate_left,
+            'right_rows': right_rows,
+            'unmatched_right_rows': unmatched_parsed_right + unparsed_right,
+            'unparsed_right_keys': unparsed_right,
+            'duplicate_right_keys': duplicate_keys,
+            'duplicate_right_rows': duplicate_rows,
+            'output_rows': output_rows,
+        }
+
+    def product_names(self):
+        """Distinct cleaned names of the joined rows"""
+        return self.con.execute("SELECT DISTINCT product_name FROM merged").df()['product_name']
+
+    def aggregate(self, categorize):
+        """Group the joined rows by (category, price bin) in SQL and fold the sums into a cube"""
+        # Categorization is pushed down as a name -> category table, computed once per distinct name
+        names = self.product_names()
+        name_categories = pd.DataFrame({'product_name': names,
+                                        'product_category': np.asarray(categorize(names), dtype=object)})
+        self.con.register('name_categories', name_categories)
+
+        groups = self.con.execute(f"""
+            SELECT c.product_category, {PRICE_BIN_SQL} AS price_bin,
+                   sum(CAST(is_return AS INTEGER)) AS returns,
+                   count(*) AS total_orders,
+                   COALESCE(sum(meesho_price), 0) AS price_sum,
+                   count(meesho_price) AS price_count,
+                   {', '.join(f'CAST(COALESCE({expression}, 0) AS BIGINT) AS {measure}'
+                              for measure, expression in MONEY_SUMS.items())}
+            FROM merged
+            JOIN name_categories c USING (product_name)
+            GROUP BY ALL
+        """).df()
+        self.con.unregister('name_categories')
+
+        money = [groups[measure].to_numpy(dtype=np.int64) for measure in ReturnAggregates.MONEY_MEASURES]
+        return ReturnAggregates().add_group_sums(
+            groups['product_category'], groups['price_bin'],
+            [groups[measure].to_numpy(dtype=np.float64) for measure in ReturnAggregates.MEASURES],
+            money=money, money_rows=int(groups['total_orders'].sum()))
+
+
+def write_parquet(csv_path, parquet_path=None):
+    """Copy a raw report to Parquet, every column kept as text, for faster repeated scans"""
+    if duckdb is None:
+        raise ImportError("Writing Parquet copies needs duckdb (pip install duckdb)")
+    parquet_path = parquet_path or os.path.splitext(csv_path)[0] + '.parquet'
+    literal = "'" + parquet_path.replace("'", "''") + "'"
+    with duckdb.connect() as con:
+        con.execute(f"COPY (SELECT * FROM {DuckDBReturnBackend.source_sql(csv_path)}) TO {literal} (FORMAT parquet)")
+    return parquet_path
+
+
+def compare_backends(forward_path, orders_path, **options):
+    """Seconds per backend and whether their category and price tables are identical"""
+    from real_data_analysis import EXECUTION_BACKENDS, RealMeeshoAnalysis
+
+    results, tables = {}, {}
+    for backend in EXECUTION_BACKENDS:
+        analyzer = RealMeeshoAnalysis(forward_path, orders_path)
+        # Only the timing matters here, not the usual console tables
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if backend == 'duckdb':
+                analyzer.aggregate_with_duckdb(**options)
+            else:
+                analyzer.load_real_data()
+                analyzer.preprocess_data()
+                analyzer.categorize_products_nlp()
+            tables[backend] = analyzer.calculate_real_return_rates()
+            results[f'{backend}_seconds'] = time.perf_counter() - start
+
+    pandas_tables, duckdb_tables = tables['pandas'], tables['duckdb']
+    results['identical'] = (pandas_tables[0].equals(duckdb_tables[0]) and pandas_tables[1].equals(duckdb_tables[1])
+                            and pandas_tables[2] == duckdb_tables[2])
+    return results
+
+
+def main():
+    """Time both backends on a pair of reports and check they agree"""
+    import sys
+    from real_data_analysis import EXECUTION_BACKENDS, FORWARD_REPORTS_FILE, ORDERS_FILE
+
+    forward_path = sys.argv[1] if len(sys.argv) > 1 else FORWARD_REPORTS_FILE
+    orders_path = sys.argv[2] if len(sys.argv) > 2 else ORDERS_FILE
+
+    results = compare_backends(forward_path, orders_path)
+    print("\nExecution Backend Comparison:")
+    for backend in EXECUTION_BACKENDS:
+        print(f"  {backend}: {results[f'{backend}_seconds']:.3f}s")
+    print(f"  Identical tables: {'yes' if results['identical'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Geographic Return Analysis
+Integer-coded state and pin region index with return/RTO rates from one bincount pass
+"""
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_STATE = 'Unknown'
+# Indian pin codes have 6 digits; the first 3 identify the postal region
+PIN_REGION_DIVISOR = 1000
+
+GEO_MEASURES = ('total_orders', 'returns', 'rto')
+
+# Spellings seen in the reports that name a state another way
+STATE_ALIASES = {'Up': 'Uttar Pradesh', 'Mumbai': 'Maharashtra'}
+
+
+def normalize_states(states):
+    """Integer state codes and labels, with case, spacing and known aliases unified"""
+    raw_codes, raw_labels = pd.factorize(pd.Series(states, dtype=object).fillna(UNKNOWN_STATE).to_numpy())
+    # Clean each distinct spelling once, then merge the spellings that now agree
+    cleaned = [' '.join(str(label).split()).title() for label in raw_labels]
+    cleaned = [STATE_ALIASES.get(label, label) for label in cleaned]
+    label_codes, labels = pd.factorize(np.asarray(cleaned, dtype=object), sort=True)
+    return label_codes[raw_codes], list(labels)
+
+
+def merged_state_codes(merged):
+    """Normalized state codes and labels of merged rows"""
+    # ForwardReports state first, the Orders file's Customer State where it is missing
+    states = merged['state'].astype(object)
+    if 'Customer State' in merged.columns:
+        states = states.where(states.notna(), merged['Customer State'].astype(object))
+    return normalize_states(states)
+
+
+def parse_pins(pins):
+    """Pin codes as int64, -1 where a pin is missing or not a number"""
+    values = pd.to_numeric(pd.Series(np.asarray(pins)), errors='coerce').to_numpy(dtype=np.float64)
+    parsed = np.full(len(values), -1, dtype=np.int64)
+    valid = ~np.isnan(values)
+    parsed[valid] = values[valid].astype(np.int64)
+    return parsed
+
+
+def count_measures(keys, size, is_return, is_rto):
+    """Orders, returns and RTO per integer key, one bincount per measure"""
+    return np.stack([
+        np.bincount(keys, minlength=size),
+        np.bincount(keys, weights=is_return, minlength=size),
+        np.bincount(keys, weights=is_rto, minlength=size),
+    ])
+
+
+def rate_table(counts, index):
+    """total_orders/returns/rto counts with return and RTO rates"""
+    table = pd.DataFrame(np.rint(counts).astype(np.int64).T, columns=list(GEO_MEASURES), index=index)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['return_rate'] = table['returns'] / table['total_orders'] * 100
+        table['rto_rate'] = table['rto'] / table['total_orders'] * 100
+    return table
+
+
+class GeoIndex:
+    """Merged rows coded by state, pin region and category, with pre-summed counts"""
+
+    def __init__(self, merged):
+        self.state_codes, self.states = merged_state_codes(merged)
+
+        pins = parse_pins(merged['pin'])
+        regions = np.where(pins >= 0, pins // PIN_REGION_DIVISOR, -1)
+        self.region_codes, region_labels = pd.factorize(regions, sort=True)
+        self.regions = list(region_labels)
+
+        self.category_codes, categories = pd.factorize(merged['product_category'].astype(object).to_numpy(),
+                                                       sort=True)
+        self.categories = list(categories)
+
+        self.is_return = merged['is_return'].to_numpy(dtype=bool)
+        self.is_rto = (merged['order_status'].astype(str) == 'rto').to_numpy()
+
+        self._build_counts(pins)
+
+    def _build_counts(self, pins):
+        n_states, n_categories = len(self.states), len(self.categories)
+
+        # Category x state cube; the state marginal is its sum over categories
+        keys = self.category_codes * n_states + self.state_codes
+        self.category_state = count_measures(keys, n_categories * n_states, self.is_return,
+                                             self.is_rto).reshape(3, n_categories, n_states)
+        self.region_counts = count_measures(self.region_codes, len(self.regions), self.is_return, self.is_rto)
+
+        # Per-pin counts on sorted unique pins, so pin lookups never touch the rows again
+        valid = pins >= 0
+        pin_codes, pin_values = pd.factorize(pins[valid], sort=True)
+        self.pin_values = np.asarray(pin_values, dtype=np.int64)
+        self.pin_counts = count_measures(pin_codes, len(self.pin_values), self.is_return[valid], self.is_rto[valid])
+
+    def state_table(self):
+        """Return and RTO rates per state"""
+        index = pd.Index(self.states, name='state')
+        return rate_table(self.category_state.sum(axis=1), index)
+
+    def region_table(self):
+        """Return and RTO rates per pin region (first three pin digits, -1 = no pin)"""
+        index = pd.Index(self.regions, name='pin_region')
+        return rate_table(self.region_counts, index)
+
+    def category_state_table(self, measure='return_rate'):
+        """Category x state table of a count or of return_rate / rto_rate"""
+        cube = self.category_state
+        if measure in ('return_rate', 'rto_rate'):
+            numerator = cube[1] if measure == 'return_rate' else cube[2]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = numerator / cube[0] * 100
+        else:
+            values = np.rint(cube[GEO_MEASURES.index(measure)]).astype(np.int64)
+        return pd.DataFrame(values, index=pd.Index(self.categories, name='product_category'),
+                            columns=pd.Index(self.states, name='state'))
+
+    def lookup_pins(self, pins):
+        """Combined orders, returns, RTO and rates for a set of pin codes"""
+        pins = np.unique(np.asarray(pins, dtype=np.int64))
+        positions = np.minimum(np.searchsorted(self.pin_values, pins), max(len(self.pin_values) - 1, 0))
+        found = positions[self.pin_values[positions] == pins] if len(self.pin_values) else positions[:0]
+
+        total_orders, returns, rto = (int(round(value)) for value in self.pin_counts[:, found].sum(axis=1))
+        return {
+            'pins_found': len(found),
+            'total_orders': total_orders,
+            'returns': returns,
+            'rto': rto,
+            'return_rate': returns / total_orders * 100 if total_orders else float('nan'),
+            'rto_rate': rto / total_orders * 100 if total_orders else float('nan'),
+        }
@@ -0,0 +1,139 @@
+"""
+Incremental Daily Return Analysis
+Folds each new ForwardReports/Orders drop into persisted aggregates
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from aggregates import ReturnAggregates, assign_price_ranges
+from order_join import SubOrderIndex
+from schema import FORWARD_REPORTS_SCHEMA, ORDERS_SCHEMA, read_with_schema
+
+INCREMENTAL_STATE_FILE = 'meesho_incremental_state.pkl'
+STATE_FORMAT_VERSION = 3
+
+# What each seen sub-order contributed, so a status change can be retracted
+SUB_ORDER_COLUMNS = ['sub_order_num', 'order_status', 'product_category', 'price_bin',
+                     'is_return', 'meesho_price_clean']
+
+
+class IncrementalReturnState:
+    """Per-(category, price bin) sums plus the contribution of every seen sub-order"""
+
+    def __init__(self, path=INCREMENTAL_STATE_FILE):
+        self.path = path
+        self.keyword_hash = None
+        self.aggregates = ReturnAggregates()
+        self.sub_orders = pd.DataFrame(columns=SUB_ORDER_COLUMNS)
+
+    def load(self, keyword_hash):
+        """Load the persisted state; a changed keyword table needs a full rebuild"""
+        self.keyword_hash = keyword_hash
+        if not os.path.exists(self.path):
+            return self
+
+        stored = pd.read_pickle(self.path)
+        if stored.get('version') != STATE_FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported state format, delete it to rebuild")
+        if stored['keyword_hash'] != keyword_hash:
+            raise ValueError(f"{self.path}: category keywords changed since the state was "
+                             f"built, delete it to rebuild from the full history")
+
+        self.aggregates = stored['aggregates']
+        self.sub_orders = stored['sub_orders']
+        return self
+
+    def save(self):
+        pd.to_pickle({
+            'version': STATE_FORMAT_VERSION,
+            'keyword_hash': self.keyword_hash,
+            'aggregates': self.aggregates,
+            'sub_orders': self.sub_orders,
+        }, self.path)
+
+    def apply_status_changes(self, forward):
+        """Retract and re-insert known sub-orders whose status or price changed"""
+        stored = self.sub_orders
+        latest = forward.set_index('sub_order_num')
+        known = stored[stored['sub_order_num'].isin(latest.index)]
+        if known.empty:
+            return 0
+
+        new_status = latest.loc[known['sub_order_num'], 'order_status'].astype(str).to_numpy()
+        new_price = pd.to_numeric(latest.loc[known['sub_order_num'], 'meesho_price'],
+                                  errors='coerce').to_numpy(dtype=np.float64)
+        old_price = known['meesho_price_clean'].to_numpy(dtype=np.float64)
+        changed = ((known['order_status'].to_numpy() != new_status)
+                   | ~((old_price == new_price) | (np.isnan(old_price) & np.isnan(new_price))))
+        if not changed.any():
+            return 0
+
+        before = known[changed]
+        after = before.copy()
+        after['order_status'] = new_status[changed]
+        after['is_return'] = pd.Series(new_status[changed]).isin(['Return', 'rto']).to_numpy()
+        after['meesho_price_clean'] = new_price[changed]
+        after['price_bin'] = assign_price_ranges(pd.Series(new_price[changed])).cat.codes.to_numpy()
+
+        self._add(before, sign=-1)
+        self._add(after, sign=1)
+        self.sub_orders.loc[after.index, after.columns] = after
+        return int(before['sub_order_num'].nunique())
+
+    def add_new_rows(self, merged):
+        """Insert freshly merged, preprocessed and categorized rows"""
+        rows = pd.DataFrame({
+            'sub_order_num': merged['sub_order_num'].to_numpy(),
+            'order_status': merged['order_status'].astype(str).to_numpy(),
+            'product_category': merged['product_category'].to_numpy(),
+            'price_bin': merged['price_range'].cat.codes.to_numpy(dtype=np.int64),
+            'is_return': merged['is_return'].to_numpy(),
+            'meesho_price_clean': merged['meesho_price_clean'].to_numpy(dtype=np.float64),
+        })
+        self._add(rows, sign=1)
+        if self.sub_orders.empty:
+            self.sub_orders = rows
+        else:
+            self.sub_orders = pd.concat([self.sub_orders, rows], ignore_index=True)
+        return len(rows)
+
+    def _add(self, rows, sign):
+        self.aggregates.add_rows(rows['product_category'], rows['price_bin'], rows['is_return'],
+                                 rows['meesho_price_clean'], sign=sign)
+
+
+def apply_daily_drop(analyzer, state, forward_path, orders_path):
+    """Merge only the new sub-orders of a drop and update the persisted state
+
+    Forward rows for sub-orders seen earlier only update status and price; their
+    category comes from the stored contribution, so each drop's Orders file only
+    needs to cover the sub-orders that are new in that drop.
+    """
+    forward, rejected = read_with_schema(forward_path, FORWARD_REPORTS_SCHEMA)
+    analyzer._report_rejected(forward_path, len(rejected))
+    forward = forward.drop_duplicates('sub_order_num', keep='last')
+
+    seen = forward['sub_order_num'].isin(state.sub_orders['sub_order_num'])
+    changed = state.apply_status_changes(forward[seen])
+
+    new_rows = 0
+    new_forward = forward[~seen]
+    if not new_forward.empty:
+        orders, rejected = read_with_schema(orders_path, ORDERS_SCHEMA)
+        analyzer._report_rejected(orders_path, len(rejected))
+
+        merged = SubOrderIndex(orders).join(new_forward)
+        if not merged.empty:
+            analyzer._preprocess_frame(merged)
+            merged['product_category'] = analyzer.category_cache.categorize(
+                merged['Product Name'], analyzer.categories, analyzer.stop_words
+            )
+            merged['price_range'] = assign_price_ranges(merged['meesho_price_clean'])
+            new_rows = state.add_new_rows(merged)
+            analyzer.category_cache.save()
+
+    print(f"Daily drop: {len(forward):,} forward rows, {new_rows:,} new merged rows, "
+          f"{changed:,} sub-orders with status/price changes")
+    return new_rows, changed
@@ -0,0 +1,159 @@
+"""
+Meesho Analysis Command Line
+One entry point for the analysis, chart and summary scripts with a fast console-only startup
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Only the subcommand that is run imports pandas, matplotlib or openpyxl
+HEAVY_MODULES = ('pandas', 'matplotlib', 'matplotlib.pyplot', 'openpyxl', 'seaborn')
+
+
+def run_analyze(args):
+    """Full analysis: load, categorize, return tables, Excel and charts"""
+    from real_data_analysis import RealMeeshoAnalysis
+
+    RealMeeshoAnalysis(category_engine=args.engine).run_complete_analysis(
+        chunksize=args.chunksize, use_cache=not args.no_cache, export_excel=not args.no_excel,
+        report_path=args.report, profile_stage=args.profile_stage, trace_memory=args.trace_memory,
+        backend=args.backend)
+
+
+def run_stacked(args):
+    """Stacked bar and percentage charts with their summary"""
+    import stacked_bar_analysis
+    stacked_bar_analysis.main()
+
+
+def run_percentages(args):
+    """Return percentage charts with their summary"""
+    import return_percentage_plots
+    return_percentage_plots.main()
+
+
+def run_trends(args):
+    """Weekly and rolling return rate charts with their summary"""
+    import return_trend_plots
+    try:
+        return_trend_plots.main()
+    except ValueError as error:
+        # Streaming and DuckDB runs do not save the daily table the trends need
+        raise SystemExit(f"trends: {error}")
+
+
+def run_summary(args):
+    """Console-only summary of the saved results; no plotting or Excel libraries"""
+    from results_store import RESULTS_STORE_FILE, load_table
+    from report_engine import ReportEngine
+
+    if os.path.exists(RESULTS_STORE_FILE):
+        summary = load_table('summary')
+        print("Summary:")
+        for metric, value in zip(summary['Metric'], summary['Value']):
+            print(f"  {metric}: {value:g}")
+
+    ReportEngine(verbose=False).run(['return_distribution'])
+
+
+def run_bins(args):
+    """Return tables for several price binning schemes"""
+    from price_binning import run_binning_analysis
+    run_binning_analysis(args.width, args.quantiles)
+
+
+def run_serve(args):
+    """HTTP query service over warm in-memory aggregates"""
+    from query_service import run_service
+    run_service(host=args.host, port=args.port, poll_seconds=args.poll, category_engine=args.engine)
+
+
+def _time_command(code, repeats):
+    """Median wall time of running code in a fresh interpreter"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def benchmark_startup(repeats=5):
+    """Compare fresh-process startup of the console summary with the old eager imports"""
+    summary_code = "import meesho_cli; meesho_cli.main(['summary'])"
+    cases = [
+        ('Interpreter only', 'pass'),
+        ('Eager imports (pandas, numpy, pyplot, seaborn)',
+         'import pandas, numpy, matplotlib.pyplot\ntry:\n    import seaborn\nexcept ImportError:\n    pass'),
+        ('meesho_cli summary', summary_code),
+    ]
+
+    print(f"Startup benchmark (median of {repeats} fresh processes):")
+    for name, code in cases:
+        print(f"  {name}: {_time_command(code, repeats):.3f}s")
+
+    # Which heavy libraries the console path actually pulled in
+    check = (f"import io, sys, contextlib\n"
+             f"with contextlib.redirect_stdout(io.StringIO()):\n"
+             f"    import meesho_cli; meesho_cli.main(['summary'])\n"
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', check], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    print(f"  Heavy modules loaded by summary: {loaded or 'none'}")
+
+
+def run_benchmark(args):
+    benchmark_startup(args.repeats)
+
+
+def main(argv=None):
+    """Parse the subcommand and run it"""
+    parser = argparse.ArgumentParser(description='Meesho product return analysis')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subcommands.add_parser('analyze', help='run the full analysis on the CSV reports')
+    analyze.add_argument('--chunksize', type=int, default=None, help='stream the forward report in chunks')
+    analyze.add_argument('--no-cache', action='store_true', help='ignore the prepared data cache')
+    analyze.add_argument('--no-excel', action='store_true', help='skip the Excel workbook')
+    analyze.add_argument('--engine', choices=('keyword', 'sparse'), default='keyword',
+                         help='product categorization engine (sparse needs scikit-learn)')
+    analyze.add_argument('--backend', choices=('pandas', 'duckdb'), default='pandas',
+                         help='run the join and aggregation in pandas or as SQL in DuckDB (needs duckdb)')
+    analyze.add_argument('--report', default='meesho_run_report.json', help='JSON run report path')
+    analyze.add_argument('--profile-stage', default=None,
+                         help='run one stage (e.g. categorize) under cProfile and save the stats')
+    analyze.add_argument('--trace-memory', action='store_true', help='record tracemalloc peaks per stage')
+    analyze.set_defaults(handler=run_analyze)
+
+    subcommands.add_parser('stacked', help='stacked bar charts').set_defaults(handler=run_stacked)
+    subcommands.add_parser('percentages', help='return percentage charts').set_defaults(handler=run_percentages)
+    subcommands.add_parser('trends', help='return rate trend charts').set_defaults(handler=run_trends)
+    subcommands.add_parser('summary', help='console summary of saved results').set_defaults(handler=run_summary)
+
+    bins = subcommands.add_parser('bins', help='return tables for several price binning schemes')
+    bins.add_argument('--width', type=float, default=100, help='fixed bin width in ₹ (default: 100)')
+    bins.add_argument('--quantiles', type=int, nargs='*', default=[4, 10])
+    bins.set_defaults(handler=run_bins)
+
+    serve = subcommands.add_parser('serve', help='HTTP query service over warm in-memory aggregates')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--poll', type=float, default=5.0, help='seconds between checks of the input files')
+    serve.add_argument('--engine', choices=('keyword', 'sparse'), default='keyword',
+                       help='product categorization engine (sparse needs scikit-learn)')
+    serve.set_defaults(handler=run_serve)
+
+    benchmark = subcommands.add_parser('benchmark', help='time the console-only startup path')
+    benchmark.add_argument('--repeats', type=int, default=5)
+    benchmark.set_defaults(handler=run_benchmark)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Sub-Order Join Index
+Sorted integer index on the Orders file for joining ForwardReports rows, with join diagnostics
+"""
+
+import numpy as np
+import pandas as pd
+
+# '381809810413_1' -> order 381809810413, line 1. Fourteen order digits keep
+# order << LINE_BITS inside int64; four line digits fit int16. Only canonical ids
+# (no leading zeros) parse, so every packed key stands for exactly one id string.
+MAX_ORDER_DIGITS = 14
+MAX_LINE_DIGITS = 4
+LINE_BITS = 16
+UNPARSED_KEY = -1
+SUB_ORDER_PATTERN = (rf'(?:0|[1-9][0-9]{{0,{MAX_ORDER_DIGITS - 1}}})'
+                     rf'_(?:0|[1-9][0-9]{{0,{MAX_LINE_DIGITS - 1}}})')
+
+
+def _sub_order_block(text):
+    """Parse a block of ASCII byte strings; returns (orders, lines, valid)"""
+    n = len(text)
+    orders = np.zeros(n, dtype=np.int64)
+    lines = np.zeros(n, dtype=np.int64)
+    if text.dtype.itemsize == 0:
+        return orders, lines, np.zeros(n, dtype=bool)
+
+    # One row per character position; fixed-width bytes are padded with NUL
+    chars = np.ascontiguousarray(text.view(np.uint8).reshape(n, text.dtype.itemsize).T)
+    value = np.zeros(n, dtype=np.int64)
+    count = np.zeros(n, dtype=np.int64)
+    order_digits = np.zeros(n, dtype=np.int64)
+    separators = np.zeros(n, dtype=np.int64)
+    after_separator = np.zeros(n, dtype=bool)
+    line_zero = np.zeros(n, dtype=bool)
+    valid = np.ones(n, dtype=bool)
+
+    # Horner's rule over the character positions; at the '_' the running number
+    # becomes the order and restarts for the line
+    for char in chars:
+        present = char != 0
+        is_separator = char == ord('_')
+        # uint8 arithmetic wraps, so every non-digit lands above 9
+        digit = char - np.uint8(ord('0'))
+        is_digit = present & (digit <= 9)
+        valid &= is_digit | is_separator | ~present
+        line_zero |= after_separator & (digit == 0)
+        after_separator = is_separator
+
+        orders = np.where(is_separator, value, orders)
+        order_digits = np.where(is_separator, count, order_digits)
+        separators += is_separator
+        value = np.where(is_digit, value * 10 + digit, np.where(is_separator, 0, value))
+        count = np.where(is_separator, 0, count + is_digit)
+    lines, line_digits = value, count
+
+    # No leading zeros, so '0123_1' never packs to the key of '123_1'
+    leading_zeros = ((chars[0] == ord('0')) & (order_digits > 1)) | (line_zero & (line_digits > 1))
+    valid &= ((separators == 1)
+              & (order_digits >= 1) & (order_digits <= MAX_ORDER_DIGITS)
+              & (line_digits >= 1) & (line_digits <= MAX_LINE_DIGITS)
+              & ~leading_zeros)
+    return orders, lines, valid
+
+
+def parse_sub_orders(values, block_size=1_000_000):
+    """Order numbers (int64) and line numbers (int16); order -1 where an id does not parse"""
+    # Missing values become b'None' or b'nan', which never parse, so no fillna pass is needed
+    text = pd.Series(values, dtype=object).to_numpy()
+    try:
+        text = text.astype('S')
+    except UnicodeEncodeError:
+        # Non-ASCII text is never a sub-order id; replace it with something that fails to parse
+        text = np.array([value if str(value).isascii() else '~' for value in text], dtype='S')
+
+    orders = np.full(len(text), UNPARSED_KEY, dtype=np.int64)
+    lines = np.zeros(len(text), dtype=np.int16)
+    for begin in range(0, len(text), block_size):
+        block = slice(begin, begin + block_size)
+        block_orders, block_lines, valid = _sub_order_block(text[block])
+        orders[block] = np.where(valid, block_orders, UNPARSED_KEY)
+        lines[block] = np.where(valid, block_lines, 0)
+    return orders, lines
+
+
+def sub_order_keys(values):
+    """One int64 join key per id, (order << 16) | line; -1 where an id does not parse"""
+    # '0123_1' does not parse, so it can never join '123_1' the way equal numbers would
+    orders, lines = parse_sub_orders(values)
+    keys = (orders << LINE_BITS) | lines.astype(np.int64)
+    keys[orders == UNPARSED_KEY] = UNPARSED_KEY
+    return keys
+
+
+class SubOrderIndex:
+    """Sorted integer keys of the Orders rows; joins with searchsorted, never comparing strings"""
+
+    def __init__(self, orders, key='Sub Order No'):
+        self.orders = orders.reset_index(drop=True)
+        keys = sub_order_keys(self.orders[key])
+        parsed = keys != UNPARSED_KEY
+
+        # One stable sort; duplicate sub-orders stay in file order and join like pd.merge
+        order = np.argsort(keys, kind='stable')
+        order = order[parsed[order]]
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(order) else order
+
+        self.positions = order
+        self.keys = sorted_keys[starts]
+        self.offsets = starts
+        self.counts = np.diff(np.r_[starts, len(order)]).astype(np.int64)
+
+        # Running diagnostics over every join() against this index
+        self.right_rows = len(self.orders)
+        self.unparsed_right = int((~parsed).sum())
+        self.hits = np.zeros(len(self.keys), dtype=np.int64)
+        self.left_rows = 0
+        self.unparsed_left = 0
+        self.unmatched_left = 0
+        self.output_rows = 0
+
+    def lookup(self, values):
+        """Slot of each id in the index, -1 when it is not there"""
+        keys = sub_order_keys(values)
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64), keys
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = (keys != UNPARSED_KEY) & (self.keys[slots] == keys)
+        return np.where(found, slots, -1), keys
+
+    def join(self, frame, on='sub_order_num'):
+        """Inner-join frame rows against the indexed Orders rows"""
+        slots, keys = self.lookup(frame[on])
+        matched = np.flatnonzero(slots >= 0)
+        slots = slots[matched]
+
+        counts = self.counts[slots]
+        left = np.repeat(matched, counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        right = self.positions[np.repeat(self.offsets[slots], counts) + within]
+
+        self.left_rows += len(frame)
+        self.unparsed_left += int((keys == UNPARSED_KEY).sum())
+        self.unmatched_left += len(frame) - len(matched)
+        self.hits += np.bincount(slots, minlength=len(self.keys))
+        self.output_rows += len(left)
+
+        return pd.concat([
+            frame.iloc[left].reset_index(drop=True),
+            self.orders.iloc[right].reset_index(drop=True),
+        ], axis=1)
+
+    def diagnostics(self):
+        """Row counts dropped or multiplied by the joins so far"""
+        # A duplicate left row joins a sub-order that an earlier left row already joined
+        never_hit = self.hits == 0
+        return {
+            'left_rows': self.left_rows,
+            'unmatched_left_rows': self.unmatched_left,
+            'unparsed_left_keys': self.unparsed_left,
+            'duplicate_left_rows': int(np.maximum(self.hits - 1, 0).sum()),
+            'right_rows': self.right_rows,
+            'unmatched_right_rows': int(self.counts[never_hit].sum()) + self.unparsed_right,
+            'unparsed_right_keys': self.unparsed_right,
+            'duplicate_right_keys': int((self.counts > 1).sum()),
+            'duplicate_right_rows': int((self.counts - 1).sum()),
+            'output_rows': self.output_rows,
+        }
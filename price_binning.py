@@ -0,0 +1,187 @@
+"""
+Price Binning Engine
+Evaluates many price-range schemes against one sorted price array with searchsorted and prefix sums
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from aggregates import PRICE_BINS, build_price_table
+
+
+def bin_labels(edges):
+    """'0-500' style labels for consecutive edges, '2000+' for an open last bin"""
+    labels = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        labels.append(f"{low:g}+" if np.isinf(high) else f"{low:g}-{high:g}")
+    return labels
+
+
+def uniform_edges(width, max_price, start=0):
+    """Fixed-width edges, e.g. ₹100 bins, covering prices up to max_price"""
+    stop = start + width * max(1, int(np.ceil((max_price - start) / width)))
+    return list(np.arange(start, stop + width, width, dtype=np.float64))
+
+
+class PriceBinner:
+    """Prices sorted once, with prefix sums of returns and prices for O(bins) tables"""
+
+    def __init__(self, prices, is_return, categories=None):
+        prices = np.asarray(prices, dtype=np.float64)
+        is_return = np.asarray(is_return, dtype=np.float64)
+        # Rows without a price never fall in a price range
+        has_price = ~np.isnan(prices)
+        prices, is_return = prices[has_price], is_return[has_price]
+
+        # One sort by price; grouping that order by category keeps each slice sorted
+        order = np.argsort(prices, kind='stable')
+        if categories is None:
+            self.categories = []
+            self._set_sorted(prices[order], is_return[order], [len(prices)])
+        else:
+            codes, labels = pd.factorize(np.asarray(categories, dtype=object)[has_price], sort=True)
+            self.categories = list(labels)
+            by_category = order[np.argsort(codes[order], kind='stable')]
+            self._set_sorted(prices[by_category], is_return[by_category],
+                             np.bincount(codes, minlength=len(labels)))
+            # Category-free tables use the plain price order
+            self._overall = PriceBinner.__new__(PriceBinner)
+            self._overall.categories = []
+            self._overall._set_sorted(prices[order], is_return[order], [len(prices)])
+
+    def _set_sorted(self, sorted_prices, sorted_returns, counts):
+        """Keep the sorted slices with prefix sums of returns and prices"""
+        self.sorted_prices = sorted_prices
+        self.cum_returns = np.concatenate([[0.0], np.cumsum(sorted_returns)])
+        self.cum_prices = np.concatenate([[0.0], np.cumsum(sorted_prices)])
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def __len__(self):
+        return len(self.sorted_prices)
+
+    def _slice(self, category):
+        if category is None:
+            return 0, len(self.sorted_prices)
+        code = self.categories.index(category)
+        return self.offsets[code], self.offsets[code + 1]
+
+    def _bin_sums(self, edges, start, stop, include_lowest=False):
+        """Orders, returns and price sums per (low, high] bin of one sorted slice"""
+        prices = self.sorted_prices[start:stop]
+        positions = start + np.searchsorted(prices, edges, side='right')
+        if include_lowest:
+            positions[0] = start + np.searchsorted(prices, edges[0], side='left')
+
+        orders = np.diff(positions)
+        returns = np.diff(self.cum_returns[positions])
+        price_sums = np.diff(self.cum_prices[positions])
+        return orders, returns, price_sums
+
+    def table(self, edges=PRICE_BINS, labels=None, category=None, include_lowest=False):
+        """Price range table for one scheme, in the layout of ReturnAggregates.price_table()"""
+        if category is None and self.categories:
+            return self._overall.table(edges, labels, include_lowest=include_lowest)
+
+        edges = np.asarray(edges, dtype=np.float64)
+        labels = bin_labels(edges) if labels is None else list(labels)
+        start, stop = self._slice(category)
+        orders, returns, price_sums = self._bin_sums(edges, start, stop, include_lowest)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_price = price_sums / np.where(orders == 0, np.nan, orders)
+        table = pd.DataFrame({
+            'returns': np.rint(returns).astype(np.int64),
+            'total_orders': orders.astype(np.int64),
+            'avg_price': avg_price,
+        }, index=pd.CategoricalIndex(labels, categories=labels, ordered=True, name='price_range'))
+        return build_price_table(table.round(2))
+
+    def quantile_edges(self, quantiles, category=None):
+        """Edges at equal-count quantiles, read straight off the sorted slice"""
+        if category is None and self.categories:
+            return self._overall.quantile_edges(quantiles)
+
+        start, stop = self._slice(category)
+        prices = self.sorted_prices[start:stop]
+        if len(prices) == 0:
+            return []
+        # Linear interpolation between order statistics, as np.quantile does
+        positions = np.linspace(0, len(prices) - 1, quantiles + 1)
+        low = np.floor(positions).astype(np.int64)
+        high = np.ceil(positions).astype(np.int64)
+        edges = prices[low] + (prices[high] - prices[low]) * (positions - low)
+        return list(np.unique(edges))
+
+    def quantile_table(self, quantiles, category=None):
+        """Table over equal-count bins; the lowest edge is closed so the minimum is included"""
+        edges = self.quantile_edges(quantiles, category)
+        if not edges:
+            return self.table([0, np.inf], category=category)
+        if len(edges) == 1:
+            # Every price is the same: one closed bin [price, price]
+            edges = edges * 2
+        return self.table(edges, category=category, include_lowest=True)
+
+    def category_tables(self, scheme):
+        """One table per category, with edges from scheme(binner, category) or fixed edges"""
+        tables = {}
+        for category in self.categories:
+            if callable(scheme):
+                tables[category] = scheme(self, category)
+            else:
+                tables[category] = self.table(scheme, category=category)
+        return pd.concat(tables, names=['product_category'])
+
+    def evaluate(self, schemes):
+        """Tables for many named schemes: edge lists or callables taking the binner"""
+        return {name: scheme(self) if callable(scheme) else self.table(scheme)
+                for name, scheme in schemes.items()}
+
+
+def default_schemes(max_price, width=100, quantiles=(4, 10)):
+    """The standard ranges plus fine fixed-width bins and overall / per-category quantiles"""
+    schemes = {'standard': PRICE_BINS,
+               f'width_{width:g}': uniform_edges(width, max_price)}
+    for q in quantiles:
+        schemes[f'quantile_{q}'] = lambda binner, q=q: binner.quantile_table(q)
+        schemes[f'category_quantile_{q}'] = lambda binner, q=q: binner.category_tables(
+            lambda b, category: b.quantile_table(q, category))
+    return schemes
+
+
+def run_binning_analysis(width=100, quantiles=(4, 10)):
+    """Sort the prepared prices once and print the table of every scheme"""
+    from real_data_analysis import RealMeeshoAnalysis
+
+    merged = RealMeeshoAnalysis().load_prepared_data()
+    start = time.perf_counter()
+    binner = PriceBinner(merged['meesho_price_clean'], merged['is_return'], merged['product_category'])
+    sort_time = time.perf_counter() - start
+
+    schemes = default_schemes(np.nanmax(merged['meesho_price_clean']), width, quantiles)
+    start = time.perf_counter()
+    tables = binner.evaluate(schemes)
+    eval_time = time.perf_counter() - start
+
+    for name, table in tables.items():
+        print(f"\n{name}:")
+        print(table)
+    print(f"\nSorted {len(binner):,} prices in {sort_time:.3f}s; "
+          f"evaluated {len(tables)} schemes in {eval_time:.3f}s")
+    return tables
+
+
+def main():
+    """Evaluate several price binning schemes on the prepared data"""
+    parser = argparse.ArgumentParser(description='Return tables for many price binning schemes')
+    parser.add_argument('--width', type=float, default=100, help='fixed bin width in ₹ (default: 100)')
+    parser.add_argument('--quantiles', type=int, nargs='*', default=[4, 10])
+    args = parser.parse_args()
+
+    run_binning_analysis(args.width, args.quantiles)
+
+
+if __name__ == "__main__":
+    main()
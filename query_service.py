@@ -0,0 +1,495 @@
+"""
+Return Query Service
+Asyncio HTTP service answering return-rate queries and chart requests from warm in-memory aggregates
+"""
+
+import io
+import os
+import json
+import time
+import asyncio
+import argparse
+from http import HTTPStatus
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+
+from aggregates import PRICE_LABELS, price_bin_codes
+from geo_analysis import merged_state_codes
+from real_data_analysis import RealMeeshoAnalysis, FORWARD_REPORTS_FILE, ORDERS_FILE
+
+# Meesho Brand Colors
+JAMUNI = '#580b48'  # Deep Purple
+AAM = '#FFA500'     # Bright Yellow/Orange
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RELOAD_POLL_SECONDS = 5.0
+CHART_CACHE_SIZE = 64
+CHART_DPI = 100
+MAX_REQUEST_BYTES = 16_384
+
+# Dimensions of the dense cube, in axis order; 'date' is answered from the row-level day codes
+CUBE_DIMENSIONS = ('category', 'price_range', 'status', 'state')
+DIMENSIONS = CUBE_DIMENSIONS + ('date',)
+QUERY_MEASURES = ('total_orders', 'returns', 'rto', 'price_sum', 'price_count')
+UNPRICED = 'Unpriced'
+UNKNOWN_STATUS = 'Unknown'
+
+
+def _code_dtype(n_labels):
+    """Smallest signed integer type holding codes 0..n_labels-1 and -1"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_labels <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class WarmCube:
+    """Integer-coded merged rows plus a dense category x price range x status x state cube"""
+
+    def __init__(self, merged):
+        self.rows = len(merged)
+        category_codes, categories = pd.factorize(merged['product_category'].astype(object).to_numpy(), sort=True)
+        status_codes, statuses = pd.factorize(
+            merged['order_status'].astype(object).fillna(UNKNOWN_STATUS).to_numpy(), sort=True)
+        state_codes, states = merged_state_codes(merged)
+
+        # Rows without a price range get their own slot after the price bins
+        prices = merged['meesho_price_clean'].to_numpy(dtype=np.float64)
+        price_codes = price_bin_codes(prices)
+        price_codes[price_codes < 0] = len(PRICE_LABELS)
+
+        self.labels = {
+            'category': list(categories),
+            'price_range': list(PRICE_LABELS) + [UNPRICED],
+            'status': list(statuses),
+            'state': list(states),
+        }
+        self.codes = {dimension: np.asarray(codes).astype(_code_dtype(len(self.labels[dimension])))
+                      for dimension, codes in zip(CUBE_DIMENSIONS,
+                                                  [category_codes, price_codes, status_codes, state_codes])}
+
+        # Days since the first order date; -1 where the date is missing
+        dates = pd.to_datetime(merged['order_date']).dt.normalize()
+        self.origin = dates.min()
+        self.day_codes = (dates - self.origin).dt.days.fillna(-1).to_numpy(dtype=np.int32)
+        self.n_days = int(self.day_codes.max(initial=-1)) + 1
+
+        self.is_return = merged['is_return'].to_numpy(dtype=bool)
+        self.is_rto = (merged['order_status'].astype(str) == 'rto').to_numpy()
+        self.has_price = ~np.isnan(prices)
+        self.prices = np.where(self.has_price, prices, 0.0)
+
+        self.shape = tuple(len(self.labels[dimension]) for dimension in CUBE_DIMENSIONS)
+        keys = np.ravel_multi_index([self.codes[dimension] for dimension in CUBE_DIMENSIONS], self.shape)
+        self.cube = self._count(keys, int(np.prod(self.shape)), slice(None)).reshape((-1,) + self.shape)
+
+    def _count(self, keys, size, rows):
+        """QUERY_MEASURES per integer key over the selected rows, one bincount per measure"""
+        weights = [None, self.is_return[rows], self.is_rto[rows], self.prices[rows], self.has_price[rows]]
+        return np.stack([np.bincount(keys, weights=w, minlength=size) for w in weights])
+
+    def _label_codes(self, dimension, values):
+        """Codes of the requested labels; unknown labels are an error, not an empty result"""
+        positions = {label: code for code, label in enumerate(self.labels[dimension])}
+        unknown = [value for value in values if value not in positions]
+        if unknown:
+            raise ValueError(f"Unknown {dimension} {unknown}; expected some of {self.labels[dimension]}")
+        return np.array(sorted({positions[value] for value in values}), dtype=np.int64)
+
+    def _day(self, value):
+        return (pd.Timestamp(value).normalize() - self.origin).days
+
+    def query(self, filters=None, group_by=(), date_from=None, date_to=None):
+        """Orders, returns, RTO and rates per group of the rows matching every filter"""
+        filters = {dimension: values for dimension, values in (filters or {}).items() if values}
+        group_by = list(dict.fromkeys(group_by))
+        unknown = ([dimension for dimension in filters if dimension not in CUBE_DIMENSIONS]
+                   + [dimension for dimension in group_by if dimension not in DIMENSIONS])
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {unknown}; expected some of {list(DIMENSIONS)}")
+        selected = {dimension: self._label_codes(dimension, values) for dimension, values in filters.items()}
+
+        # Without dates the cube answers in time proportional to its size, not the row count
+        if date_from is None and date_to is None and 'date' not in group_by:
+            counts, labels = self._query_cube(selected, group_by)
+            source = 'cube'
+        else:
+            counts, labels = self._query_rows(selected, group_by, date_from, date_to)
+            source = 'rows'
+        return self._table(counts, group_by, labels), source
+
+    def _query_cube(self, selected, group_by):
+        """Slice the filtered labels out of the cube and sum away the other dimensions"""
+        cells = self.cube
+        for axis, dimension in enumerate(CUBE_DIMENSIONS, start=1):
+            if dimension in selected:
+                cells = np.take(cells, selected[dimension], axis=axis)
+
+        kept = [dimension for dimension in CUBE_DIMENSIONS if dimension in group_by]
+        summed = tuple(axis for axis, dimension in enumerate(CUBE_DIMENSIONS, start=1) if dimension not in group_by)
+        cells = cells.sum(axis=summed)
+        # Put the kept axes in the requested order, then flatten them into one group axis
+        cells = np.moveaxis(cells, [kept.index(dimension) + 1 for dimension in group_by],
+                            range(1, len(group_by) + 1))
+        labels = [self._selected_labels(dimension, selected) for dimension in group_by]
+        return cells.reshape(len(QUERY_MEASURES), -1), labels
+
+    def _selected_labels(self, dimension, selected):
+        codes = selected.get(dimension, range(len(self.labels[dimension])))
+        return [self.labels[dimension][code] for code in codes]
+
+    def _query_rows(self, selected, group_by, date_from, date_to):
+        """Mask the coded rows, then bincount on the combined group codes"""
+        mask = self.day_codes >= 0 if (date_from is not None or date_to is not None) else np.ones(self.rows, bool)
+        if date_from is not None:
+            mask &= self.day_codes >= self._day(date_from)
+        if date_to is not None:
+            mask &= self.day_codes <= self._day(date_to)
+        for dimension, codes in selected.items():
+            mask &= np.isin(self.codes[dimension], codes)
+        rows = np.flatnonzero(mask)
+
+        group_codes, shape, labels = [], [], []
+        for dimension in group_by:
+            if dimension == 'date':
+                codes = self.day_codes[rows]
+                valid = codes >= 0
+                rows, codes = rows[valid], codes[valid]
+                group_codes = [previous[valid] for previous in group_codes]
+                labels.append([f"{day:%Y-%m-%d}" for day in pd.date_range(self.origin, periods=self.n_days)])
+                shape.append(self.n_days)
+            else:
+                # Renumber the selected labels 0..k-1 so the group axis only spans them
+                kept = selected.get(dimension, np.arange(len(self.labels[dimension])))
+                lookup = np.full(len(self.labels[dimension]), -1, dtype=np.int64)
+                lookup[kept] = np.arange(len(kept))
+                codes = lookup[self.codes[dimension][rows]]
+                labels.append([self.labels[dimension][code] for code in kept])
+                shape.append(len(kept))
+            group_codes.append(codes)
+
+        keys = np.ravel_multi_index(group_codes, shape) if group_by else np.zeros(len(rows), dtype=np.int64)
+        return self._count(keys, int(np.prod(shape)), rows), labels
+
+    @staticmethod
+    def _table(counts, group_by, labels):
+        """Groups with at least one order, with return/RTO rates and average price"""
+        if group_by:
+            index = pd.MultiIndex.from_product(labels, names=group_by)
+            if len(group_by) == 1:
+                index = index.get_level_values(0)
+        else:
+            index = pd.Index(['all'], name='group')
+        table = pd.DataFrame(counts.T, columns=list(QUERY_MEASURES), index=index)
+        table = table[table['total_orders'] > 0]
+        for measure in ('total_orders', 'returns', 'rto', 'price_count'):
+            table[measure] = np.rint(table[measure]).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['return_rate'] = table['returns'] / table['total_orders'] * 100
+            table['rto_rate'] = table['rto'] / table['total_orders'] * 100
+            table['avg_price'] = table['price_sum'] / table['price_count'].where(table['price_count'] > 0)
+        return table.drop(columns=['price_sum', 'price_count'])
+
+
+class ChartCache:
+    """LRU cache of rendered chart images, keyed by data version and normalized query"""
+
+    def __init__(self, max_entries=CHART_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        image = self.entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        self.entries[key] = image
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'entries': len(self.entries), 'max_entries': self.max_entries, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'bytes': sum(len(image) for image in self.entries.values())}
+
+
+def render_query_chart(table, group_by, dpi=CHART_DPI):
+    """Return rate and kept/returned orders per group as PNG bytes"""
+    # A bare Figure (no pyplot) keeps renders independent of any GUI backend or global state
+    from matplotlib.figure import Figure
+
+    names = [' / '.join(map(str, label)) if isinstance(label, tuple) else str(label) for label in table.index]
+    title = ' x '.join(dimension.replace('_', ' ').title() for dimension in group_by) or 'All Orders'
+
+    fig = Figure(figsize=(16, 7))
+    ax1, ax2 = fig.subplots(1, 2)
+    fig.suptitle(f'Meesho Returns by {title}', fontsize=18, fontweight='bold', color=JAMUNI)
+
+    ax1.bar(names, table['return_rate'], color=JAMUNI, edgecolor='white', alpha=0.9)
+    ax1.set_title('Return Rate', fontsize=14, fontweight='bold', color=JAMUNI)
+    ax1.set_ylabel('Return Rate (%)', fontsize=12, fontweight='bold')
+
+    kept = table['total_orders'] - table['returns']
+    ax2.bar(names, kept, color=AAM, edgecolor='white', label='Kept')
+    ax2.bar(names, table['returns'], bottom=kept, color=JAMUNI, edgecolor='white', label='Returned')
+    ax2.set_title('Orders', fontsize=14, fontweight='bold', color=JAMUNI)
+    ax2.set_ylabel('Orders', fontsize=12, fontweight='bold')
+    ax2.legend()
+
+    for ax in (ax1, ax2):
+        ax.tick_params(axis='x', rotation=45 if len(names) <= 20 else 90, labelsize=9 if len(names) <= 20 else 6)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def parse_query(params):
+    """Filters, group-by dimensions and date range from parse_qs output"""
+    def values(name):
+        # Repeat a parameter or separate values with commas: ?status=Return,rto
+        return [value.strip() for raw in params.get(name, []) for value in raw.split(',') if value.strip()]
+
+    filters = {dimension: values(dimension) for dimension in CUBE_DIMENSIONS}
+    date_from = params.get('date_from', [None])[0]
+    date_to = params.get('date_to', [None])[0]
+    return filters, values('group_by'), date_from, date_to
+
+
+class QueryService:
+    """Loads and categorizes once, answers queries from memory and reloads when the inputs change"""
+
+    def __init__(self, forward_path=FORWARD_REPORTS_FILE, orders_path=ORDERS_FILE, category_engine='keyword',
+                 poll_seconds=RELOAD_POLL_SECONDS, chart_cache_size=CHART_CACHE_SIZE, dpi=CHART_DPI):
+        self.forward_path = forward_path
+        self.orders_path = orders_path
+        self.category_engine = category_engine
+        self.poll_seconds = poll_seconds
+        self.dpi = dpi
+        self.charts = ChartCache(chart_cache_size)
+
+        self.cube = None
+        self.version = 0
+        self.fingerprints = None
+        self.failed_fingerprints = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.reload_errors = 0
+        self.requests = 0
+
+        # Loads and chart renders run off the event loop, one of each at a time
+        self._loader = ThreadPoolExecutor(max_workers=1)
+        self._renderer = ThreadPoolExecutor(max_workers=1)
+
+    def source_fingerprints(self):
+        """Size and modification time of each input file, None when it is missing"""
+        fingerprints = {}
+        for path in (self.forward_path, self.orders_path):
+            try:
+                stat = os.stat(path)
+                fingerprints[path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                fingerprints[path] = None
+        return fingerprints
+
+    def _load(self):
+        """Load, preprocess and categorize through the prepared data cache, then code the rows"""
+        analyzer = RealMeeshoAnalysis(self.forward_path, self.orders_path, category_engine=self.category_engine)
+        return WarmCube(analyzer.load_prepared_data())
+
+    async def reload(self):
+        """Build a new warm cube in the background and swap it in"""
+        fingerprints = self.source_fingerprints()
+        start = time.perf_counter()
+        cube = await asyncio.get_running_loop().run_in_executor(self._loader, self._load)
+
+        # Swapping one attribute keeps every query on a single consistent version
+        self.cube = cube
+        self.version += 1
+        self.fingerprints = fingerprints
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+        self.charts.clear()
+        print(f"✓ Loaded version {self.version}: {cube.rows:,} rows in {self.load_seconds:.2f}s")
+
+    async def watch(self):
+        """Poll the input files and reload after they change"""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            fingerprints = self.source_fingerprints()
+            if fingerprints in (self.fingerprints, self.failed_fingerprints):
+                continue
+            print("Input files changed, reloading...")
+            try:
+                await self.reload()
+            except Exception as exc:
+                # A half-written file fails to load; keep serving the old data and retry once it changes again
+                self.reload_errors += 1
+                self.failed_fingerprints = fingerprints
+                print(f"  Warning: reload failed, still serving version {self.version}: {exc}")
+
+    def status(self):
+        cube = self.cube
+        return {
+            'version': self.version,
+            'rows': cube.rows,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'load_seconds': self.load_seconds,
+            'reload_errors': self.reload_errors,
+            'requests': self.requests,
+            'sources': {path: None if fingerprint is None else {'size': fingerprint[0]}
+                        for path, fingerprint in self.fingerprints.items()},
+            'dimensions': dict(cube.labels, date=[f"{cube.origin:%Y-%m-%d}", cube.n_days]),
+            'chart_cache': self.charts.stats(),
+        }
+
+    def run_query(self, params):
+        """JSON-ready answer to a /query request"""
+        filters, group_by, date_from, date_to = parse_query(params)
+        start = time.perf_counter()
+        table, source = self.cube.query(filters, group_by, date_from, date_to)
+        elapsed = (time.perf_counter() - start) * 1000
+        return {
+            'version': self.version,
+            'group_by': group_by,
+            'filters': {dimension: values for dimension, values in filters.items() if values},
+            'date_from': date_from,
+            'date_to': date_to,
+            'source': source,
+            'elapsed_ms': elapsed,
+            'rows': json.loads(table.reset_index().to_json(orient='records')),
+        }
+
+    async def chart(self, params):
+        """PNG of a query, from the LRU cache when the same chart was rendered for this data version"""
+        filters, group_by, date_from, date_to = parse_query(params)
+        group_by = group_by or ['category']
+        key = (self.version, tuple((dimension, tuple(sorted(values))) for dimension, values in filters.items()),
+               tuple(group_by), date_from, date_to, self.dpi)
+
+        image = self.charts.get(key)
+        if image is not None:
+            return image, 'hit'
+        table, _ = self.cube.query(filters, group_by, date_from, date_to)
+        if table.empty:
+            raise ValueError("No orders match this query")
+        image = await asyncio.get_running_loop().run_in_executor(
+            self._renderer, render_query_chart, table, group_by, self.dpi)
+        self.charts.put(key, image)
+        return image, 'miss'
+
+    async def respond(self, method, target):
+        """(status, content type, body, extra headers) for one request"""
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        if method not in ('GET', 'HEAD'):
+            return HTTPStatus.METHOD_NOT_ALLOWED, 'application/json', {'error': 'only GET and HEAD'}, {}
+        if self.cube is None:
+            return HTTPStatus.SERVICE_UNAVAILABLE, 'application/json', {'error': 'still loading'}, {}
+        try:
+            if url.path == '/status':
+                return HTTPStatus.OK, 'application/json', self.status(), {}
+            if url.path == '/query':
+                return HTTPStatus.OK, 'application/json', self.run_query(params), {}
+            if url.path in ('/chart', '/chart.png'):
+                image, cache = await self.chart(params)
+                return HTTPStatus.OK, 'image/png', image, {'X-Chart-Cache': cache}
+        except ValueError as exc:
+            return HTTPStatus.BAD_REQUEST, 'application/json', {'error': str(exc)}, {}
+        return HTTPStatus.NOT_FOUND, 'application/json', {'error': f'no such path {url.path}',
+                                                          'paths': ['/status', '/query', '/chart.png']}, {}
+
+    async def handle(self, reader, writer):
+        """One HTTP/1.1 request per connection"""
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        try:
+            method, target, _ = request.split(b'\r\n', 1)[0].decode('latin-1').split(' ', 2)
+        except ValueError:
+            status, content_type, body, headers = HTTPStatus.BAD_REQUEST, 'application/json', {'error': 'bad request'}, {}
+            method = 'GET'
+        else:
+            self.requests += 1
+            status, content_type, body, headers = await self.respond(method, target)
+
+        if not isinstance(body, bytes):
+            body = json.dumps(body, default=str).encode('utf-8')
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Load once, then serve requests and watch the inputs until cancelled"""
+        await self.reload()
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST_BYTES)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving on http://{host}:{port} (/status, /query, /chart.png)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            self._loader.shutdown(wait=False)
+            self._renderer.shutdown(wait=False)
+
+
+def run_service(forward_path=FORWARD_REPORTS_FILE, orders_path=ORDERS_FILE, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                poll_seconds=RELOAD_POLL_SECONDS, category_engine='keyword', chart_cache_size=CHART_CACHE_SIZE,
+                dpi=CHART_DPI):
+    """Serve until interrupted"""
+    service = QueryService(forward_path, orders_path, category_engine=category_engine, poll_seconds=poll_seconds,
+                           chart_cache_size=chart_cache_size, dpi=dpi)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+def main(argv=None):
+    """Run the query service"""
+    parser = argparse.ArgumentParser(description='Serve return-rate queries and charts from warm aggregates')
+    parser.add_argument('--forward', default=FORWARD_REPORTS_FILE, help='ForwardReports CSV')
+    parser.add_argument('--orders', default=ORDERS_FILE, help='Orders CSV')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--poll', type=float, default=RELOAD_POLL_SECONDS,
+                        help='seconds between checks of the input files for changes')
+    parser.add_argument('--engine', choices=('keyword', 'sparse'), default='keyword',
+                        help='product categorization engine (sparse needs scikit-learn)')
+    parser.add_argument('--chart-cache', type=int, default=CHART_CACHE_SIZE, help='rendered charts to keep')
+    parser.add_argument('--dpi', type=int, default=CHART_DPI)
+    args = parser.parse_args(argv)
+
+    run_service(args.forward, args.orders, args.host, args.port, args.poll, args.engine, args.chart_cache, args.dpi)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,89 +5,139 @@ Using actual CSV data to calculate real return rates
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
-from collections import Counter
+import os
+import json
+import hashlib
+from contextlib import nullcontext
+from collections import OrderedDict
 import warnings
 warnings.filterwarnings('ignore')
 
+from category_engine import engine_parameters, make_categorizer
+from token_counter import TokenCounter
+from aggregates import ReturnAggregates, assign_price_ranges
+from order_join import SubOrderIndex
+from dataset_cache import DatasetCache
+from schema import FORWARD_REPORTS_SCHEMA, ORDERS_SCHEMA, read_with_schema
+from status_engine import CONFLICT, CREDIT_REASON_COLUMN, StatusEngine, reconcile
+from results_store import RESULTS_STORE_FILE, RESULTS_EXCEL_FILE, save_results
+from incremental import INCREMENTAL_STATE_FILE, IncrementalReturnState, apply_daily_drop
+from chart_rendering import get_figure, finish_figure
+from geo_analysis import GeoIndex
+from time_series import ReturnTimeSeries
+from stage_profiler import RUN_REPORT_FILE, StageProfiler
+
 # Meesho Brand Colors
 JAMUNI = '#580b48'  # Deep Purple
 AAM = '#FFA500'     # Bright Yellow/Orange
 
+FORWARD_REPORTS_FILE = 'meesho ForwardReports.csv'
+ORDERS_FILE = 'meesho Orders Aug.csv'
+CATEGORY_CACHE_FILE = 'meesho_category_cache.json'
+# 'duckdb' runs the join and aggregation as SQL (needs duckdb)
+EXECUTION_BACKENDS = ('pandas', 'duckdb')
+
+class CategorizationCache:
+    """LRU cache of product name -> category, persisted per keyword table"""
+
+    def __init__(self, path=CATEGORY_CACHE_FILE, max_size=500_000, read_only=False, engine='keyword'):
+        self.path = path
+        self.engine = engine
+        self.max_size = max_size
+        self.read_only = read_only
+        self.entries = OrderedDict()
+        self.keyword_hash = None
+        self.categorizer = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def keyword_table_hash(categories, stop_words, engine='keyword'):
+        """Hash the keyword lists, stop words, engine and model settings that categories depend on"""
+        table = json.dumps([list(categories.items()), sorted(stop_words), engine, engine_parameters(engine)],
+                           sort_keys=True)
+        return hashlib.sha256(table.encode('utf-8')).hexdigest()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _sync_keywords(self, categories, stop_words):
+        """Drop every entry when the keyword table no longer matches"""
+        keyword_hash = self.keyword_table_hash(categories, stop_words, self.engine)
+        if keyword_hash == self.keyword_hash:
+            return
+
+        self.entries.clear()
+        self.keyword_hash = keyword_hash
+        self.categorizer = make_categorizer(self.engine, categories, stop_words)
+        self.load()
+
+    def load(self):
+        """Load persisted entries written for the current keyword table"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if stored.get('keyword_hash') != self.keyword_hash:
+            return
+        self.entries = OrderedDict(stored['entries'][-self.max_size:])
+
+    def save(self):
+        """Persist entries in LRU order (oldest first)"""
+        if not self.path or self.read_only:
+            return
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'keyword_hash': self.keyword_hash,
+                       'entries': list(self.entries.items())}, f)
+
+    def categorize(self, product_names, categories, stop_words):
+        """Categorize each distinct name once and map the results back to rows"""
+        self._sync_keywords(categories, stop_words)
+
+        # Categories only depend on the lowercased name, so that is the cache key
+        keys = pd.Series(product_names).astype(str).str.lower().str.strip()
+        codes, uniques = pd.factorize(keys)
+
+        unique_categories = np.empty(len(uniques), dtype=object)
+        missing = []
+        for i, key in enumerate(uniques):
+            category = self.entries.get(key)
+            if category is None:
+                missing.append(i)
+            else:
+                self.entries.move_to_end(key)
+                unique_categories[i] = category
+        self.hits += len(uniques) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            unique_categories[missing] = self.categorizer.categorize(uniques[missing])
+            for i in missing:
+                self.entries[uniques[i]] = unique_categories[i]
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+        return unique_categories.take(codes)
+
 class RealMeeshoAnalysis:
-    def __init__(self):
+    def __init__(self, forward_path=FORWARD_REPORTS_FILE, orders_path=ORDERS_FILE, category_engine='keyword'):
+        # Input files for this run
+        self.forward_path = forward_path
+        self.orders_path = orders_path
+        
         # Simple stop words list
         self.stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-        
-    def load_real_data(self):
-        """Load the actual CSV files"""
-        print("Loading real Meesho data...")
-        
-        # Load forward reports
-        self.forward_reports = pd.read_csv('meesho ForwardReports.csv')
-        print(f"Forward Reports: {self.forward_reports.shape}")
-        
-        # Load orders data
-        self.orders_data = pd.read_csv('meesho Orders Aug.csv')
-        print(f"Orders Data: {self.orders_data.shape}")
-        
-        # Merge datasets
-        self.merged_data = pd.merge(
-            self.forward_reports, 
-            self.orders_data, 
-            left_on='sub_order_num', 
-            right_on='Sub Order No', 
-            how='inner'
-        )
-        print(f"Merged Data: {self.merged_data.shape}")
-        
-        return self.merged_data
-    
-    def preprocess_data(self):
-        """Clean and preprocess the data"""
-        print("Preprocessing data...")
-        
-        # Convert date columns
-        self.merged_data['order_date'] = pd.to_datetime(self.merged_data['order_date'])
-        
-        # Clean product names
-        self.merged_data['Product Name'] = self.merged_data['Product Name'].astype(str)
-        self.merged_data['Product Name'] = self.merged_data['Product Name'].str.strip()
-        
-        # Create return flag
-        self.merged_data['is_return'] = self.merged_data['order_status'].isin(['Return', 'rto'])
-        self.merged_data['is_delivered'] = self.merged_data['order_status'] == 'Delivered'
-        self.merged_data['is_cancelled'] = self.merged_data['order_status'] == 'Cancelled'
-        
-        # Clean price data
-        self.merged_data['meesho_price_clean'] = pd.to_numeric(self.merged_data['meesho_price'], errors='coerce')
-        
-        print("Data preprocessing completed!")
-        return self.merged_data
-    
-    def extract_product_features(self, text):
-        """Extract features from product names using simple tokenization"""
-        if pd.isna(text):
-            return []
-        
-        # Convert to lowercase and remove special characters
-        text = re.sub(r'[^a-zA-Z\s]', '', str(text).lower())
-        
-        # Simple tokenization without NLTK
-        tokens = text.split()
-        tokens = [token for token in tokens 
-                 if token not in self.stop_words and len(token) > 2]
-        
-        return tokens
-    
-    def categorize_products_nlp(self):
-        """Categorize products using advanced NLP analysis"""
-        print("Performing NLP analysis for product categorization...")
-        
+
         # Define comprehensive product categories with keywords
-        categories = {
+        self.categories = {
             'Ethnic Wear': [
                 'saree', 'lehenga', 'choli', 'kurta', 'dupatta', 'suit', 'ethnic', 'traditional',
                 'salwar', 'kameez', 'anarkali', 'ghagra', 'churidar', 'palazzo', 'sharara',
@@ -116,34 +166,218 @@ class RealMeeshoAnalysis:
                 'cable', 'headphone', 'speaker', 'camera', 'laptop', 'tablet'
             ]
         }
+
+        # Name -> category cache shared across runs, filled by the selected engine
+        self.category_cache = CategorizationCache(engine=category_engine)
+        
+        self._reset_derived()
+        self.profiler = None
+        
+    def _reset_derived(self):
+        """Drop the row-level data and everything built from it, before a new load or aggregation"""
+        # Row-level data, or running aggregates when loaded in streaming mode
+        self.merged_data = None
+        self.return_aggregates = None
+        self.status_engine = None
+        self.geo_index = None
+        self.time_series = None
+        self.token_counter = None
+        self.join_diagnostics = None
+        
+    def load_real_data(self, chunksize=None):
+        """Load the actual CSV files (streamed in chunks when chunksize is set)"""
+        self._reset_derived()
+        if chunksize:
+            return self.stream_real_data(chunksize)
         
-        def assign_category_nlp(product_name):
-            """Advanced NLP-based category assignment"""
-            product_lower = str(product_name).lower()
-            
-            # Extract features
-            features = self.extract_product_features(product_name)
+        print("Loading real Meesho data...")
+        
+        # Load forward reports
+        self.forward_reports, rejected_forward = read_with_schema(self.forward_path, FORWARD_REPORTS_SCHEMA)
+        print(f"Forward Reports: {self.forward_reports.shape}")
+        self._report_rejected(self.forward_path, len(rejected_forward))
+        
+        # Load orders data
+        self.orders_data, rejected_orders = read_with_schema(self.orders_path, ORDERS_SCHEMA)
+        print(f"Orders Data: {self.orders_data.shape}")
+        self._report_rejected(self.orders_path, len(rejected_orders))
+        
+        # Merge datasets on integer sub-order keys
+        orders_index = SubOrderIndex(self.orders_data)
+        self.merged_data = orders_index.join(self.forward_reports)
+        print(f"Merged Data: {self.merged_data.shape}")
+        self._report_join(orders_index.diagnostics())
+        
+        return self.merged_data
+    
+    def stream_real_data(self, chunksize=100_000):
+        """Join ForwardReports chunk by chunk and fold each chunk into running aggregates"""
+        print(f"Streaming real Meesho data in chunks of {chunksize:,} rows...")
+        self._reset_derived()
+        
+        # Index the smaller Orders file once
+        self.orders_data, rejected_orders = read_with_schema(self.orders_path, ORDERS_SCHEMA)
+        print(f"Orders Data: {self.orders_data.shape}")
+        self._report_rejected(self.orders_path, len(rejected_orders))
+        orders_index = SubOrderIndex(self.orders_data)
+        
+        self.return_aggregates = ReturnAggregates()
+        self.status_engine = StatusEngine()
+        forward_rows = merged_rows = rejected_forward = 0
+        
+        for chunk, rejected in read_with_schema(self.forward_path, FORWARD_REPORTS_SCHEMA, chunksize=chunksize):
+            forward_rows += len(chunk)
+            rejected_forward += len(rejected)
+            merged = orders_index.join(chunk)
+            merged_rows += len(merged)
+            if merged.empty:
+                continue
             
-            # Score each category
-            category_scores = {}
-            for category, keywords in categories.items():
-                score = 0
-                for keyword in keywords:
-                    if keyword in product_lower:
-                        score += 1
-                    # Also check in extracted features
-                    if keyword in features:
-                        score += 0.5
-                category_scores[category] = score
+            self._preprocess_frame(merged)
+            merged['product_category'] = self.category_cache.categorize(
+                merged['Product Name'], self.categories, self.stop_words
+            )
+            merged['price_range'] = assign_price_ranges(merged['meesho_price_clean'])
+            self.return_aggregates.update(merged)
+            self.status_engine.update(merged)
+        
+        self.category_cache.save()
+        print(f"Forward Reports: {forward_rows:,} rows streamed")
+        self._report_rejected(self.forward_path, rejected_forward)
+        print(f"Merged Data: {merged_rows:,} rows aggregated")
+        self._report_join(orders_index.diagnostics())
+        
+        return self.return_aggregates
+    
+    def aggregate_with_duckdb(self, memory_limit=None, threads=None, temp_directory=None):
+        """Join, flag, bin and group the reports inside DuckDB, keeping only the aggregates"""
+        # duckdb is optional, so it is only imported when this backend is chosen
+        from duckdb_backend import DuckDBReturnBackend
+        print("Aggregating real Meesho data with DuckDB...")
+        self._reset_derived()
+        
+        cache = self.category_cache
+        with DuckDBReturnBackend(self.forward_path, self.orders_path, memory_limit=memory_limit,
+                                 threads=threads, temp_directory=temp_directory) as backend:
+            backend.load()
+            for label, path in [('Forward Reports', self.forward_path), ('Orders Data', self.orders_path)]:
+                print(f"{label}: {backend.shapes[path]}")
+                self._report_rejected(path, backend.rejected[path])
             
-            # Return category with highest score
-            if max(category_scores.values()) > 0:
-                return max(category_scores, key=category_scores.get)
+            # The categorizer sees each distinct name once; SQL joins the resulting mapping table
+            self.return_aggregates = backend.aggregate(
+                lambda names: cache.categorize(names, self.categories, self.stop_words))
+            self._report_join(backend.join_diagnostics())
+        
+        cache.save()
+        print(f"Merged Data: {self.return_aggregates.total_orders:,} rows aggregated")
+        
+        return self.return_aggregates
+    
+    def run_incremental_analysis(self, state_path=INCREMENTAL_STATE_FILE):
+        """Fold this run's files, as one daily drop, into the persisted state"""
+        print(f"Applying daily drop: {self.forward_path} + {self.orders_path}")
+        self._reset_derived()
+        
+        keyword_hash = CategorizationCache.keyword_table_hash(self.categories, self.stop_words,
+                                                              self.category_cache.engine)
+        state = IncrementalReturnState(state_path).load(keyword_hash)
+        apply_daily_drop(self, state, self.forward_path, self.orders_path)
+        state.save()
+        
+        # The running aggregates stand in for row-level data
+        self.return_aggregates = state.aggregates
+        return self.calculate_real_return_rates()
+    
+    def _report_rejected(self, path, count):
+        """Print how many rows did not match the declared schema"""
+        if count:
+            print(f"  Warning: rejected {count:,} rows in {path} that do not match the schema")
+    
+    def _report_join(self, diagnostics):
+        """Print the rows the sub-order join dropped or duplicated"""
+        self.join_diagnostics = diagnostics
+        print(f"Join: {diagnostics['unmatched_left_rows']:,} of {diagnostics['left_rows']:,} forward rows "
+              f"and {diagnostics['unmatched_right_rows']:,} of {diagnostics['right_rows']:,} order rows unmatched")
+        if diagnostics['unparsed_left_keys'] or diagnostics['unparsed_right_keys']:
+            print(f"  Warning: {diagnostics['unparsed_left_keys']:,} forward and "
+                  f"{diagnostics['unparsed_right_keys']:,} order sub-order ids could not be parsed")
+        if diagnostics['duplicate_left_rows'] or diagnostics['duplicate_right_keys']:
+            print(f"  Warning: {diagnostics['duplicate_left_rows']:,} repeated forward rows, "
+                  f"{diagnostics['duplicate_right_keys']:,} sub-orders listed more than once in the orders "
+                  f"({diagnostics['duplicate_right_rows']:,} extra rows)")
+    
+    def load_prepared_data(self, use_cache=True):
+        """Load, preprocess and categorize, reusing the columnar cache when it is fresh"""
+        cache = DatasetCache([self.forward_path, self.orders_path])
+        keyword_hash = CategorizationCache.keyword_table_hash(self.categories, self.stop_words,
+                                                              self.category_cache.engine)
+        
+        if use_cache and cache.is_valid(keyword_hash):
+            self._reset_derived()
+            with self._stage('load_cache'):
+                self.merged_data = cache.read()
+            print(f"Loaded prepared data from cache: {cache.path} {self.merged_data.shape}")
+            return self.merged_data
+        
+        with self._stage('load'):
+            self.load_real_data()
+        with self._stage('preprocess'):
+            self.preprocess_data()
+        with self._stage('categorize'):
+            self.categorize_products_nlp()
+        
+        if use_cache:
+            if cache.available:
+                with self._stage('cache_write'):
+                    cache.write(self.merged_data, keyword_hash)
+                print(f"✓ Prepared data cached to: {cache.path}")
             else:
-                return 'Other'
+                print("Note: install pyarrow to cache prepared data between runs")
         
-        # Apply NLP categorization
-        self.merged_data['product_category'] = self.merged_data['Product Name'].apply(assign_category_nlp)
+        return self.merged_data
+    
+    def _preprocess_frame(self, frame):
+        """Apply date, name, status and price cleanup to a merged frame in place"""
+        # Convert date columns
+        frame['order_date'] = pd.to_datetime(frame['order_date'])
+        
+        # Clean product names
+        frame['Product Name'] = frame['Product Name'].astype(str)
+        frame['Product Name'] = frame['Product Name'].str.strip()
+        
+        # Create return flag
+        frame['is_return'] = frame['order_status'].isin(['Return', 'rto'])
+        frame['is_delivered'] = frame['order_status'] == 'Delivered'
+        frame['is_cancelled'] = frame['order_status'] == 'Cancelled'
+        
+        # Clean price data
+        frame['meesho_price_clean'] = pd.to_numeric(frame['meesho_price'], errors='coerce')
+        
+        return frame
+    
+    def preprocess_data(self):
+        """Clean and preprocess the data"""
+        print("Preprocessing data...")
+        
+        self._preprocess_frame(self.merged_data)
+        
+        print("Data preprocessing completed!")
+        return self.merged_data
+    
+    def categorize_products_nlp(self):
+        """Categorize products using advanced NLP analysis"""
+        print("Performing NLP analysis for product categorization...")
+        
+        # Apply NLP categorization once per distinct product name
+        cache = self.category_cache
+        hits, misses = cache.hits, cache.misses
+        self.merged_data['product_category'] = cache.categorize(
+            self.merged_data['Product Name'], self.categories, self.stop_words
+        )
+        cache.save()
+        print(f"Category cache: {cache.hits - hits} hits, {cache.misses - misses} misses "
+              f"({cache.hit_rate*100:.1f}% lifetime hit rate, {len(cache.entries)} names cached)")
         
         # Print category distribution
         category_counts = self.merged_data['product_category'].value_counts()
@@ -157,31 +391,96 @@ class RealMeeshoAnalysis:
         """Calculate real return rates from actual data"""
         print("Calculating real return rates...")
         
+        # One bincount pass builds the category x price-range cube; streaming,
+        # batch and incremental runs arrive with the cube already filled
+        if self.merged_data is not None:
+            self.merged_data['price_range'] = assign_price_ranges(self.merged_data['meesho_price_clean'])
+            self.return_aggregates = ReturnAggregates().update(self.merged_data)
+        
         # Overall return rate
-        total_orders = len(self.merged_data)
-        total_returns = self.merged_data['is_return'].sum()
+        total_orders = self.return_aggregates.total_orders
+        total_returns = self.return_aggregates.total_returns
         overall_return_rate = (total_returns / total_orders) * 100
         
+        self._print_overall_statistics(total_orders, total_returns, overall_return_rate)
+        
+        # Both marginals come from the same cube - percentages relative to TOTAL orders
+        category_returns = self.return_aggregates.category_table()
+        price_returns = self.return_aggregates.price_table()
+        
+        self._print_return_tables(category_returns, price_returns)
+        
+        # Money measures were summed in the same pass when the rows carried them
+        if self.return_aggregates.money_rows:
+            self._print_financial_tables()
+        
+        return category_returns, price_returns, overall_return_rate
+    
+    def analyze_geography(self, top_n=10):
+        """Return and RTO rates by state and pin region from the row-level data"""
+        print("Analyzing returns by geography...")
+        
+        self.geo_index = GeoIndex(self.merged_data)
+        state_table = self.geo_index.state_table().sort_values('total_orders', ascending=False)
+        
+        print(f"\nReturn Rates by State (top {top_n} by orders):")
+        for state, data in state_table.head(top_n).iterrows():
+            print(f"  {state}: {data['return_rate']:.2f}% returns, {data['rto_rate']:.2f}% RTO "
+                  f"({int(data['total_orders'])} orders)")
+        print(f"  {len(self.geo_index.states)} states, {len(self.geo_index.regions)} pin regions")
+        
+        return state_table
+    
+    def analyze_return_trends(self):
+        """Daily per-category order and return counts over order_date, with weekly rates"""
+        print("Analyzing return trends over time...")
+        
+        self.time_series = ReturnTimeSeries.from_frame(self.merged_data)
+        weekly = self.time_series.weekly_series()
+        
+        print(f"\nWeekly Return Rates ({self.time_series.n_days} days of orders):")
+        for week_start, data in weekly.iterrows():
+            print(f"  Week of {week_start:%Y-%m-%d}: {data['return_rate']:.2f}% "
+                  f"({int(data['returns'])} returns out of {int(data['total_orders'])} orders)")
+        
+        return weekly
+    
+    def analyze_order_statuses(self):
+        """Customer return vs RTO rates and forward status / credit reason reconciliation per category"""
+        print("Analyzing order status lifecycle...")
+        
+        # Streaming runs fill the status cube chunk by chunk alongside the return cube
+        if self.merged_data is not None:
+            self.status_engine = StatusEngine.from_frame(self.merged_data)
+        
+        status_rates = self.status_engine.status_rates()
+        totals = status_rates.sum()
+        total_orders = totals['total_orders']
+        print(f"\nOrder Status Rates:")
+        print(f"  Customer Return Rate: {totals['customer_returns'] / total_orders * 100:.2f}% "
+              f"({int(totals['customer_returns'])} returns)")
+        print(f"  RTO Rate: {totals['rto'] / total_orders * 100:.2f}% ({int(totals['rto'])} orders)")
+        print(f"  RTO Rate (either file): {totals['reconciled_rto'] / total_orders * 100:.2f}% "
+              f"({int(totals['reconciled_rto'])} orders)")
+        
+        print(f"\nStatus Reconciliation (forward report vs credit entry):")
+        for name, count in self.status_engine.reconciliation_table().sum().items():
+            print(f"  {name}: {count} orders ({count / total_orders * 100:.1f}%)")
+        disagreements = self.status_engine.disagreement_matrix().sum().sort_values(ascending=False)
+        for pair, count in disagreements.items():
+            print(f"    {pair}: {count}")
+        
+        return status_rates
+    
+    def _print_overall_statistics(self, total_orders, total_returns, overall_return_rate):
+        """Print overall order and return counts"""
         print(f"\nOverall Statistics:")
         print(f"  Total Orders: {total_orders:,}")
         print(f"  Total Returns: {total_returns:,}")
         print(f"  Overall Return Rate: {overall_return_rate:.2f}%")
-        
-        # Return rate by category - percentages relative to TOTAL orders
-        category_returns = self.merged_data.groupby('product_category').agg({
-            'is_return': ['sum', 'count'],
-            'meesho_price_clean': 'mean'
-        }).round(2)
-        
-        category_returns.columns = ['returns', 'total_orders', 'avg_price']
-        # Calculate return rate within category
-        category_returns['return_rate_within_category'] = (category_returns['returns'] / category_returns['total_orders']) * 100
-        # Calculate percentage of total orders
-        category_returns['percentage_of_total_orders'] = (category_returns['total_orders'] / total_orders) * 100
-        # Calculate percentage of total returns
-        category_returns['percentage_of_total_returns'] = (category_returns['returns'] / total_returns) * 100
-        category_returns = category_returns.sort_values('return_rate_within_category', ascending=False)
-        
+    
+    def _print_return_tables(self, category_returns, price_returns):
+        """Print the category and price range return tables"""
         print(f"\nReturn Rates by Category:")
         for category, data in category_returns.iterrows():
             print(f"  {category}:")
@@ -191,62 +490,139 @@ class RealMeeshoAnalysis:
             print(f"    - Orders: {data['total_orders']}, Returns: {data['returns']}")
             print()
         
-        # Return rate by price range
-        self.merged_data['price_range'] = pd.cut(
-            self.merged_data['meesho_price_clean'], 
-            bins=[0, 500, 1000, 1500, 2000, float('inf')], 
-            labels=['0-500', '500-1000', '1000-1500', '1500-2000', '2000+']
-        )
-        
-        price_returns = self.merged_data.groupby('price_range').agg({
-            'is_return': ['sum', 'count'],
-            'meesho_price_clean': 'mean'
-        }).round(2)
-        
-        price_returns.columns = ['returns', 'total_orders', 'avg_price']
-        price_returns['return_rate'] = (price_returns['returns'] / price_returns['total_orders']) * 100
-        
         print(f"\nReturn Rates by Price Range:")
         for price_range, data in price_returns.iterrows():
             print(f"  {price_range}: {data['return_rate']:.2f}% ({data['returns']} returns out of {data['total_orders']} orders)")
-        
-        return category_returns, price_returns, overall_return_rate
+    
+    def _print_financial_tables(self):
+        """Print revenue lost, RTO shipping and discount depth per category and price range"""
+        category_financials = self.return_aggregates.financial_table('category')
+        price_financials = self.return_aggregates.financial_table('price_range')
+        
+        print(f"\nReturn Costs by Category:")
+        for category, data in category_financials.iterrows():
+            print(f"  {category}: ₹{data['revenue_lost']:,.2f} revenue lost to returns/RTO "
+                  f"(₹{data['rto_revenue_lost']:,.2f} RTO), ₹{data['rto_shipping_burned']:,.2f} shipping burned on RTO, "
+                  f"{data['discount_depth']:.2f}% discount depth vs {data['return_rate']:.2f}% return rate")
+        
+        print(f"\nReturn Costs by Price Range:")
+        for price_range, data in price_financials.iterrows():
+            print(f"  {price_range}: ₹{data['revenue_lost']:,.2f} revenue lost, "
+                  f"₹{data['rto_shipping_burned']:,.2f} RTO shipping, "
+                  f"{data['discount_depth']:.2f}% discount depth vs {data['return_rate']:.2f}% return rate")
+    
+    def _summary_frame(self, overall_rate):
+        """Overall statistics table shared by the results store and Excel report"""
+        summary_data = {
+            'Metric': ['Total Orders', 'Total Returns', 'Overall Return Rate (%)'],
+            'Value': [self.return_aggregates.total_orders, self.return_aggregates.total_returns, overall_rate]
+        }
+        return pd.DataFrame(summary_data)
+    
+    def _product_categories_frame(self):
+        """Row-level products with their categories (None when streaming)"""
+        if self.merged_data is None:
+            return None
+        return self.merged_data[['Product Name', 'product_category', 'is_return', 'meesho_price_clean', 'order_status']]
+    
+    def _status_conflicts_frame(self):
+        """Row-level sub-orders whose forward status contradicts their credit entry (None when streaming)"""
+        if self.merged_data is None:
+            return None
+        conflicts = self.merged_data[reconcile(self.merged_data) == CONFLICT]
+        return conflicts[['Sub Order No', 'Product Name', 'product_category', 'order_status', CREDIT_REASON_COLUMN]]
+    
+    def save_results_store(self, category_returns, price_returns, overall_rate):
+        """Save the analysis tables to the SQLite results store read by the plotting scripts"""
+        print("Saving results store...")
+        
+        tables = {
+            'category_analysis': category_returns,
+            'price_range_analysis': price_returns,
+            'summary': self._summary_frame(overall_rate),
+            'category_price_matrix': self.return_aggregates.cross_tab('return_rate'),
+        }
+        product_categories = self._product_categories_frame()
+        if product_categories is not None:
+            tables['product_categories'] = product_categories
+        if self.return_aggregates.money_rows:
+            tables['category_financials'] = self.return_aggregates.financial_table('category')
+            tables['price_range_financials'] = self.return_aggregates.financial_table('price_range')
+        if self.geo_index is not None:
+            tables['state_analysis'] = self.geo_index.state_table()
+            tables['region_analysis'] = self.geo_index.region_table()
+            tables['category_state_matrix'] = self.geo_index.category_state_table('return_rate')
+        if self.time_series is not None:
+            tables['daily_category_returns'] = self.time_series.daily_table()
+        if self.status_engine is not None:
+            tables['status_rates'] = self.status_engine.status_rates()
+            tables['status_transitions'] = self.status_engine.transition_matrix()
+            tables['category_status_transitions'] = self.status_engine.category_transitions()
+            tables['status_disagreements'] = self.status_engine.disagreement_matrix()
+            status_conflicts = self._status_conflicts_frame()
+            if status_conflicts is not None:
+                tables['status_conflicts'] = status_conflicts
+        save_results(tables)
+        
+        print(f"✓ Results saved to: {RESULTS_STORE_FILE}")
     
     def save_data_to_excel(self, category_returns, price_returns, overall_rate):
         """Save the analysis data to Excel file"""
         print("Saving data to Excel...")
+        # openpyxl is only needed here, so it is not imported with the module
+        from excel_export import StreamingExcelWriter
         
-        with pd.ExcelWriter('meesho_analysis_results.xlsx', engine='openpyxl') as writer:
+        # Write-only workbook: rows stream to disk instead of building the sheet in memory
+        with StreamingExcelWriter(RESULTS_EXCEL_FILE) as writer:
             # Save category analysis
-            category_returns.to_excel(writer, sheet_name='Category_Analysis', index=True)
+            writer.write_frame('Category_Analysis', category_returns, index=True)
             
             # Save price range analysis
-            price_returns.to_excel(writer, sheet_name='Price_Range_Analysis', index=True)
+            writer.write_frame('Price_Range_Analysis', price_returns, index=True)
             
             # Save overall summary
-            summary_data = {
-                'Metric': ['Total Orders', 'Total Returns', 'Overall Return Rate (%)'],
-                'Value': [len(self.merged_data), self.merged_data['is_return'].sum(), overall_rate]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            writer.write_frame('Summary', self._summary_frame(overall_rate), index=False)
             
-            # Save product categories data
-            product_categories_data = self.merged_data[['Product Name', 'product_category', 'is_return', 'meesho_price_clean', 'order_status']].copy()
-            product_categories_data.to_excel(writer, sheet_name='Product_Categories', index=False)
-        
-        print("✓ Data saved to: meesho_analysis_results.xlsx")
+            # Save category x price range return rates from the same cube
+            writer.write_frame('Category_Price_Matrix', self.return_aggregates.cross_tab('return_rate'), index=True)
+            
+            # Save customer return vs RTO rates and the status reconciliation counts
+            if self.status_engine is not None:
+                writer.write_frame('Status_Rates', self.status_engine.status_rates(), index=True)
+                writer.write_frame('Status_Transitions', self.status_engine.transition_matrix(), index=True)
+                writer.write_frame('Status_Disagreements', self.status_engine.disagreement_matrix(), index=True)
+            
+            # Save product categories data, split over several sheets past Excel's row limit
+            # (row-level data is not kept when streaming)
+            product_categories_data = self._product_categories_frame()
+            product_sheets = 0
+            if product_categories_data is not None:
+                product_sheets = writer.write_split_frame('Product_Categories', product_categories_data, index=False)
+        
+        print(f"✓ Data saved to: {RESULTS_EXCEL_FILE}")
         print("  - Sheet 1: Category_Analysis")
         print("  - Sheet 2: Price_Range_Analysis") 
         print("  - Sheet 3: Summary")
-        print("  - Sheet 4: Product_Categories (all products with their categories)")
+        print("  - Sheet 4: Category_Price_Matrix (return rate by category and price range)")
+        sheet = 5
+        if self.status_engine is not None:
+            print("  - Sheet 5: Status_Rates (customer return vs RTO rates by category)")
+            print("  - Sheet 6: Status_Transitions (forward status x credit reason)")
+            print("  - Sheet 7: Status_Disagreements (mismatched statuses by category)")
+            sheet = 8
+        if product_sheets == 1:
+            print(f"  - Sheet {sheet}: Product_Categories (all products with their categories)")
+        elif product_sheets > 1:
+            print(f"  - Sheets {sheet}-{sheet - 1 + product_sheets}: Product_Categories_1..{product_sheets} "
+                  f"(all products with their categories)")
     
-    def create_real_data_plots(self, category_returns, price_returns, overall_rate):
+    @staticmethod
+    def create_real_data_plots(category_returns, price_returns, overall_rate):
         """Create plots with real data"""
         print("Creating plots with real data...")
         
         # Create the plots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        fig, (ax1, ax2) = get_figure('return_rate_dashboard', figsize=(16, 8))
         fig.suptitle(f'Meesho Real Data Analysis - Return Rate Analysis (Overall: {overall_rate:.1f}%)', 
                      fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
         
@@ -301,55 +677,106 @@ class RealMeeshoAnalysis:
                     f'{rate:.1f}%\n({orders} orders)', ha='center', va='bottom', 
                     fontweight='bold', fontsize=10)
         
-        plt.tight_layout()
-        plt.savefig('real_meesho_data_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        fig.tight_layout()
+        finish_figure(fig, 'real_meesho_data_analysis')
         
         return fig
     
-    def analyze_product_names(self):
+    def analyze_product_names(self, top_n=20, max_ngram=2):
         """Analyze product names to understand patterns"""
         print("Analyzing product names...")
         
-        # Get all product names
-        all_products = ' '.join(self.merged_data['Product Name'].astype(str))
-        
-        # Extract features
-        features = self.extract_product_features(all_products)
+        # Count words and phrases chunk by chunk, overall and per category
+        counter = TokenCounter(self.stop_words, max_ngram=max_ngram)
+        counter.count(self.merged_data['Product Name'], self.merged_data['product_category'])
+        self.token_counter = counter
         
         # Get most common words
-        word_freq = Counter(features)
-        most_common = word_freq.most_common(20)
+        most_common = counter.most_common(top_n)
         
         print("\nMost Common Words in Product Names:")
         for word, count in most_common:
             print(f"  {word}: {count}")
         
+        if max_ngram >= 2:
+            print("\nMost Common Phrases in Product Names:")
+            for phrase, count in counter.most_common(10, n=2):
+                print(f"  {phrase}: {count}")
+        
+        print("\nTop Words by Category:")
+        for category, terms in counter.top_terms_by_category(5).groupby('product_category', sort=False):
+            print(f"  {category}: " + ", ".join(f"{term} ({count})" for term, count in zip(terms['term'], terms['count'])))
+        
         return most_common
     
-    def run_complete_analysis(self):
-        """Run the complete real data analysis"""
+    def _stage(self, name):
+        """Time a pipeline stage when a profiler is attached"""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+    
+    def _row_count(self):
+        """Rows held so far: merged rows, or orders folded into the running aggregates"""
+        if self.merged_data is not None:
+            return len(self.merged_data)
+        if self.return_aggregates is not None:
+            return int(self.return_aggregates.total_orders)
+        return 0
+    
+    def run_complete_analysis(self, chunksize=None, use_cache=True, export_excel=True,
+                              report_path=RUN_REPORT_FILE, profile_stage=None, trace_memory=False,
+                              backend='pandas'):
+        """Run the complete real data analysis (streaming when chunksize is set, in SQL with backend='duckdb')"""
+        if backend not in EXECUTION_BACKENDS:
+            raise ValueError(f"Unknown execution backend {backend!r}; expected one of {EXECUTION_BACKENDS}")
         print("Starting Real Meesho Data Analysis...")
         print("=" * 60)
         
-        # Load and preprocess data
-        self.load_real_data()
-        self.preprocess_data()
+        # Time every stage; profile_stage names one stage to run under cProfile
+        self.profiler = StageProfiler(self._row_count, profile_stage=profile_stage, trace_memory=trace_memory)
         
-        # Categorize products using NLP
-        self.categorize_products_nlp()
+        # Streaming and DuckDB runs keep only the aggregates, not the row-level data
+        row_level = backend == 'pandas' and not chunksize
         
-        # Calculate real return rates
-        category_returns, price_returns, overall_rate = self.calculate_real_return_rates()
+        # Load, preprocess and categorize products using NLP
+        if backend == 'duckdb':
+            with self._stage('duckdb'):
+                self.aggregate_with_duckdb()
+        elif chunksize:
+            with self._stage('stream'):
+                self.load_real_data(chunksize=chunksize)
+        else:
+            self.load_prepared_data(use_cache=use_cache)
         
-        # Save data to Excel
-        self.save_data_to_excel(category_returns, price_returns, overall_rate)
+        # Calculate real return rates
+        with self._stage('aggregate'):
+            category_returns, price_returns, overall_rate = self.calculate_real_return_rates()
+        
+        # Customer return vs RTO split; DuckDB runs do not build the status cube
+        if row_level or self.status_engine is not None:
+            with self._stage('statuses'):
+                self.analyze_order_statuses()
+        
+        # Geography needs row-level pins and states, which streaming does not keep
+        if row_level:
+            with self._stage('geography'):
+                self.analyze_geography()
+            with self._stage('trends'):
+                self.analyze_return_trends()
+        
+        # Save results for the plotting scripts, and the optional Excel report
+        with self._stage('results_store'):
+            self.save_results_store(category_returns, price_returns, overall_rate)
+        if export_excel:
+            with self._stage('excel'):
+                self.save_data_to_excel(category_returns, price_returns, overall_rate)
         
         # Create plots with real data
-        self.create_real_data_plots(category_returns, price_returns, overall_rate)
+        with self._stage('plots'):
+            self.create_real_data_plots(category_returns, price_returns, overall_rate)
         
         # Analyze product names
-        self.analyze_product_names()
+        if row_level:
+            with self._stage('word_analysis'):
+                self.analyze_product_names()
         
         print("\n" + "="*60)
         print("="*60)
@@ -359,6 +786,13 @@ class RealMeeshoAnalysis:
         print(" Created plots with Meesho brand colors")
         print(" Generated: real_meesho_data_analysis.png")
         
+        self.profiler.print_summary()
+        if report_path:
+            self.profiler.write_report(report_path, forward_path=self.forward_path, orders_path=self.orders_path,
+                                       chunksize=chunksize, use_cache=use_cache, export_excel=export_excel,
+                                       category_engine=self.category_cache.engine, backend=backend)
+            print(f"✓ Run report saved to: {report_path}")
+        
         return category_returns, price_returns, overall_rate
 
 # Run the analysis
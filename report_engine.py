@@ -0,0 +1,176 @@
+"""
+Report Engine
+Loads the analysis tables once and produces registered charts and summaries from memory
+"""
+
+import importlib
+import argparse
+
+from results_store import RESULTS_STORE_FILE, RESULTS_EXCEL_FILE, has_table, load_return_tables, load_table
+from chart_rendering import render_charts
+from time_series import ReturnTimeSeries
+
+
+class Report:
+    """A registered generator: module.function(*inputs), optionally writing one output file"""
+
+    def __init__(self, kind, module, function, inputs=('category_data', 'price_data'), output=None,
+                 requires=None):
+        self.kind = kind
+        self.module = module
+        self.function = function
+        self.inputs = inputs
+        self.output = output
+        # Results store table that only some analysis runs save
+        self.requires = requires
+
+    def resolve(self):
+        """Import the generator only when it is actually used"""
+        target = importlib.import_module(self.module)
+        for attribute in self.function.split('.'):
+            target = getattr(target, attribute)
+        return target
+
+
+# Report name -> generator; charts draw from the shared tables, summaries print them
+REPORTS = {
+    'stacked_bars': Report('chart', 'stacked_bar_analysis', 'create_stacked_bar_charts',
+                           output='stacked_bar_analysis'),
+    'percentage_of_returns': Report('chart', 'return_percentage_plots', 'create_return_percentage_plots',
+                                    output='return_percentage_analysis'),
+    'return_rate_dashboard': Report('chart', 'real_data_analysis', 'RealMeeshoAnalysis.create_real_data_plots',
+                                    inputs=('category_data', 'price_data', 'overall_rate'),
+                                    output='real_meesho_data_analysis'),
+    'return_trend': Report('chart', 'return_trend_plots', 'create_return_trend_charts',
+                           inputs=('time_series',), output='return_trend_analysis',
+                           requires='daily_category_returns'),
+    'stacked_summary': Report('summary', 'stacked_bar_analysis', 'print_analysis_summary'),
+    'return_distribution': Report('summary', 'return_percentage_plots', 'print_return_analysis'),
+    'trend_summary': Report('summary', 'return_trend_plots', 'print_trend_summary', inputs=('time_series',),
+                            requires='daily_category_returns'),
+}
+
+
+class ReportEngine:
+    """Category and price range tables held in memory for any number of reports"""
+
+    def __init__(self, store_path=RESULTS_STORE_FILE, excel_path=RESULTS_EXCEL_FILE, verbose=True):
+        self.store_path = store_path
+        self.excel_path = excel_path
+        self.verbose = verbose
+        self.category_data = None
+        self.price_data = None
+        self.overall_rate = None
+        self._time_series = None
+        self.generated = {}
+
+    def load(self):
+        """Read the tables once; later calls reuse them"""
+        if self.category_data is not None:
+            return self
+
+        print("Loading analysis results...")
+        category_data, price_data = load_return_tables(self.store_path, self.excel_path)
+
+        # Calculate percentage of total returns for each price range
+        total_returns = price_data['returns'].sum()
+        price_data['percentage_of_total_returns'] = (price_data['returns'] / total_returns) * 100
+
+        self.category_data = category_data
+        self.price_data = price_data
+        self.overall_rate = category_data['returns'].sum() / category_data['total_orders'].sum() * 100
+
+        if self.verbose:
+            print("Category Analysis Data:")
+            print(category_data)
+            print("\nPrice Range Data with Return Percentages:")
+            print(price_data)
+        return self
+
+    @property
+    def time_series(self):
+        """Daily per-category series, read from the store on first use"""
+        if self._time_series is None:
+            self._time_series = ReturnTimeSeries.from_daily_table(
+                load_table('daily_category_returns', self.store_path))
+        return self._time_series
+
+    def _missing_tables(self, names):
+        """Report name -> store table it needs but the last analysis run did not save"""
+        return {name: REPORTS[name].requires for name in names
+                if REPORTS[name].requires and not has_table(REPORTS[name].requires, self.store_path)}
+
+    def default_reports(self, kind=None):
+        """All registered reports (of one kind), skipping those whose tables this store lacks"""
+        names = [name for name, report in REPORTS.items() if kind is None or report.kind == kind]
+        missing = self._missing_tables(names)
+        if missing:
+            print(f"Skipping {', '.join(missing)}: {self.store_path} has no "
+                  f"{', '.join(sorted(set(missing.values())))} table "
+                  f"(streaming and DuckDB runs keep no row-level dates)")
+        return [name for name in names if name not in missing]
+
+    def _select(self, names):
+        """Validate report names, dropping repeats and reports that were already produced"""
+        unknown = [name for name in names if name not in REPORTS]
+        if unknown:
+            raise ValueError(f"Unknown report(s) {unknown}; available: {sorted(REPORTS)}")
+
+        missing = self._missing_tables(names)
+        if missing:
+            raise ValueError(f"Report(s) {sorted(missing)} need the {', '.join(sorted(set(missing.values())))} "
+                             f"table, which {self.store_path} does not have; only row-level runs save it "
+                             f"(run the analysis without --chunksize or --backend duckdb)")
+
+        selected, outputs = [], {}
+        for name in dict.fromkeys(names):
+            if name in self.generated:
+                continue
+            output = REPORTS[name].output
+            if output is not None:
+                if output in outputs:
+                    raise ValueError(f"Reports {outputs[output]!r} and {name!r} both write {output}")
+                outputs[output] = name
+            selected.append(name)
+        return selected
+
+    def _args(self, name):
+        return tuple(getattr(self, attribute) for attribute in REPORTS[name].inputs)
+
+    def run(self, names=None, workers=1):
+        """Produce the named reports (default: all the store supports), charts first, each exactly once"""
+        names = self._select(self.default_reports() if names is None else names)
+        if not names:
+            return self.generated
+        self.load()
+
+        charts = [name for name in names if REPORTS[name].kind == 'chart']
+        summaries = [name for name in names if REPORTS[name].kind == 'summary']
+
+        if workers == 1:
+            for name in charts:
+                self.generated[name] = REPORTS[name].resolve()(*self._args(name))
+        elif charts:
+            jobs = [(name, REPORTS[name].resolve(), self._args(name)) for name in charts]
+            render_charts(jobs, workers=workers)
+            self.generated.update(dict.fromkeys(charts))
+
+        for name in summaries:
+            REPORTS[name].resolve()(*self._args(name))
+            self.generated[name] = None
+        return self.generated
+
+
+def main():
+    """Produce registered reports from the saved analysis results"""
+    parser = argparse.ArgumentParser(description='Produce Meesho report charts and summaries')
+    parser.add_argument('reports', nargs='*', help=f"any of: {', '.join(REPORTS)} (default: all)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='render charts in worker processes (default: 1, in this process)')
+    args = parser.parse_args()
+
+    ReportEngine().run(args.reports or None, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
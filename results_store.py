@@ -0,0 +1,79 @@
+"""
+Analysis Results Store
+SQLite hand-off of the analysis tables between the analysis and plotting scripts
+"""
+
+import os
+import sqlite3
+import pandas as pd
+
+RESULTS_STORE_FILE = 'meesho_analysis_results.sqlite'
+RESULTS_EXCEL_FILE = 'meesho_analysis_results.xlsx'
+
+# Table name in the store -> sheet name in the Excel report
+TABLE_SHEETS = {
+    'category_analysis': 'Category_Analysis',
+    'price_range_analysis': 'Price_Range_Analysis',
+    'summary': 'Summary',
+    'category_price_matrix': 'Category_Price_Matrix',
+    'product_categories': 'Product_Categories',
+    'status_rates': 'Status_Rates',
+    'status_transitions': 'Status_Transitions',
+    'status_disagreements': 'Status_Disagreements',
+}
+
+# Tables whose first column is the row index
+INDEXED_TABLES = {'category_analysis', 'price_range_analysis', 'category_price_matrix',
+                  'state_analysis', 'region_analysis', 'category_state_matrix',
+                  'category_financials', 'price_range_financials',
+                  'status_rates', 'status_transitions', 'status_disagreements'}
+
+
+def save_results(tables, path=RESULTS_STORE_FILE):
+    """Write named DataFrames to a fresh store, replacing the old one atomically"""
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    with sqlite3.connect(temp_path) as conn:
+        for name, frame in tables.items():
+            frame = frame.copy()
+            if name in INDEXED_TABLES:
+                frame.index = frame.index.astype(str)
+                frame.columns = frame.columns.astype(str)
+                frame = frame.reset_index()
+            frame.to_sql(name, conn, index=False, chunksize=50_000)
+    conn.close()
+
+    os.replace(temp_path, path)
+
+
+def has_table(name, path=RESULTS_STORE_FILE):
+    """Whether the store exists and holds the named table"""
+    if not os.path.exists(path):
+        return False
+    with sqlite3.connect(path) as conn:
+        found = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    conn.close()
+    return found is not None
+
+
+def load_table(name, path=RESULTS_STORE_FILE):
+    """Read one table back, restoring its index"""
+    with sqlite3.connect(path) as conn:
+        frame = pd.read_sql(f'SELECT * FROM "{name}" ORDER BY rowid', conn)
+    conn.close()
+
+    if name in INDEXED_TABLES:
+        frame = frame.set_index(frame.columns[0])
+    return frame
+
+
+def load_return_tables(path=RESULTS_STORE_FILE, excel_path=RESULTS_EXCEL_FILE):
+    """Category and price range tables from the store, or from the Excel report"""
+    if os.path.exists(path):
+        return load_table('category_analysis', path), load_table('price_range_analysis', path)
+
+    # Older runs only produced the Excel workbook
+    sheets = pd.read_excel(excel_path, sheet_name=['Category_Analysis', 'Price_Range_Analysis'], index_col=0)
+    return sheets['Category_Analysis'], sheets['Price_Range_Analysis']
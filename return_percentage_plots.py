@@ -3,43 +3,19 @@ Return Percentage Analysis - Based on Excel Results
 Plots percentage of returns for each category and price range
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from report_engine import ReportEngine
+from chart_rendering import get_figure, finish_figure
 
 # Meesho Brand Colors
 JAMUNI = '#580b48'  
 AAM = '#FFA500'     
 
-def load_excel_data():
-    """Load data from Excel file"""
-    print("Loading data from Excel file...")
-    
-    # Read category analysis
-    category_data = pd.read_excel('meesho_analysis_results.xlsx', sheet_name='Category_Analysis', index_col=0)
-    print("Category Analysis Data:")
-    print(category_data)
-    
-    # Read price range analysis
-    price_data = pd.read_excel('meesho_analysis_results.xlsx', sheet_name='Price_Range_Analysis', index_col=0)
-    print("\nPrice Range Analysis Data:")
-    print(price_data)
-    
-    # Calculate percentage of total returns for each price range
-    total_returns = price_data['returns'].sum()
-    price_data['percentage_of_total_returns'] = (price_data['returns'] / total_returns) * 100
-    
-    print("\nPrice Range Data with Return Percentages:")
-    print(price_data)
-    
-    return category_data, price_data
-
 def create_return_percentage_plots(category_data, price_data):
     """Create plots showing percentage of returns for each category and price range"""
     print("Creating return percentage plots...")
     
     # Create the plots
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+    fig, (ax1, ax2) = get_figure('percentage_of_returns', figsize=(16, 8))
     fig.suptitle('Meesho Return Analysis - Percentage of Total Returns', 
                  fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
     
@@ -96,9 +72,8 @@ def create_return_percentage_plots(category_data, price_data):
                 f'{percentage:.1f}%\n({returns} returns)', ha='center', va='bottom', 
                 fontweight='bold', fontsize=10)
     
-    plt.tight_layout()
-    plt.savefig('return_percentage_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    fig.tight_layout()
+    finish_figure(fig, 'return_percentage_analysis')
     
     return fig
 
@@ -131,14 +106,8 @@ def main():
     print("Starting Return Percentage Analysis...")
     print("=" * 50)
     
-    # Load data from Excel
-    category_data, price_data = load_excel_data()
-    
-    # Create plots
-    fig = create_return_percentage_plots(category_data, price_data)
-    
-    # Print analysis
-    print_return_analysis(category_data, price_data)
+    # Load the analysis results once, then plot and print from memory
+    ReportEngine().run(['percentage_of_returns', 'return_distribution'])
     
     print("\n" + "="*60)
     print("="*60)
@@ -0,0 +1,99 @@
+"""
+Return Trend Analysis - Based on Daily Results
+Plots weekly return rates and rolling return rates per category over order date
+"""
+
+from report_engine import ReportEngine
+from chart_rendering import get_figure, finish_figure
+
+# Meesho Brand Colors
+JAMUNI = '#580b48'  # Deep Purple
+AAM = '#FFA500'     # Bright Yellow/Orange
+
+def create_return_trend_charts(time_series, window=7):
+    """Create charts of weekly return rates and rolling return rates by category"""
+    print("Creating return trend charts...")
+
+    # Create the plots
+    fig, (ax1, ax2) = get_figure('return_trend', figsize=(18, 8))
+    fig.suptitle('Meesho Return Trends - Return Rate over Order Date',
+                 fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
+
+    # Plot 1: Weekly return rate
+    weekly = time_series.weekly_series()
+    week_labels = [f"{week:%d %b}" for week in weekly.index]
+
+    bars = ax1.bar(week_labels, weekly['return_rate'].fillna(0).values,
+                   color=AAM, edgecolor='white', linewidth=2, alpha=0.9)
+
+    ax1.set_title('Weekly Return Rate',
+                 fontsize=16, fontweight='bold',
+                 color=JAMUNI, pad=20)
+    ax1.set_xlabel('Week Starting', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Return Rate (%)', fontsize=14, fontweight='bold')
+    ax1.tick_params(axis='x', rotation=45, labelsize=12)
+    ax1.tick_params(axis='y', labelsize=12)
+    ax1.grid(False)
+
+    # Add value labels and order counts
+    for bar, rate, orders in zip(bars, weekly['return_rate'], weekly['total_orders']):
+        if orders:
+            ax1.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
+                    f'{rate:.1f}%\n({orders} orders)', ha='center', va='bottom',
+                    fontweight='bold', fontsize=10)
+
+    # Plot 2: Rolling return rate, overall and per category
+    colors = [JAMUNI, AAM]
+    overall = time_series.rolling(window)['return_rate']
+    ax2.plot(overall.index, overall.values, color=JAMUNI, linewidth=3, label='All Categories')
+    for i, category in enumerate(sorted(time_series.categories)):
+        rates = time_series.rolling(window, category)['return_rate']
+        ax2.plot(rates.index, rates.values, color=colors[i % 2], linewidth=1.5, alpha=0.8,
+                 linestyle=['--', ':', '-.'][i % 3], label=category)
+
+    ax2.set_title(f'{window}-Day Rolling Return Rate by Category',
+                 fontsize=16, fontweight='bold',
+                 color=JAMUNI, pad=20)
+    ax2.set_xlabel('Order Date', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('Return Rate (%)', fontsize=14, fontweight='bold')
+    ax2.tick_params(axis='x', rotation=45, labelsize=12)
+    ax2.tick_params(axis='y', labelsize=12)
+    ax2.grid(False)
+    ax2.legend(fontsize=11, loc='upper right')
+
+    fig.tight_layout()
+    finish_figure(fig, 'return_trend_analysis')
+
+    return fig
+
+def print_trend_summary(time_series):
+    """Print weekly and latest rolling return rates"""
+    print("\n" + "="*60)
+    print("RETURN TREND ANALYSIS")
+    print("="*60)
+
+    print("\nWeekly Return Rates:")
+    for week_start, data in time_series.weekly_series().iterrows():
+        print(f"  Week of {week_start:%Y-%m-%d}: {data['return_rate']:.2f}% "
+              f"({int(data['returns'])} returns out of {int(data['total_orders'])} orders)")
+
+    latest = time_series.rolling_rates().iloc[-1]
+    print(f"\nRolling Return Rates on {time_series.dates[-1]:%Y-%m-%d}:")
+    for (window, category), rate in latest.items():
+        print(f"  {window} {category}: {rate:.2f}%")
+
+def main():
+    """Main function to run the return trend analysis"""
+    print("Starting Return Trend Analysis...")
+    print("=" * 50)
+
+    # Load the daily results once, then plot and print from memory
+    ReportEngine().run(['return_trend', 'trend_summary'])
+
+    print("\n" + "="*60)
+    print(" Plotted weekly return rates")
+    print(" Plotted 7-day rolling return rates by category")
+    print(" Generated: return_trend_analysis.png")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Scaling Benchmark Suite
+Times every analysis stage and both plotting scripts on synthetic data from 10k rows upward
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import pandas as pd
+
+from synthetic_data import generate_dataset
+from chart_rendering import get_figure, finish_figure
+
+# Meesho Brand Colors
+JAMUNI = '#580b48'  # Deep Purple
+AAM = '#FFA500'     # Bright Yellow/Orange
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+SYNTHETIC_DIR = 'synthetic'
+BENCHMARK_RESULTS_FILE = 'meesho_scaling_benchmark.json'
+PLOT_SCRIPTS = ('stacked_bar_analysis', 'return_percentage_plots')
+
+# Above these sizes the Excel workbook takes minutes and the merged rows stop fitting
+# comfortably in memory, so larger runs skip Excel and stream the forward report
+EXCEL_MAX_ROWS = 1_000_000
+STREAM_MIN_ROWS = 5_000_000
+STREAM_CHUNKSIZE = 1_000_000
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ANALYSIS_CODE = """\
+from real_data_analysis import RealMeeshoAnalysis
+RealMeeshoAnalysis().run_complete_analysis(chunksize={chunksize!r}, use_cache=False,
+                                           export_excel={export_excel!r}, report_path={report_path!r})
+"""
+
+PLOT_CODE = """\
+import {module}
+from stage_profiler import StageProfiler
+profiler = StageProfiler()
+with profiler.stage({module!r}):
+    {module}.main()
+profiler.write_report({report_path!r}, script={module!r})
+"""
+
+
+def _run_child(code, cwd):
+    """Run code in a fresh headless interpreter inside the data folder"""
+    env = dict(os.environ, MEESHO_HEADLESS='1',
+               PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+    subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def _stage_records(report, rows, mode, run):
+    """One record per stage of a run report, with throughput in forward rows per second"""
+    return [{
+        'rows': rows,
+        'mode': mode,
+        'run': run,
+        'stage': stage['stage'],
+        'wall_seconds': stage['wall_seconds'],
+        'cpu_seconds': stage['cpu_seconds'],
+        'rows_per_second': rows / stage['wall_seconds'] if stage['wall_seconds'] else None,
+        'peak_rss_mb': stage['peak_rss_mb'],
+        'rss_growth_mb': stage['rss_growth_mb'],
+    } for stage in report['stages']]
+
+
+def benchmark_size(rows, data_dir=SYNTHETIC_DIR, seed=0):
+    """Generate (or reuse) one dataset, then time the analysis and the plotting scripts on it"""
+    out_dir = os.path.abspath(os.path.join(data_dir, str(rows)))
+    generate_dataset(out_dir, rows, seed)
+
+    chunksize = STREAM_CHUNKSIZE if rows >= STREAM_MIN_ROWS else None
+    mode = 'streaming' if chunksize else 'in-memory'
+    print(f"Benchmarking {rows:,} rows ({mode})...")
+
+    report_path = os.path.join(out_dir, 'analysis_report.json')
+    _run_child(ANALYSIS_CODE.format(chunksize=chunksize, export_excel=rows <= EXCEL_MAX_ROWS,
+                                    report_path=report_path), out_dir)
+    with open(report_path, encoding='utf-8') as f:
+        records = _stage_records(json.load(f), rows, mode, 'analysis')
+
+    for module in PLOT_SCRIPTS:
+        report_path = os.path.join(out_dir, f'{module}_report.json')
+        _run_child(PLOT_CODE.format(module=module, report_path=report_path), out_dir)
+        with open(report_path, encoding='utf-8') as f:
+            records += _stage_records(json.load(f), rows, mode, module)
+
+    return records
+
+
+def plot_scaling(results):
+    """Wall time per stage and peak memory against data size, both on log axes"""
+    fig, (ax1, ax2) = get_figure('scaling_benchmark', figsize=(18, 8))
+    fig.suptitle('Meesho Analysis - Scaling Benchmark', fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
+
+    wall = results.pivot_table(index='rows', columns='stage', values='wall_seconds', sort=False)
+    for i, stage in enumerate(wall.columns):
+        ax1.plot(wall.index, wall[stage], marker='o', linewidth=2,
+                 color=[JAMUNI, AAM][i % 2], linestyle=['-', '--', ':', '-.'][i // 2 % 4], label=stage)
+    ax1.set_xscale('log')
+    ax1.set_yscale('log')
+    ax1.set_title('Wall Time by Stage', fontsize=16, fontweight='bold', color=JAMUNI, pad=20)
+    ax1.set_xlabel('Forward Report Rows', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Seconds', fontsize=14, fontweight='bold')
+    ax1.legend(fontsize=9, loc='upper left')
+
+    peak = results.pivot_table(index='rows', columns='run', values='peak_rss_mb', aggfunc='max', sort=False)
+    for i, run in enumerate(peak.columns):
+        ax2.plot(peak.index, peak[run], marker='o', linewidth=3 if run == 'analysis' else 2,
+                 color=[JAMUNI, AAM][i % 2], linestyle=['-', '--', ':'][i % 3], label=run)
+    ax2.set_xscale('log')
+    ax2.set_title('Peak Resident Memory', fontsize=16, fontweight='bold', color=JAMUNI, pad=20)
+    ax2.set_xlabel('Forward Report Rows', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('Peak RSS (MB)', fontsize=14, fontweight='bold')
+    ax2.legend(fontsize=11, loc='upper left')
+
+    fig.tight_layout()
+    return finish_figure(fig, 'scaling_benchmark')
+
+
+def run_scaling_benchmark(sizes=DEFAULT_SIZES, data_dir=SYNTHETIC_DIR, seed=0, output=BENCHMARK_RESULTS_FILE):
+    """Benchmark every size, then print, save and plot the curves"""
+    records = []
+    for rows in sorted(sizes):
+        records += benchmark_size(rows, data_dir, seed)
+    results = pd.DataFrame(records)
+
+    print("\nWall Time by Stage (seconds):")
+    print(results.pivot_table(index='stage', columns='rows', values='wall_seconds', sort=False)
+          .to_string(float_format=lambda x: f"{x:.3f}"))
+    print("\nThroughput by Stage (forward rows/second):")
+    print(results.pivot_table(index='stage', columns='rows', values='rows_per_second', sort=False)
+          .to_string(float_format=lambda x: f"{x:,.0f}"))
+    print("\nPeak RSS by Run (MB):")
+    print(results.pivot_table(index='run', columns='rows', values='peak_rss_mb', aggfunc='max', sort=False)
+          .to_string(float_format=lambda x: f"{x:,.1f}"))
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                   'seed': seed, 'results': records}, f, indent=2)
+    print(f"\n✓ Benchmark results saved to: {output}")
+    print(f"✓ Scaling chart saved to: {plot_scaling(results)}")
+    return results
+
+
+def main():
+    """Run the scaling benchmark over the requested sizes"""
+    parser = argparse.ArgumentParser(description='Time the analysis stages on synthetic data of growing size')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='forward report row counts, e.g. 10000 1000000 50000000')
+    parser.add_argument('--data-dir', default=SYNTHETIC_DIR, help='where generated datasets are kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=BENCHMARK_RESULTS_FILE)
+    args = parser.parse_args()
+
+    run_scaling_benchmark(args.sizes, args.data_dir, args.seed, args.output)
+
+
+if __name__ == "__main__":
+    main()
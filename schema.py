@@ -0,0 +1,242 @@
+"""
+Input CSV Schemas
+Declared column types for the ForwardReports and Orders layouts
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from order_join import UNPARSED_KEY, sub_order_keys
+
+# Column kinds: 'key' (sub-order id), 'text', 'category', 'date', 'optional_date', 'paise' or a numeric dtype.
+# 'optional_date' is for date columns the pipeline does not use: unparseable values become NaT.
+# Decimal money columns are 'paise': parsed from the text into exact int64 paise.
+# Blank policy: a blank key or (required) date rejects the row, since it cannot be joined or dated;
+# blank numeric and paise values are kept as missing (the row is still an order).
+# Float (rupee price) columns keep fractional values and turn unparseable ones into missing.
+# Integer columns reject unparseable, fractional or out-of-range values instead of truncating them.
+FORWARD_REPORTS_SCHEMA = {
+    'order_date': 'date',
+    'sub_order_num': 'key',
+    'order_status': 'category',
+    'state': 'category',
+    'pin': 'int32',
+    'gst_amount': 'paise',
+    'meesho_price': 'float64',
+    'shipping_charges_total': 'float64',
+    'price': 'float64',
+}
+
+ORDERS_SCHEMA = {
+    'Reason for Credit Entry': 'category',
+    'Sub Order No': 'key',
+    'Order Date': 'optional_date',
+    'Customer State': 'category',
+    'Product Name': 'text',
+    'SKU': 'category',
+    'Size': 'category',
+    'Quantity': 'int16',
+    'Supplier Listed Price (Incl. GST + Commission)': 'paise',
+    'Supplier Discounted Price (Incl GST and Commision)': 'paise',
+}
+
+DECIMAL_PATTERN = r'\s*([+-]?)(\d*)(?:\.(\d*))?\s*'
+# Date layouts seen in Meesho exports (and after a round trip through Excel), tried in order
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%d-%m-%Y', '%d/%m/%Y')
+
+NON_NUMERIC_KINDS = ('key', 'text', 'category', 'date', 'optional_date', 'paise')
+
+
+def read_dtypes(schema):
+    """dtype mapping for pd.read_csv; numeric columns are parsed by the C reader"""
+    dtypes = {}
+    for column, kind in schema.items():
+        if kind == 'category':
+            dtypes[column] = 'category'
+        elif kind in ('key', 'text', 'date', 'optional_date', 'paise'):
+            dtypes[column] = str
+    return dtypes
+
+
+def _paise_block(text):
+    """Parse a block of stripped ASCII byte strings; returns (paise, valid, blank)"""
+    n = len(text)
+    blank = text == b''
+    if text.dtype.itemsize == 0:
+        return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool), blank
+
+    # One row per character position; fixed-width bytes are padded with NUL
+    chars = np.ascontiguousarray(text.view(np.uint8).reshape(n, text.dtype.itemsize).T)
+    negative = chars[0] == ord('-')
+    start = (negative | (chars[0] == ord('+'))).astype(np.int64)
+
+    rupees = np.zeros(n, dtype=np.int64)
+    fraction = np.zeros((3, n), dtype=np.int64)
+    whole_digits = np.zeros(n, dtype=np.int64)
+    fraction_digits = np.zeros(n, dtype=np.int64)
+    dots = np.zeros(n, dtype=np.int64)
+    valid = np.ones(n, dtype=bool)
+
+    # Horner's rule over the character positions, which are few
+    for position, char in enumerate(chars):
+        inside = (position >= start) & (char != 0)
+        is_dot = inside & (char == ord('.'))
+        digit = char.astype(np.int64) - ord('0')
+        is_digit = inside & (digit >= 0) & (digit <= 9)
+        valid &= ~inside | is_digit | is_dot
+        dots += is_dot
+
+        in_whole = is_digit & (dots == 0)
+        rupees = np.where(in_whole, rupees * 10 + digit, rupees)
+        whole_digits += in_whole
+
+        in_fraction = is_digit & (dots == 1)
+        for place in range(3):
+            fraction[place] = np.where(in_fraction & (fraction_digits == place), digit, fraction[place])
+        fraction_digits += in_fraction
+
+    valid &= (dots <= 1) & (whole_digits + fraction_digits > 0) & (whole_digits <= 16)
+    # Two fraction digits for paise, the third to round half away from zero
+    paise = rupees * 100 + fraction[0] * 10 + fraction[1] + (fraction[2] >= 5)
+    return np.where(negative, -paise, paise), valid & ~blank, blank
+
+
+def parse_paise(values, block_size=1_000_000):
+    """Decimal rupee strings as Int64 paise, rounded half away from zero; also the bad-value mask"""
+    # Prices repeat heavily, so each distinct string is parsed once and mapped back to the rows
+    codes, text = pd.factorize(pd.Series(values, dtype=object).fillna('').to_numpy())
+    try:
+        text = text.astype('S')
+    except UnicodeEncodeError:
+        # Non-ASCII text is never a number; replace it with something that fails to parse
+        text = np.array([value if str(value).isascii() else '~' for value in text], dtype='S')
+    text = np.char.strip(text)
+
+    paise = np.zeros(len(text), dtype=np.int64)
+    valid = np.zeros(len(text), dtype=bool)
+    blank = np.zeros(len(text), dtype=bool)
+    for begin in range(0, len(text), block_size):
+        block = slice(begin, begin + block_size)
+        paise[block], valid[block], blank[block] = _paise_block(text[block])
+
+    paise, valid, blank = paise.take(codes), valid.take(codes), blank.take(codes)
+    parsed = pd.array(paise, dtype='Int64')
+    parsed[~valid] = pd.NA
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(parsed, index=index), ~valid & ~blank
+
+
+def parse_dates(values, formats=DATE_FORMATS):
+    """Datetimes from the first format each value matches; NaT where none does"""
+    parsed = pd.to_datetime(values, format=formats[0], errors='coerce')
+    for date_format in formats[1:]:
+        unparsed = parsed.isna() & values.notna()
+        if not unparsed.any():
+            break
+        parsed[unparsed] = pd.to_datetime(values[unparsed], format=date_format, errors='coerce')
+    return parsed
+
+
+def fits_integer(values, dtype):
+    """Mask of values that are blank or whole numbers within the integer dtype's range"""
+    limits = np.iinfo(dtype)
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype) and values.notna().all():
+        # Already whole numbers, as the C reader parses most columns; only the range can fail
+        numbers = values.to_numpy()
+        return (numbers >= limits.min) & (numbers <= limits.max)
+    numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.isnan(numbers) | ((numbers == np.trunc(numbers))
+                                    & (numbers >= limits.min) & (numbers <= limits.max))
+
+
+def apply_schema(frame, schema, source='data'):
+    """Convert a freshly read frame to the schema; return (frame, rejected_rows)"""
+    missing = [column for column in schema if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{source}: missing expected columns {missing}")
+
+    bad = np.zeros(len(frame), dtype=bool)
+    for column, kind in schema.items():
+        values = frame[column]
+        if kind == 'key':
+            # Ids must match SUB_ORDER_PATTERN, i.e. pack into a join key; checked with the join's parser
+            bad |= sub_order_keys(values) == UNPARSED_KEY
+        elif kind == 'paise':
+            parsed, invalid = parse_paise(values)
+            bad |= invalid
+            frame[column] = parsed
+        elif kind in ('date', 'optional_date'):
+            parsed = parse_dates(values)
+            if kind == 'date':
+                bad |= parsed.isna().to_numpy()
+            frame[column] = parsed
+        elif kind not in NON_NUMERIC_KINDS:
+            integer = np.issubdtype(np.dtype(kind), np.integer)
+            if not is_numeric_dtype(values):
+                # The reader fell back to strings, so some value is not a number
+                parsed = pd.to_numeric(values, errors='coerce')
+                if integer:
+                    bad |= (parsed.isna() & values.notna()).to_numpy()
+                frame[column] = values = parsed
+            if integer:
+                bad |= ~fits_integer(values, kind)
+
+    rejected = frame[bad]
+    frame = frame[~bad].reset_index(drop=True)
+
+    # Downcast numerics to their declared width (every value now fits); columns with blanks stay float64
+    for column, kind in schema.items():
+        if kind == 'paise' and frame[column].notna().all():
+            frame[column] = frame[column].astype(np.int64)
+        if kind in NON_NUMERIC_KINDS:
+            continue
+        if frame[column].notna().all():
+            frame[column] = frame[column].astype(kind)
+        else:
+            frame[column] = frame[column].astype(np.float64)
+
+    return frame, rejected
+
+
+def read_with_schema(path, schema, chunksize=None):
+    """Read a CSV under its schema; returns (frame, rejected) or an iterator of them"""
+    dtypes = read_dtypes(schema)
+    if chunksize:
+        return (apply_schema(chunk, schema, source=path)
+                for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunksize))
+
+    frame = pd.read_csv(path, dtype=dtypes)
+    return apply_schema(frame, schema, source=path)
+
+
+def memory_report(path, schema):
+    """Per-column memory of the inferred read versus the schema read"""
+    inferred = pd.read_csv(path)
+    typed, _ = read_with_schema(path, schema)
+
+    report = pd.DataFrame({
+        'inferred_dtype': inferred.dtypes.astype(str),
+        'inferred_bytes': inferred.memory_usage(deep=True, index=False),
+        'schema_dtype': typed.dtypes.astype(str),
+        'schema_bytes': typed.memory_usage(deep=True, index=False),
+    })
+    report.loc['TOTAL'] = ['', report['inferred_bytes'].sum(), '', report['schema_bytes'].sum()]
+    report['reduction'] = report['inferred_bytes'] / report['schema_bytes']
+    return report
+
+
+def main():
+    """Print memory per column before and after applying the schemas"""
+    from real_data_analysis import FORWARD_REPORTS_FILE, ORDERS_FILE
+
+    for path, schema in [(FORWARD_REPORTS_FILE, FORWARD_REPORTS_SCHEMA),
+                         (ORDERS_FILE, ORDERS_SCHEMA)]:
+        print(f"\nMemory by column: {path}")
+        print(memory_report(path, schema).to_string(float_format=lambda x: f"{x:.1f}x"))
+
+
+if __name__ == "__main__":
+    main()
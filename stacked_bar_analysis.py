@@ -3,43 +3,19 @@ Stacked Bar Chart Analysis for Meesho Data
 Shows total orders vs returns with return percentages
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from report_engine import ReportEngine
+from chart_rendering import get_figure, finish_figure
 
 # Meesho Brand Colors
 JAMUNI = '#580b48'  # Deep Purple
 AAM = '#FFA500'     # Bright Yellow/Orange
 
-def load_excel_data():
-    """Load data from Excel file"""
-    print("Loading data from Excel file...")
-    
-    # Read category analysis
-    category_data = pd.read_excel('meesho_analysis_results.xlsx', sheet_name='Category_Analysis', index_col=0)
-    print("Category Analysis Data:")
-    print(category_data)
-    
-    # Read price range analysis
-    price_data = pd.read_excel('meesho_analysis_results.xlsx', sheet_name='Price_Range_Analysis', index_col=0)
-    print("\nPrice Range Analysis Data:")
-    print(price_data)
-    
-    # Calculate percentage of total returns for each price range
-    total_returns = price_data['returns'].sum()
-    price_data['percentage_of_total_returns'] = (price_data['returns'] / total_returns) * 100
-    
-    print("\nPrice Range Data with Return Percentages:")
-    print(price_data)
-    
-    return category_data, price_data
-
 def create_stacked_bar_charts(category_data, price_data):
     """Create stacked bar charts showing total orders vs returns"""
     print("Creating stacked bar charts...")
     
     # Create the plots
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
+    fig, (ax1, ax2) = get_figure('stacked_bars', figsize=(18, 8))
     fig.suptitle('Meesho Orders vs Returns Analysis - Stacked Bar Charts', 
                  fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
     
@@ -107,73 +83,8 @@ def create_stacked_bar_charts(category_data, price_data):
             ax2.text(i, non_ret + ret/2, f'Returns: {ret}', ha='center', va='center', 
                     fontweight='bold', fontsize=10, color='white')
     
-    plt.tight_layout()
-    plt.savefig('stacked_bar_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    return fig
-
-def create_percentage_analysis(category_data, price_data):
-    """Create percentage analysis showing return percentages out of total returns"""
-    print("Creating percentage analysis...")
-    
-    # Create the plots
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
-    fig.suptitle('Return Percentage Analysis - Percentage of Total Returns', 
-                 fontsize=20, fontweight='bold', color=JAMUNI, y=0.98)
-    
-    # Plot 1: Percentage of Total Returns by Category
-    categories = category_data.index
-    return_percentages = category_data['percentage_of_total_returns'].values
-    
-    # Use alternating Meesho brand colors
-    colors = [JAMUNI, AAM, JAMUNI, AAM, JAMUNI, AAM][:len(categories)]
-    
-    bars1 = ax1.bar(categories, return_percentages, 
-                   color=colors, edgecolor='white', linewidth=2, alpha=0.9)
-    
-    ax1.set_title('Percentage of Total Returns by Category', 
-                 fontsize=16, fontweight='bold', 
-                 color=JAMUNI, pad=20)
-    ax1.set_xlabel('Product Categories', fontsize=14, fontweight='bold')
-    ax1.set_ylabel('Percentage of Total Returns (%)', fontsize=14, fontweight='bold')
-    ax1.tick_params(axis='x', rotation=45, labelsize=12)
-    ax1.tick_params(axis='y', labelsize=12)
-    ax1.grid(False)
-    
-    # Add value labels
-    for i, (bar, percentage, returns) in enumerate(zip(bars1, return_percentages, category_data['returns'])):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                f'{percentage:.1f}%\n({returns} returns)', ha='center', va='bottom', 
-                fontweight='bold', fontsize=10)
-    
-    # Plot 2: Percentage of Total Returns by Price Range
-    price_ranges = price_data.index
-    price_return_percentages = price_data['percentage_of_total_returns'].values
-    
-    bars2 = ax2.bar(price_ranges, price_return_percentages,
-                   color=AAM, edgecolor='white', linewidth=2, alpha=0.9)
-    
-    ax2.set_title('Percentage of Total Returns by Price Range', 
-                 fontsize=16, fontweight='bold', 
-                 color=JAMUNI, pad=20)
-    ax2.set_xlabel('Price Ranges (₹)', fontsize=14, fontweight='bold')
-    ax2.set_ylabel('Percentage of Total Returns (%)', fontsize=14, fontweight='bold')
-    ax2.tick_params(axis='x', rotation=45, labelsize=12)
-    ax2.tick_params(axis='y', labelsize=12)
-    ax2.grid(False)
-    
-    # Add value labels
-    for bar, percentage, returns in zip(bars2, price_return_percentages, price_data['returns']):
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                f'{percentage:.1f}%\n({returns} returns)', ha='center', va='bottom', 
-                fontweight='bold', fontsize=10)
-    
-    plt.tight_layout()
-    plt.savefig('return_percentage_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    fig.tight_layout()
+    finish_figure(fig, 'stacked_bar_analysis')
     
     return fig
 
@@ -217,17 +128,8 @@ def main():
     print("Starting Stacked Bar Chart Analysis...")
     print("=" * 50)
     
-    # Load data from Excel
-    category_data, price_data = load_excel_data()
-    
-    # Create stacked bar charts
-    fig1 = create_stacked_bar_charts(category_data, price_data)
-    
-    # Create percentage analysis
-    fig2 = create_percentage_analysis(category_data, price_data)
-    
-    # Print analysis summary
-    print_analysis_summary(category_data, price_data)
+    # Load the analysis results once, then draw both charts and the summary from memory
+    ReportEngine().run(['stacked_bars', 'percentage_of_returns', 'stacked_summary'])
     
     print("\n" + "="*70)
     print("STACKED BAR ANALYSIS COMPLETED!")
@@ -0,0 +1,150 @@
+"""
+Pipeline Stage Profiler
+Wall time, CPU time, memory and row counts per analysis stage, with an optional cProfile dump and JSON report
+"""
+
+import sys
+import json
+import time
+import cProfile
+import pstats
+import platform
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # resource is Unix-only; without it peak RSS is left out of the report
+    resource = None
+
+RUN_REPORT_FILE = 'meesho_run_report.json'
+REPORT_FORMAT_VERSION = 1
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+class StageProfiler:
+    """Records one entry per stage; stages run inside `with profiler.stage(name):`"""
+
+    def __init__(self, row_counter=None, profile_stage=None, profile_path=None, trace_memory=False):
+        self.row_counter = row_counter
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path or f'meesho_profile_{profile_stage}.prof'
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+
+    def _rows(self):
+        return self.row_counter() if self.row_counter else None
+
+    def stage(self, name):
+        """Context manager measuring one stage"""
+        return _Stage(self, name)
+
+    def _finish(self, record, profiler):
+        self.stages.append(record)
+        if profiler is None:
+            return
+        profiler.dump_stats(self.profile_path)
+        print(f"\ncProfile of stage '{record['stage']}' saved to: {self.profile_path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(10)
+
+    def print_summary(self):
+        """Print wall/CPU time, memory and rows of every stage in run order"""
+        print("\nStage Timings:")
+        total = sum(record['wall_seconds'] for record in self.stages)
+        for record in self.stages:
+            rows = '' if record['rows_out'] is None else f", {record['rows_in']:,} -> {record['rows_out']:,} rows"
+            memory = ''
+            if record['rss_growth_mb'] is not None:
+                memory += f", peak RSS +{record['rss_growth_mb']:.1f} MB"
+            if record['traced_peak_mb'] is not None:
+                memory += f", traced peak {record['traced_peak_mb']:.1f} MB"
+            share = record['wall_seconds'] / total * 100 if total else 0.0
+            print(f"  {record['stage']}: {record['wall_seconds']:.3f}s wall ({share:.0f}%), "
+                  f"{record['cpu_seconds']:.3f}s CPU{memory}{rows}")
+        print(f"  Total: {total:.3f}s")
+
+    def report(self, **details):
+        """Machine-readable run report: environment, run details and every stage"""
+        import numpy as np
+        import pandas as pd
+        return {
+            'format_version': REPORT_FORMAT_VERSION,
+            'started_at': self.started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'details': details,
+            'peak_rss_mb': peak_rss_mb(),
+            'total_wall_seconds': sum(record['wall_seconds'] for record in self.stages),
+            'stages': self.stages,
+        }
+
+    def write_report(self, path=RUN_REPORT_FILE, **details):
+        """Write report() as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(**details), f, indent=2)
+        return path
+
+
+class _Stage:
+    """One timed stage; see StageProfiler.stage"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        owner = self.profiler
+        # Only start tracing here if nobody else is, and stop it again on exit
+        self.started_tracing = owner.trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        if owner.trace_memory:
+            tracemalloc.reset_peak()
+            self.traced_start = tracemalloc.get_traced_memory()[0]
+
+        self.cprofile = cProfile.Profile() if self.name == owner.profile_stage else None
+        self.rows_in = owner._rows()
+        self.rss_start = peak_rss_mb()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if self.cprofile:
+            self.cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.cprofile:
+            self.cprofile.disable()
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        owner = self.profiler
+
+        traced_peak = None
+        if owner.trace_memory:
+            traced_peak = (tracemalloc.get_traced_memory()[1] - self.traced_start) / 1e6
+            if self.started_tracing:
+                tracemalloc.stop()
+
+        rss_end = peak_rss_mb()
+        owner._finish({
+            'stage': self.name,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'rows_in': self.rows_in,
+            'rows_out': owner._rows(),
+            'peak_rss_mb': rss_end,
+            'rss_growth_mb': None if rss_end is None else rss_end - self.rss_start,
+            'traced_peak_mb': traced_peak,
+            'failed': exc_type is not None,
+        }, self.cprofile)
+        return False
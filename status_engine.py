@@ -0,0 +1,183 @@
+"""
+Order Status Lifecycle Engine
+Forward report status and Orders credit reason as int8 enums, with per-category transition and disagreement counts
+"""
+
+import numpy as np
+import pandas as pd
+
+# ForwardReports order_status values; anything else, or a missing status, is 'Other'
+FORWARD_STATUSES = ('Delivered', 'Shipped', 'Exchange', 'Return', 'rto', 'Cancelled', 'Other')
+# Orders file 'Reason for Credit Entry' values; anything else, or a missing reason, is 'OTHER'
+CREDIT_REASONS = ('DELIVERED', 'RTO_COMPLETE', 'RTO_LOCKED', 'CANCELLED', 'OTHER')
+CREDIT_REASON_COLUMN = 'Reason for Credit Entry'
+
+RTO_REASONS = ('RTO_COMPLETE', 'RTO_LOCKED')
+
+# How a (forward status, credit reason) pair reconciles
+RECONCILIATION_CLASSES = ('agree', 'forward_lags', 'conflict', 'unknown')
+AGREE, FORWARD_LAGS, CONFLICT, UNKNOWN = range(len(RECONCILIATION_CLASSES))
+
+# Credit reasons each forward status is consistent with; customer returns and
+# exchanges happen after delivery, so they are credited as DELIVERED
+AGREEING_REASONS = {
+    'Delivered': ('DELIVERED',),
+    'Exchange': ('DELIVERED',),
+    'Return': ('DELIVERED',),
+    'rto': RTO_REASONS,
+    'Cancelled': ('CANCELLED',),
+}
+# Still in transit in the forward report; any final credit reason is newer information
+IN_TRANSIT_STATUSES = ('Shipped',)
+
+
+def _reconciliation_table():
+    """int8 [forward status, credit reason] -> reconciliation class"""
+    table = np.full((len(FORWARD_STATUSES), len(CREDIT_REASONS)), CONFLICT, dtype=np.int8)
+    for status in IN_TRANSIT_STATUSES:
+        table[FORWARD_STATUSES.index(status), :] = FORWARD_LAGS
+    for status, reasons in AGREEING_REASONS.items():
+        for reason in reasons:
+            table[FORWARD_STATUSES.index(status), CREDIT_REASONS.index(reason)] = AGREE
+    table[-1, :] = UNKNOWN
+    table[:, -1] = UNKNOWN
+    return table
+
+
+RECONCILIATION = _reconciliation_table()
+
+
+def encode_statuses(values, labels):
+    """int8 enum codes; values outside labels[:-1], or missing, get the last (catch-all) code"""
+    codes = pd.Categorical(values, categories=list(labels[:-1])).codes
+    return np.where(codes < 0, len(labels) - 1, codes).astype(np.int8)
+
+
+def status_codes(frame):
+    """Forward status and credit reason codes of merged rows"""
+    return (encode_statuses(frame['order_status'], FORWARD_STATUSES),
+            encode_statuses(frame[CREDIT_REASON_COLUMN], CREDIT_REASONS))
+
+
+def reconcile(frame):
+    """Reconciliation class code of every merged row"""
+    forward, credit = status_codes(frame)
+    return RECONCILIATION[forward, credit]
+
+
+class StatusEngine:
+    """Orders per (category, forward status, credit reason), folded chunk by chunk with one bincount"""
+
+    def __init__(self):
+        self.categories = []
+        self._category_codes = {}
+        self.cube = np.zeros((0, len(FORWARD_STATUSES), len(CREDIT_REASONS)), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, merged):
+        return cls().update(merged)
+
+    def _category_slots(self, labels):
+        """Map category labels to cube rows, growing the cube for unseen labels"""
+        new_labels = [label for label in dict.fromkeys(labels) if label not in self._category_codes]
+        for label in new_labels:
+            self._category_codes[label] = len(self.categories)
+            self.categories.append(label)
+        if new_labels:
+            grown = np.zeros((len(new_labels),) + self.cube.shape[1:], dtype=np.int64)
+            self.cube = np.concatenate([self.cube, grown])
+        return np.array([self._category_codes[label] for label in labels], dtype=np.int64)
+
+    def update(self, frame):
+        """Count a categorized chunk of merged rows into the cube"""
+        codes, labels = pd.factorize(frame['product_category'].astype(object).to_numpy())
+        mapping = self._category_slots(list(labels))
+        forward, credit = status_codes(frame)
+
+        n_forward, n_credit = self.cube.shape[1:]
+        keys = (mapping[codes] * n_forward + forward) * n_credit + credit
+        self.cube += np.bincount(keys, minlength=self.cube.size).reshape(self.cube.shape)
+        return self
+
+    @property
+    def total_orders(self):
+        return int(self.cube.sum())
+
+    def _active_categories(self):
+        """Cube rows with orders, in label order"""
+        active = [i for i in range(len(self.categories)) if self.cube[i].sum()]
+        return sorted(active, key=lambda i: self.categories[i])
+
+    def _category_index(self, rows):
+        return pd.Index([self.categories[i] for i in rows], name='product_category')
+
+    def transition_matrix(self, category=None):
+        """Forward status x credit reason order counts, for all categories or one"""
+        cells = self.cube.sum(axis=0) if category is None else self.cube[self._category_codes[category]]
+        return pd.DataFrame(cells, index=pd.Index(FORWARD_STATUSES, name='order_status'),
+                            columns=pd.Index(CREDIT_REASONS, name='credit_reason'))
+
+    def category_transitions(self):
+        """Long table of every non-empty (category, forward status, credit reason) cell and its class"""
+        rows = self._active_categories()
+        cells = self.cube[rows]
+        category, forward, credit = np.nonzero(cells)
+        return pd.DataFrame({
+            'product_category': [self.categories[rows[i]] for i in category],
+            'order_status': np.asarray(FORWARD_STATUSES, dtype=object)[forward],
+            'credit_reason': np.asarray(CREDIT_REASONS, dtype=object)[credit],
+            'orders': cells[category, forward, credit],
+            'reconciliation': np.asarray(RECONCILIATION_CLASSES, dtype=object)[RECONCILIATION[forward, credit]],
+        })
+
+    def reconciliation_table(self):
+        """Orders per category in each reconciliation class"""
+        rows = self._active_categories()
+        counts = np.stack([self.cube[rows][:, RECONCILIATION == k].sum(axis=1)
+                           for k in range(len(RECONCILIATION_CLASSES))], axis=1)
+        return pd.DataFrame(counts, index=self._category_index(rows), columns=list(RECONCILIATION_CLASSES))
+
+    def disagreement_matrix(self):
+        """Category x 'status -> reason' order counts for the pairs that do not agree"""
+        rows = self._active_categories()
+        pairs = np.argwhere((RECONCILIATION != AGREE) & (self.cube[rows].sum(axis=0) > 0))
+        columns = [f"{FORWARD_STATUSES[f]} -> {CREDIT_REASONS[c]}" for f, c in pairs]
+        counts = self.cube[rows][:, pairs[:, 0], pairs[:, 1]]
+        return pd.DataFrame(counts, index=self._category_index(rows), columns=columns)
+
+    def status_rates(self):
+        """Customer return and RTO rates kept apart, per category, with how often the two files agree"""
+        rows = self._active_categories()
+        cells = self.cube[rows]
+        forward = cells.sum(axis=2)
+        credit = cells.sum(axis=1)
+
+        def status(name):
+            return forward[:, FORWARD_STATUSES.index(name)]
+
+        rto_reasons = [CREDIT_REASONS.index(reason) for reason in RTO_REASONS]
+        # RTO according to either file, since the forward report can lag behind the credit entry
+        either_rto = np.zeros(RECONCILIATION.shape, dtype=bool)
+        either_rto[FORWARD_STATUSES.index('rto'), :] = True
+        either_rto[:, rto_reasons] = True
+
+        total = forward.sum(axis=1)
+        classes = self.reconciliation_table()
+        table = pd.DataFrame({
+            'total_orders': total,
+            'customer_returns': status('Return'),
+            'rto': status('rto'),
+            'credit_rto': credit[:, rto_reasons].sum(axis=1),
+            'reconciled_rto': cells[:, either_rto].sum(axis=1),
+            'exchanges': status('Exchange'),
+            'cancelled': status('Cancelled'),
+        }, index=self._category_index(rows))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['customer_return_rate'] = table['customer_returns'] / total * 100
+            table['rto_rate'] = table['rto'] / total * 100
+            table['combined_return_rate'] = (table['customer_returns'] + table['rto']) / total * 100
+            table['reconciled_rto_rate'] = table['reconciled_rto'] / total * 100
+            table['agreement_rate'] = classes['agree'].to_numpy() / total * 100
+        table['forward_lags'] = classes['forward_lags'].to_numpy()
+        table['conflicts'] = classes['conflict'].to_numpy()
+        return table
@@ -0,0 +1,229 @@
+"""
+Synthetic Meesho Data Generator
+Deterministic ForwardReports/Orders CSV pairs in the real column layouts, at any size
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from real_data_analysis import FORWARD_REPORTS_FILE, ORDERS_FILE
+
+MANIFEST_FILE = 'synthetic_manifest.json'
+# Rows are generated in fixed blocks, each from its own seeded stream, so the
+# output depends only on (rows, seed, rates) and never on memory or chunking
+BLOCK_ROWS = 500_000
+
+# Status mix of the sample ForwardReports file
+STATUS_MIX = {'Delivered': 0.36, 'Return': 0.25, 'Shipped': 0.19, 'rto': 0.16,
+              'Cancelled': 0.03, 'Exchange': 0.01}
+# Orders 'Reason for Credit Entry' per forward status, as in the matched sample rows
+CREDIT_REASONS = {
+    'Delivered': {'DELIVERED': 1.0},
+    'Return': {'DELIVERED': 1.0},
+    'Exchange': {'DELIVERED': 1.0},
+    'Shipped': {'DELIVERED': 0.7, 'RTO_COMPLETE': 0.23, 'RTO_LOCKED': 0.07},
+    'rto': {'RTO_COMPLETE': 0.89, 'RTO_LOCKED': 0.06, 'CANCELLED': 0.05},
+    'Cancelled': {'CANCELLED': 0.75, 'RTO_COMPLETE': 0.25},
+}
+# Orders rows with no forward row are mostly cancellations
+UNMATCHED_CREDIT_REASONS = {'CANCELLED': 0.83, 'DELIVERED': 0.11, 'RTO_COMPLETE': 0.06}
+SIZES = {'Free Size': 0.43, 'Semi Stitched': 0.15, 'XXL': 0.15, 'XL': 0.13, 'M': 0.09, 'L': 0.04,
+         'S': 0.005, 'XXXL': 0.005}
+
+# Word pools for products beyond the sample catalog; the last few garments match no category
+ADJECTIVES = ['Fancy', 'Stylish', 'Designer', 'Beautiful', 'Heavy', 'Trendy', 'Printed', 'Embroidered',
+              'Party Wear', 'Casual', 'Premium', 'Elegant']
+FABRICS = ['Georgette', 'Cotton', 'Silk', 'Rayon', 'Crepe', 'Net', 'Organza', 'Velvet', 'Chiffon', 'Denim']
+GARMENTS = ['Saree', 'Kurta Set', 'Lehenga Choli', 'Anarkali Suit', 'Dupatta Set', 'Gown', 'Maxi Dress',
+            'Crop Top', 'Jeans', 'Palazzo', 'Hair Straightener', 'Makeup Brush Set', 'Earrings',
+            'Handbag', 'Cushion Cover', 'Bedsheet', 'Phone Charger', 'Wall Clock', 'Water Bottle']
+EXTRAS = ['with Dupatta', 'with Sequence Work', 'for Women', 'Combo', 'with Blouse Piece', 'Set of 2', '']
+
+START_DATE = pd.Timestamp('2022-08-01')
+DAYS = 31
+# Scrambled but unique 12-digit order numbers: index * multiplier mod ORDER_SPACE is a bijection
+ORDER_BASE = 100_000_000_000
+ORDER_SPACE = 900_000_000_000
+ORDER_MULTIPLIER = 78_736_259
+
+
+def sub_order_ids(indices, lines):
+    """'order_line' ids for global row indices; distinct indices never share an order"""
+    orders = ORDER_BASE + (np.asarray(indices, dtype=np.int64) * ORDER_MULTIPLIER) % ORDER_SPACE
+    return pd.Series(orders.astype(str)).str.cat(pd.Series(lines).astype(str), sep='_').to_numpy()
+
+
+def _choice(rng, mix, size):
+    """Draw size labels from a {label: weight} mix"""
+    return rng.choice(np.array(list(mix), dtype=object), size=size, p=np.array(list(mix.values())) / sum(mix.values()))
+
+
+class SyntheticMeeshoData:
+    """Product catalog and geography taken from the sample files, scaled to any row count"""
+
+    def __init__(self, seed=0, n_products=None, sample_forward=FORWARD_REPORTS_FILE, sample_orders=ORDERS_FILE):
+        self.seed = seed
+        rng = np.random.default_rng([seed, 0])
+
+        forward = pd.read_csv(sample_forward)
+        orders = pd.read_csv(sample_orders)
+        self.locations = forward[['state', 'pin']].dropna().drop_duplicates().reset_index(drop=True)
+
+        # The sample products first, most ordered first, then generated ones
+        listed = orders.columns[8]
+        sample = (orders.groupby('Product Name', sort=False)
+                  .agg(SKU=('SKU', 'first'), listed_price=(listed, 'median'), orders=('SKU', 'size'))
+                  .sort_values('orders', ascending=False, kind='stable')
+                  .reset_index())
+        n_products = max(n_products or len(sample), len(sample))
+        extra = n_products - len(sample)
+        names = [' '.join(filter(None, words)) for words in zip(
+            rng.choice(ADJECTIVES, extra), rng.choice(FABRICS, extra),
+            rng.choice(GARMENTS, extra), rng.choice(EXTRAS, extra))]
+        generated = pd.DataFrame({
+            'Product Name': names,
+            'SKU': [f"SYN{i:07d}" for i in range(extra)],
+            'listed_price': np.round(rng.lognormal(np.log(900), 0.5, extra)).clip(150, 5000),
+        })
+        self.products = pd.concat([sample[['Product Name', 'SKU', 'listed_price']], generated], ignore_index=True)
+
+        # Zipf-like popularity, so names repeat the way real catalogs do
+        weights = 1 / np.arange(1, len(self.products) + 1) ** 1.1
+        self.popularity = weights / weights.sum()
+
+    def _block(self, block, start, rows, match_rate, orders_only_rate, duplicate_rate, total_rows):
+        """(forward, orders) frames for forward rows [start, start + rows)"""
+        rng = np.random.default_rng([self.seed, block + 1])
+
+        statuses = _choice(rng, STATUS_MIX, rows)
+        days = rng.integers(0, DAYS, rows)
+        places = self.locations.iloc[rng.integers(0, len(self.locations), rows)].reset_index(drop=True)
+        products = self.products.iloc[rng.choice(len(self.products), rows, p=self.popularity)].reset_index(drop=True)
+        lines = np.where(rng.random(rows) < 0.03, 2, 1)
+        ids = sub_order_ids(np.arange(start, start + rows), lines)
+        dates = (START_DATE + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d')
+
+        # Supplier price, then the Meesho price up to 20% above it; GST is 5% of the inclusive price
+        discounts = np.where(rng.random(rows) < 0.05, rng.integers(1, 150, rows), 0)
+        discounted = np.maximum(products['listed_price'].to_numpy() - discounts, 100)
+        meesho_price = np.round(discounted * rng.uniform(1.0, 1.2, rows)).astype(np.int64)
+        shipping = np.where(rng.random(rows) < 0.36, 0, rng.integers(100, 150, rows))
+        pins = (places['pin'].to_numpy(dtype=np.int64) // 1000) * 1000 + rng.integers(0, 1000, rows)
+
+        forward = pd.DataFrame({
+            'order_date': dates,
+            'sub_order_num': ids,
+            'order_status': statuses,
+            'state': places['state'].to_numpy(),
+            'pin': pins,
+            'gst_amount': np.char.mod('%.2f', meesho_price * 5 / 105),
+            'meesho_price': meesho_price,
+            'shipping_charges_total': shipping,
+            'price': meesho_price + shipping,
+        })
+
+        # Orders rows: the matched forward rows, orders with no forward row, and a few repeats
+        matched = np.flatnonzero(rng.random(rows) < match_rate)
+        reasons = np.empty(len(matched), dtype=object)
+        for status, mix in CREDIT_REASONS.items():
+            is_status = statuses[matched] == status
+            reasons[is_status] = _choice(rng, mix, int(is_status.sum()))
+
+        n_unmatched = int(rng.binomial(rows, min(orders_only_rate, 1.0)))
+        unmatched_products = self.products.iloc[rng.choice(len(self.products), n_unmatched, p=self.popularity)]
+        unmatched_places = self.locations.iloc[rng.integers(0, len(self.locations), n_unmatched)]
+        # Their ids come from past the last forward row, so they never match one
+        unmatched_start = total_rows + start
+        unmatched_days = rng.integers(0, DAYS, n_unmatched)
+
+        orders = pd.DataFrame({
+            'Reason for Credit Entry': np.concatenate([reasons, _choice(rng, UNMATCHED_CREDIT_REASONS, n_unmatched)]),
+            'Sub Order No': np.concatenate([ids[matched], sub_order_ids(
+                np.arange(unmatched_start, unmatched_start + n_unmatched), np.ones(n_unmatched, dtype=np.int64))]),
+            'Order Date': np.concatenate([dates[matched], (START_DATE + pd.to_timedelta(
+                unmatched_days, unit='D')).strftime('%Y-%m-%d')]),
+            'Customer State': np.concatenate([places['state'].to_numpy()[matched],
+                                              unmatched_places['state'].to_numpy()]),
+            'Product Name': np.concatenate([products['Product Name'].to_numpy()[matched],
+                                            unmatched_products['Product Name'].to_numpy()]),
+            'SKU': np.concatenate([products['SKU'].to_numpy()[matched], unmatched_products['SKU'].to_numpy()]),
+            'Size': _choice(rng, SIZES, len(matched) + n_unmatched),
+            'Quantity': np.where(rng.random(len(matched) + n_unmatched) < 0.96, 1,
+                                 rng.integers(2, 6, len(matched) + n_unmatched)),
+            'Supplier Listed Price (Incl. GST + Commission)': np.concatenate([
+                products['listed_price'].to_numpy()[matched], unmatched_products['listed_price'].to_numpy()]),
+            'Supplier Discounted Price (Incl GST and Commision)': np.concatenate([
+                discounted[matched], unmatched_products['listed_price'].to_numpy()]).astype(np.float64),
+        })
+        repeats = orders.iloc[np.flatnonzero(rng.random(len(orders)) < duplicate_rate)]
+        orders = pd.concat([orders, repeats], ignore_index=True)
+        orders = orders.iloc[rng.permutation(len(orders))]
+        return forward, orders
+
+    def write(self, out_dir, rows, match_rate=0.96, orders_only_rate=0.5, duplicate_rate=0.005):
+        """Write the CSV pair into out_dir block by block; returns the two paths"""
+        os.makedirs(out_dir, exist_ok=True)
+        forward_path = os.path.join(out_dir, FORWARD_REPORTS_FILE)
+        orders_path = os.path.join(out_dir, ORDERS_FILE)
+
+        start_time = time.perf_counter()
+        orders_rows = 0
+        for block, start in enumerate(range(0, rows, BLOCK_ROWS)):
+            forward, orders = self._block(block, start, min(BLOCK_ROWS, rows - start),
+                                          match_rate, orders_only_rate, duplicate_rate, rows)
+            mode = 'w' if block == 0 else 'a'
+            forward.to_csv(forward_path, mode=mode, header=block == 0, index=False)
+            orders.to_csv(orders_path, mode=mode, header=block == 0, index=False, quoting=csv.QUOTE_ALL)
+            orders_rows += len(orders)
+
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(rows, match_rate, orders_only_rate, duplicate_rate), f, indent=2)
+        print(f"✓ Generated {rows:,} forward rows and {orders_rows:,} order rows in {out_dir} "
+              f"({time.perf_counter() - start_time:.1f}s)")
+        return forward_path, orders_path
+
+    def manifest(self, rows, match_rate, orders_only_rate, duplicate_rate):
+        """Everything the generated files depend on"""
+        return {'rows': rows, 'seed': self.seed, 'n_products': len(self.products), 'match_rate': match_rate,
+                'orders_only_rate': orders_only_rate, 'duplicate_rate': duplicate_rate,
+                'block_rows': BLOCK_ROWS}
+
+
+def generate_dataset(out_dir, rows, seed=0, n_products=None, match_rate=0.96, orders_only_rate=0.5,
+                     duplicate_rate=0.005):
+    """Generate a CSV pair unless out_dir already holds one made with the same settings"""
+    generator = SyntheticMeeshoData(seed, n_products or max(1, min(rows // 200, 50_000)))
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    expected = generator.manifest(rows, match_rate, orders_only_rate, duplicate_rate)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            if json.load(f) == expected:
+                print(f"Reusing synthetic data in {out_dir} ({rows:,} rows)")
+                return os.path.join(out_dir, FORWARD_REPORTS_FILE), os.path.join(out_dir, ORDERS_FILE)
+    return generator.write(out_dir, rows, match_rate, orders_only_rate, duplicate_rate)
+
+
+def main():
+    """Generate one synthetic ForwardReports/Orders pair"""
+    parser = argparse.ArgumentParser(description='Generate synthetic Meesho ForwardReports/Orders CSVs')
+    parser.add_argument('rows', type=int, help='number of ForwardReports rows')
+    parser.add_argument('--out', default=None, help='output folder (default: synthetic/<rows>)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--products', type=int, default=None, help='catalog size (default: rows / 200)')
+    parser.add_argument('--match-rate', type=float, default=0.96, help='share of forward rows with an order')
+    parser.add_argument('--orders-only-rate', type=float, default=0.5,
+                        help='order rows with no forward row, per forward row')
+    parser.add_argument('--duplicate-rate', type=float, default=0.005, help='share of order rows repeated')
+    args = parser.parse_args()
+
+    generate_dataset(args.out or os.path.join('synthetic', str(args.rows)), args.rows, args.seed,
+                     args.products, args.match_rate, args.orders_only_rate, args.duplicate_rate)
+
+
+if __name__ == "__main__":
+    main()
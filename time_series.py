@@ -0,0 +1,168 @@
+"""
+Return Rate Time Series
+Daily per-category order/return counts on an integer day index, with prefix sums for O(1) windows
+"""
+
+import numpy as np
+import pandas as pd
+
+SERIES_MEASURES = ('total_orders', 'returns')
+ROLLING_WINDOWS = (7, 28)
+
+
+class ReturnTimeSeries:
+    """Orders and returns per (category, day) plus their running totals over days"""
+
+    def __init__(self, origin=None):
+        self.origin = None if origin is None else pd.Timestamp(origin).normalize()
+        self.categories = []
+        self._category_codes = {}
+        # daily[m, c, d] counts measure m for category c on day origin + d;
+        # cumulative[m, c, d] is the sum over days before d
+        self.daily = np.zeros((len(SERIES_MEASURES), 0, 0))
+        self.cumulative = np.zeros((len(SERIES_MEASURES), 0, 1))
+
+    @classmethod
+    def from_frame(cls, merged):
+        """Build the series from preprocessed, categorized rows"""
+        return cls().append(merged)
+
+    @property
+    def n_days(self):
+        return self.daily.shape[2]
+
+    @property
+    def dates(self):
+        return pd.date_range(self.origin, periods=self.n_days, freq='D', name='order_date')
+
+    def _category_rows(self, labels):
+        """Cube rows for category labels, adding rows for unseen labels"""
+        new_labels = [label for label in dict.fromkeys(labels) if label not in self._category_codes]
+        for label in new_labels:
+            self._category_codes[label] = len(self.categories)
+            self.categories.append(label)
+        if new_labels:
+            grow = ((0, 0), (0, len(new_labels)), (0, 0))
+            self.daily = np.pad(self.daily, grow)
+            self.cumulative = np.pad(self.cumulative, grow)
+        return np.array([self._category_codes[label] for label in labels], dtype=np.int64)
+
+    def _extend_days(self, first_day, last_day):
+        """Grow the day axis to cover [first_day, last_day] relative to the origin"""
+        before = max(0, -first_day)
+        after = max(0, last_day + 1 - self.n_days)
+        if before or after:
+            self.daily = np.pad(self.daily, ((0, 0), (0, 0), (before, after)))
+            # Days added in front shift every running total; a full rebuild is needed then
+            self.cumulative = np.pad(self.cumulative, ((0, 0), (0, 0), (before, 0)))
+            self.cumulative = np.pad(self.cumulative, ((0, 0), (0, 0), (0, after)), mode='edge')
+        return before
+
+    def append(self, frame):
+        """Add rows; only the running totals from the earliest touched day onward are recomputed"""
+        dates = pd.to_datetime(frame['order_date']).dt.normalize()
+        valid = dates.notna().to_numpy()
+        if not valid.any():
+            return self
+        if self.origin is None:
+            self.origin = dates[valid].min()
+
+        days = ((dates[valid] - self.origin) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+        shift = self._extend_days(int(days.min()), int(days.max()))
+        if shift:
+            self.origin -= pd.Timedelta(days=shift)
+            days += shift
+
+        codes, labels = pd.factorize(frame['product_category'].astype(object).to_numpy()[valid])
+        rows = self._category_rows(list(labels))[codes]
+
+        n_categories, n_days = len(self.categories), self.n_days
+        keys = rows * n_days + days
+        weights = [None, frame['is_return'].to_numpy(dtype=np.float64)[valid]]
+        for m, w in enumerate(weights):
+            counts = np.bincount(keys, weights=w, minlength=n_categories * n_days)
+            self.daily[m] += counts.reshape(n_categories, n_days)
+
+        start = 0 if shift else int(days.min())
+        self.cumulative[:, :, start + 1:] = (self.cumulative[:, :, start:start + 1]
+                                             + np.cumsum(self.daily[:, :, start:], axis=2))
+        return self
+
+    def _running_totals(self, category=None):
+        """(orders, returns) running totals for one category or for all of them"""
+        if category is None:
+            return self.cumulative.sum(axis=1)
+        return self.cumulative[:, self._category_codes[category]]
+
+    def _window_frame(self, starts, ends, index, category=None):
+        """Orders, returns and return rate between running-total positions"""
+        totals = self._running_totals(category)
+        orders = totals[0, ends] - totals[0, starts]
+        returns = totals[1, ends] - totals[1, starts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(orders > 0, returns / orders * 100, np.nan)
+        return pd.DataFrame({
+            'total_orders': np.rint(orders).astype(np.int64),
+            'returns': np.rint(returns).astype(np.int64),
+            'return_rate': rate,
+        }, index=index)
+
+    def daily_series(self, category=None):
+        """Orders, returns and return rate per day"""
+        positions = np.arange(self.n_days)
+        return self._window_frame(positions, positions + 1, self.dates, category)
+
+    def weekly_series(self, category=None):
+        """Orders, returns and return rate per Monday-starting week"""
+        dates = self.dates
+        week_starts = np.flatnonzero(dates.dayofweek == 0)
+        starts = np.unique(np.concatenate([[0], week_starts]))
+        ends = np.append(starts[1:], self.n_days)
+        index = pd.DatetimeIndex(dates[starts] - pd.to_timedelta(dates[starts].dayofweek, unit='D'),
+                                 name='week_start')
+        return self._window_frame(starts, ends, index, category)
+
+    def rolling(self, window, category=None):
+        """Return rate over the trailing window of days, NaN until a full window exists"""
+        ends = np.arange(1, self.n_days + 1)
+        starts = np.maximum(ends - window, 0)
+        frame = self._window_frame(starts, ends, self.dates, category)
+        frame.loc[ends < window, 'return_rate'] = np.nan
+        return frame
+
+    def rolling_rates(self, windows=ROLLING_WINDOWS):
+        """Day x (window, category) table of rolling return rates, 'All' for every category"""
+        columns = {}
+        for window in windows:
+            for category in [None] + sorted(self.categories):
+                label = 'All' if category is None else category
+                columns[(f'{window}d', label)] = self.rolling(window, category)['return_rate']
+        return pd.DataFrame(columns).rename_axis(columns=['window', 'product_category'])
+
+    def daily_table(self):
+        """Long table of non-empty (day, category) counts, e.g. for the results store"""
+        c, d = np.nonzero(self.daily[0])
+        return pd.DataFrame({
+            'order_date': self.dates[d].strftime('%Y-%m-%d'),
+            'product_category': [self.categories[i] for i in c],
+            'total_orders': np.rint(self.daily[0, c, d]).astype(np.int64),
+            'returns': np.rint(self.daily[1, c, d]).astype(np.int64),
+        }).sort_values(['order_date', 'product_category'], ignore_index=True)
+
+    @classmethod
+    def from_daily_table(cls, table):
+        """Rebuild the series from daily_table() output"""
+        series = cls()
+        if table.empty:
+            return series
+        series.origin = pd.Timestamp(table['order_date'].min())
+        dates = pd.to_datetime(table['order_date'])
+        days = ((dates - series.origin) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+        series._extend_days(0, int(days.max()))
+
+        codes, labels = pd.factorize(table['product_category'].to_numpy(dtype=object))
+        rows = series._category_rows(list(labels))[codes]
+        series.daily[0, rows, days] = table['total_orders'].to_numpy()
+        series.daily[1, rows, days] = table['returns'].to_numpy()
+        series.cumulative[:, :, 1:] = np.cumsum(series.daily, axis=2)
+        return series
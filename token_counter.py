@@ -0,0 +1,178 @@
+"""
+Product Name Token Counter
+Chunked, vectorized word and n-gram frequencies with per-category top terms
+"""
+
+import re
+import time
+import tracemalloc
+from collections import Counter
+import numpy as np
+import pandas as pd
+from category_engine import NON_ALPHA_PATTERN
+
+# Same character filter as the categorizer; shorter tokens carry no product meaning
+NON_ALPHA_REGEX = re.compile(NON_ALPHA_PATTERN)
+MIN_TOKEN_LENGTH = 3
+TOKEN_CHUNK_SIZE = 100_000
+
+
+class TokenCounter:
+    """Word and n-gram counts over product names, fed one chunk of names at a time"""
+
+    def __init__(self, stop_words, max_ngram=1, chunk_size=TOKEN_CHUNK_SIZE):
+        self.stop_words = frozenset(stop_words)
+        self.max_ngram = max_ngram
+        self.chunk_size = chunk_size
+        # Counters keep first-seen order, so most_common() breaks ties like the old join did
+        self.counts = {n: Counter() for n in range(1, max_ngram + 1)}
+        self.category_counts = {n: {} for n in range(1, max_ngram + 1)}
+        self.rows = 0
+
+    def tokenize(self, names):
+        """Kept tokens of a chunk of names, indexed by their row within the chunk"""
+        tokens = (pd.Series(names, dtype=object).reset_index(drop=True)
+                  .astype(str).str.lower()
+                  .str.replace(NON_ALPHA_REGEX, '', regex=True)
+                  .str.split()
+                  .explode()
+                  .dropna())
+        keep = (tokens.str.len() >= MIN_TOKEN_LENGTH) & ~tokens.isin(self.stop_words)
+        return tokens[keep]
+
+    @staticmethod
+    def ngrams(tokens, n):
+        """Space-joined runs of n consecutive tokens from the same name"""
+        if n == 1:
+            return tokens
+        words = tokens.to_numpy(dtype=object)
+        rows = tokens.index.to_numpy()
+        if len(words) < n:
+            return pd.Series([], dtype=object)
+        # A run is valid when its first and last token come from the same row
+        same_row = rows[:len(rows) - n + 1] == rows[n - 1:]
+        grams = words[:len(words) - n + 1]
+        for offset in range(1, n):
+            grams = grams + ' ' + words[offset:len(words) - n + 1 + offset]
+        return pd.Series(grams[same_row], index=rows[:len(rows) - n + 1][same_row], dtype=object)
+
+    @staticmethod
+    def _count_into(counter, terms, weights):
+        """Add one chunk's weighted term counts, new terms in order of first appearance"""
+        codes, uniques = pd.factorize(terms.to_numpy(dtype=object))
+        counts = np.bincount(codes, weights=weights, minlength=len(uniques))
+        counter.update(dict(zip(uniques, np.rint(counts).astype(np.int64).tolist())))
+
+    @staticmethod
+    def _distinct_rows(names, categories):
+        """First row of each distinct (name, category) and how many rows share it"""
+        keys, _ = pd.factorize(names)
+        if categories is not None:
+            category_codes, category_labels = pd.factorize(categories)
+            keys = keys * (len(category_labels) + 1) + category_codes + 1
+        # Codes number distinct keys in order of first appearance, so first rows stay in row order
+        codes, _ = pd.factorize(keys)
+        _, first_rows = np.unique(codes, return_index=True)
+        return first_rows, np.bincount(codes)
+
+    def update(self, names, categories=None):
+        """Count every n-gram of one chunk of names, per category too when labels are given"""
+        names = pd.Series(names, dtype=object).reset_index(drop=True).astype(str)
+        if categories is not None:
+            categories = pd.Series(categories, dtype=object).to_numpy()
+
+        # Repeated names are tokenized once and counted once per row that has them
+        first_rows, repeats = self._distinct_rows(names.to_numpy(), categories)
+        tokens = self.tokenize(names.to_numpy()[first_rows])
+
+        for n, counter in self.counts.items():
+            terms = self.ngrams(tokens, n)
+            term_rows = terms.index.to_numpy(dtype=np.int64)
+            self._count_into(counter, terms, repeats[term_rows])
+            if categories is None:
+                continue
+            term_categories = categories[first_rows][term_rows]
+            for category in pd.unique(term_categories):
+                in_category = term_categories == category
+                by_category = self.category_counts[n].setdefault(category, Counter())
+                self._count_into(by_category, terms[in_category], repeats[term_rows][in_category])
+
+        self.rows += len(names)
+        return self
+
+    def count(self, names, categories=None):
+        """Feed a whole column through update() in chunks of chunk_size rows"""
+        names = pd.Series(names, dtype=object).reset_index(drop=True)
+        if categories is not None:
+            categories = pd.Series(categories, dtype=object).reset_index(drop=True)
+        for start in range(0, len(names), self.chunk_size):
+            stop = start + self.chunk_size
+            self.update(names[start:stop], None if categories is None else categories[start:stop])
+        return self
+
+    def most_common(self, top_n=None, n=1):
+        """(term, count) pairs, most frequent first, ties in order of first appearance"""
+        return self.counts[n].most_common(top_n)
+
+    def top_terms_by_category(self, top_n=10, n=1):
+        """Long table of the top terms of every category"""
+        records = [(category, rank, term, count)
+                   for category, counter in sorted(self.category_counts[n].items(), key=lambda item: str(item[0]))
+                   for rank, (term, count) in enumerate(counter.most_common(top_n), start=1)]
+        return pd.DataFrame(records, columns=['product_category', 'rank', 'term', 'count'])
+
+
+def join_word_counts(product_names, stop_words):
+    """Word counts the old way: one joined string, one regex, one list comprehension"""
+    all_products = ' '.join(pd.Series(product_names, dtype=object).astype(str))
+    text = NON_ALPHA_REGEX.sub('', all_products.lower())
+    return Counter(token for token in text.split()
+                   if token not in stop_words and len(token) >= MIN_TOKEN_LENGTH).most_common()
+
+
+def benchmark_word_counts(product_names, stop_words, repeat=3):
+    """Time and peak traced memory of the joined-string count against the chunked counter"""
+    results = {'rows': len(product_names)}
+    cases = [('join', lambda: join_word_counts(product_names, stop_words)),
+             ('chunked', lambda: TokenCounter(stop_words).count(product_names).most_common())]
+
+    counts = {}
+    for name, run in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            counts[name] = run()
+            timings.append(time.perf_counter() - start)
+        results[f'{name}_seconds'] = min(timings)
+
+        tracemalloc.start()
+        run()
+        results[f'{name}_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    results['identical'] = counts['join'] == counts['chunked']
+    return results
+
+
+def main():
+    """Benchmark word counting on the real product names, scaled up"""
+    import sys
+    from real_data_analysis import RealMeeshoAnalysis
+
+    target_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    analyzer = RealMeeshoAnalysis()
+    base_names = analyzer.load_prepared_data()['Product Name']
+    names = pd.concat([base_names] * (target_rows // len(base_names) + 1), ignore_index=True)[:target_rows]
+
+    results = benchmark_word_counts(names, analyzer.stop_words)
+
+    print("\nWord Count Benchmark:")
+    print(f"  Rows: {results['rows']:,}")
+    print(f"  Joined string: {results['join_seconds']:.3f}s, {results['join_peak_mb']:.1f} MB peak")
+    print(f"  Chunked counter: {results['chunked_seconds']:.3f}s, {results['chunked_peak_mb']:.1f} MB peak")
+    print(f"  Identical counts: {'yes' if results['identical'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Sparse-Vector Categorization Engine
+Scores product names with one sparse TF-IDF product against centroids built from the keyword lists
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import sklearn
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+except ImportError:  # scikit-learn is optional; the keyword engine needs neither
+    sklearn = sparse = None
+
+# Letters and hyphens survive ('a-line'); everything else separates tokens
+TOKEN_SEPARATOR_PATTERN = r'[^a-z\-]+'
+# Plural endings folded the way Porter's first step does: dresses -> dress, sarees -> saree
+PLURAL_PATTERN = r'(?<=[a-z]{2})(?:(ss)es|(i)es|(?<!s)s)$'
+
+HASH_FEATURES = 2 ** 18
+CHAR_NGRAM = 4
+# Whole-token features count fully, spelling-tolerant character n-grams at half weight
+CHAR_WEIGHT = 0.5
+# Scores are in keyword matches: an exact keyword token scores 1, a misspelling a fraction
+MIN_MATCH = 0.5
+
+
+def model_parameters():
+    """Settings that, with the keyword lists, fix every label this engine gives"""
+    # The vocabulary is hashed, so its size and the hashing library's version stand in for it
+    return {'token_separator': TOKEN_SEPARATOR_PATTERN, 'plural': PLURAL_PATTERN,
+            'hash_features': HASH_FEATURES, 'char_ngram': CHAR_NGRAM, 'char_weight': CHAR_WEIGHT,
+            'min_match': MIN_MATCH, 'sklearn': sklearn.__version__ if sklearn else None}
+
+
+def fold_plural(tokens):
+    """Strip plural endings so 'sarees' meets the keyword 'saree'"""
+    return pd.Series(tokens, dtype=object).str.replace(
+        PLURAL_PATTERN, lambda m: m.group(1) or m.group(2) or '', regex=True)
+
+
+class SparseVectorCategorizer:
+    """Hashed word + character n-gram TF-IDF vectors scored against keyword centroids"""
+
+    def __init__(self, categories, stop_words, default_category='Other'):
+        if sparse is None:
+            raise ImportError("The sparse categorization engine needs scikit-learn and scipy "
+                              "(pip install scikit-learn)")
+        self.category_names = list(categories)
+        self.default_category = default_category
+        self.stop_words = set(stop_words)
+
+        self.word_vectorizer = HashingVectorizer(analyzer=str.split, n_features=HASH_FEATURES,
+                                                 alternate_sign=False, norm=None, binary=True)
+        self.char_vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=(CHAR_NGRAM, CHAR_NGRAM),
+                                                 n_features=HASH_FEATURES, alternate_sign=False,
+                                                 norm=None, binary=True)
+
+        # One row per keyword listing, so a keyword in two categories counts for both
+        keywords = [keyword for keywords in categories.values() for keyword in keywords]
+        owners = np.repeat(np.arange(len(categories)), [len(k) for k in categories.values()])
+        membership = sparse.csr_matrix((np.ones(len(keywords)), (owners, np.arange(len(keywords)))),
+                                       shape=(len(categories), len(keywords)))
+        keyword_vectors = self._token_vectors(fold_plural(keywords).to_numpy(dtype=object))
+
+        # IDF over categories: n-grams shared by many categories say little about any of them
+        self.tfidf = TfidfTransformer(norm=None).fit(membership @ keyword_vectors)
+        keyword_vectors = self.tfidf.transform(keyword_vectors)
+
+        # Scale each keyword so it matches itself with score 1, then sum keywords per category
+        self_scores = np.asarray(keyword_vectors.multiply(keyword_vectors).sum(axis=1)).ravel()
+        self.centroids = (membership @ sparse.diags(1 / self_scores) @ keyword_vectors).T.tocsc()
+
+    def _token_vectors(self, tokens):
+        """Word and character n-gram features for each token, side by side"""
+        return sparse.hstack([self.word_vectorizer.transform(tokens),
+                              CHAR_WEIGHT * self.char_vectorizer.transform(tokens)]).tocsr()
+
+    def _row_tokens(self, product_names):
+        """Sparse names x distinct-tokens incidence matrix and the distinct tokens"""
+        names = pd.Series(np.asarray(product_names, dtype=object))
+        tokens = (names.fillna('').astype(str).str.lower()
+                  .str.replace(TOKEN_SEPARATOR_PATTERN, ' ', regex=True)
+                  .str.split()
+                  .explode()
+                  .dropna())
+        tokens = tokens[(tokens.str.len() > 1) & ~tokens.isin(self.stop_words)]
+
+        codes, uniques = pd.factorize(tokens.to_numpy(dtype=object))
+        incidence = sparse.csr_matrix((np.ones(len(codes)), (tokens.index.to_numpy(), codes)),
+                                      shape=(len(names), len(uniques)))
+        # A token repeated within a name still counts once
+        incidence.data[:] = 1
+        return incidence, fold_plural(uniques).to_numpy(dtype=object)
+
+    def score(self, product_names):
+        """Return an (n_rows, n_categories) score matrix for a column of names"""
+        # Repeated names are tokenized once; missing names (code -1) read the zero row
+        name_codes, unique_names = pd.factorize(np.asarray(product_names, dtype=object))
+        incidence, tokens = self._row_tokens(unique_names)
+
+        # Each distinct token is vectorized and scored once, then summed into its names
+        token_scores = self.tfidf.transform(self._token_vectors(tokens)) @ self.centroids
+        name_scores = np.asarray((incidence @ token_scores).todense())
+        name_scores = np.vstack([name_scores, np.zeros((1, len(self.category_names)))])
+        return name_scores[name_codes]
+
+    def categorize(self, product_names):
+        """Return the best category per name; ties go to the earliest category"""
+        scores = self.score(product_names)
+        labels = np.array(self.category_names + [self.default_category], dtype=object)
+        best = np.argmax(scores, axis=1)
+        best[scores.max(axis=1, initial=0) < MIN_MATCH] = len(self.category_names)
+        return labels[best]